@@ -0,0 +1,285 @@
+"""Token and cost accounting per session, tenant, agent and model, with hard budgets.
+
+Every provider reply reports its usage: `responses.create` results carry
+`usage`, and streams end with a `response.completed` event that carries it.
+openai_helper passes each one to `record(model, usage)`. A stream closed early
+or ended without that event is recorded from local estimates instead
+(`record_estimate`), and flagged as estimated. The session comes from
+`session_context(sid)`, which AgentManager sets around its turns. The tenant is
+the caller's scheduling tenant (see scheduling.py). The agent comes from
+telemetry's agent context. Costs are priced with `tokens.worst_case_cost`, so
+a model without a price is charged at the dearest configured one rather than
+as free.
+
+Budgets are checked before a call is dispatched. `reserve(model, prompt,
+max_output_tokens)` prices the call at its worst case: the prompt plus the
+output cap. The prompt size comes from `tokens.count`, which answers from the
+cached sum a `tokens.Sized` prompt carries, so AgentManager's calls are never
+re-counted here. If the spent and reserved totals plus that worst case would
+exceed a budget of the session or the tenant, it raises `BudgetExceeded` and
+the call is never sent. Otherwise the amount is held until `release`, so
+concurrent calls cannot overshoot together. A call without an output cap
+holds only its prompt, so its reply can still take a session past its
+budget; the next call is then refused. Without any budget configured,
+`reserve` does nothing.
+
+    CEREBRAL_SESSION_MAX_TOKENS=200000   input + output tokens per session (0: no limit)
+    CEREBRAL_SESSION_MAX_USD=0.5
+    CEREBRAL_TENANT_MAX_TOKENS=acme=5000000,*=20000000   ('*' applies to every other tenant)
+    CEREBRAL_TENANT_MAX_USD=acme=25
+
+Counters are plain lists under one lock. `render()` adds them to `/metrics`,
+labelled by tenant, agent and model; sessions are left out of the metrics to
+keep their label sets bounded.
+"""
+import contextvars
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import scheduling, telemetry, tokens
+
+# counter layout: calls, input tokens, output tokens, cost (USD), calls with estimated usage
+CALLS, INPUT, OUTPUT, COST, ESTIMATED = range(5)
+
+_session: contextvars.ContextVar = contextvars.ContextVar('cerebral_session', default='')
+
+
+class BudgetExceeded(RuntimeError):
+    def __init__(self, scope: str, name: str, kind: str, limit: float):
+        super().__init__(f'{scope} {name} would exceed its {kind} budget of {limit:g}')
+        self.scope = scope
+        self.name = name
+        self.kind = kind
+        self.limit = limit
+
+
+@contextmanager
+def session_context(sid: str):
+    """Account provider calls made inside the block (in this context) to session `sid`."""
+    token = _session.set(sid)
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+
+def current_session() -> str:
+    return _session.get()
+
+
+def _new() -> List[float]:
+    return [0, 0, 0, 0.0, 0]
+
+
+def _summary(c: List[float]) -> Dict[str, Any]:
+    return {'calls': c[CALLS], 'input_tokens': c[INPUT], 'output_tokens': c[OUTPUT],
+            'cost_usd': round(c[COST], 6), 'estimated_calls': c[ESTIMATED]}
+
+
+class Reservation:
+    __slots__ = ('session', 'tenant', 'tokens', 'usd')
+
+    def __init__(self, session: str, tenant: str, n_tokens: int, usd: float):
+        self.session = session
+        self.tenant = tenant
+        self.tokens = n_tokens
+        self.usd = usd
+
+
+class Limits:
+    """Token and USD budgets per session (one value) and per tenant (a map with '*' default)."""
+
+    def __init__(self, session_tokens: int = 0, session_usd: float = 0.0,
+                 tenant_tokens: Optional[Dict[str, float]] = None, tenant_usd: Optional[Dict[str, float]] = None):
+        self.session_tokens = session_tokens
+        self.session_usd = session_usd
+        self.tenant_tokens = dict(tenant_tokens or {})
+        self.tenant_usd = dict(tenant_usd or {})
+
+    @classmethod
+    def from_env(cls) -> 'Limits':
+        return cls(int(os.getenv('CEREBRAL_SESSION_MAX_TOKENS', '0')),
+                   float(os.getenv('CEREBRAL_SESSION_MAX_USD', '0')),
+                   scheduling._parse_map(os.getenv('CEREBRAL_TENANT_MAX_TOKENS', '')),
+                   scheduling._parse_map(os.getenv('CEREBRAL_TENANT_MAX_USD', '')))
+
+    def __bool__(self) -> bool:
+        return bool(self.session_tokens or self.session_usd or self.tenant_tokens or self.tenant_usd)
+
+    def for_session(self, sid: str) -> Tuple[float, float]:
+        return (self.session_tokens, self.session_usd) if sid else (0, 0.0)
+
+    def for_tenant(self, tenant: str) -> Tuple[float, float]:
+        return (self.tenant_tokens.get(tenant, self.tenant_tokens.get('*', 0)),
+                self.tenant_usd.get(tenant, self.tenant_usd.get('*', 0.0)))
+
+
+class UsageStore:
+    def __init__(self, limits: Optional[Limits] = None):
+        self.limits = Limits.from_env() if limits is None else limits
+        # (tenant, agent, model) -> counter; the source of the metrics
+        self._series: Dict[Tuple[str, str, str], List[float]] = {}
+        # session -> agent -> counter, and per-scope totals used by the budget checks
+        self._sessions: Dict[str, Dict[str, List[float]]] = {}
+        self._session_totals: Dict[str, List[float]] = {}
+        self._tenant_totals: Dict[str, List[float]] = {}
+        # amounts held by calls in flight: scope name -> [tokens, usd]
+        self._held_sessions: Dict[str, List[float]] = {}
+        self._held_tenants: Dict[str, List[float]] = {}
+        self.rejections = {'session': 0, 'tenant': 0}
+        self._lock = threading.Lock()
+
+    def add(self, model: str, input_tokens: int, output_tokens: int, estimated: bool = False,
+            session: Optional[str] = None, agent: Optional[str] = None, tenant: Optional[str] = None):
+        session = current_session() if session is None else session
+        agent = agent or telemetry.current_agent() or 'none'
+        tenant = tenant or scheduling.current()[1]
+        cost = tokens.worst_case_cost(model, input_tokens, output_tokens)
+        with self._lock:
+            counters = [self._series.setdefault((tenant, agent, model), _new()),
+                        self._tenant_totals.setdefault(tenant, _new())]
+            if session:
+                counters.append(self._sessions.setdefault(session, {}).setdefault(agent, _new()))
+                counters.append(self._session_totals.setdefault(session, _new()))
+            for c in counters:
+                c[CALLS] += 1
+                c[INPUT] += input_tokens
+                c[OUTPUT] += output_tokens
+                c[COST] += cost
+                c[ESTIMATED] += estimated
+
+    def reserve(self, model: str, prompt: str, max_output_tokens: Optional[int] = None) -> Optional[Reservation]:
+        """Hold one call's worst case against the budgets, or raise BudgetExceeded."""
+        if not self.limits:
+            return None
+        session = current_session()
+        tenant = scheduling.current()[1]
+        prompt_tokens = tokens.count(prompt)
+        n = prompt_tokens + (max_output_tokens or 0)
+        usd = tokens.worst_case_cost(model, prompt_tokens, max_output_tokens or 0)
+        with self._lock:
+            checks = (('session', session, self.limits.for_session(session), self._session_totals,
+                       self._held_sessions),
+                      ('tenant', tenant, self.limits.for_tenant(tenant), self._tenant_totals, self._held_tenants))
+            for scope, name, (max_tokens, max_usd), totals, held in checks:
+                if not max_tokens and not max_usd:
+                    continue
+                spent = totals.get(name) or _new()
+                hold = held.get(name) or [0, 0.0]
+                if max_tokens and spent[INPUT] + spent[OUTPUT] + hold[0] + n > max_tokens:
+                    self.rejections[scope] += 1
+                    raise BudgetExceeded(scope, name, 'token', max_tokens)
+                if max_usd and spent[COST] + hold[1] + usd > max_usd:
+                    self.rejections[scope] += 1
+                    raise BudgetExceeded(scope, name, 'USD', max_usd)
+            for name, held in ((session, self._held_sessions), (tenant, self._held_tenants)):
+                if name:
+                    hold = held.setdefault(name, [0, 0.0])
+                    hold[0] += n
+                    hold[1] += usd
+        return Reservation(session, tenant, n, usd)
+
+    def release(self, reservation: Optional[Reservation]):
+        if reservation is None:
+            return
+        with self._lock:
+            for name, held in ((reservation.session, self._held_sessions), (reservation.tenant, self._held_tenants)):
+                hold = held.get(name)
+                if hold is None:
+                    continue
+                hold[0] -= reservation.tokens
+                hold[1] -= reservation.usd
+                if hold[0] <= 0:
+                    del held[name]
+
+    def session(self, sid: str) -> Dict[str, Any]:
+        with self._lock:
+            agents = self._sessions.get(sid, {})
+            out = {'session_id': sid, **_summary(self._session_totals.get(sid) or _new()),
+                   'agents': {a: _summary(c) for a, c in agents.items()}}
+        max_tokens, max_usd = self.limits.for_session(sid)
+        out['budget'] = {'max_tokens': max_tokens or None, 'max_usd': max_usd or None}
+        return out
+
+    def forget(self, sid: str):
+        """Drop a closed session's counters; its usage stays in the tenant totals."""
+        with self._lock:
+            self._sessions.pop(sid, None)
+            self._session_totals.pop(sid, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            tenants = {t: _summary(c) for t, c in self._tenant_totals.items()}
+            series = [{'tenant': t, 'agent': a, 'model': m, **_summary(c)}
+                      for (t, a, m), c in sorted(self._series.items())]
+            sessions = len(self._sessions)
+            rejections = dict(self.rejections)
+        for name, summary in tenants.items():
+            max_tokens, max_usd = self.limits.for_tenant(name)
+            summary['budget'] = {'max_tokens': max_tokens or None, 'max_usd': max_usd or None}
+        return {'tenants': tenants, 'series': series, 'sessions': sessions, 'rejections': rejections}
+
+    def render(self) -> List[str]:
+        """Prometheus counters: tokens, cost and calls per tenant, agent and model, and budget rejections."""
+        with self._lock:
+            items = sorted((k, list(c)) for k, c in self._series.items())
+            rejections = dict(self.rejections)
+        lines = ['# HELP cerebral_provider_tokens_total Provider tokens used.',
+                 '# TYPE cerebral_provider_tokens_total counter']
+        for (tenant, agent, model), c in items:
+            base = f'tenant="{telemetry._escape(tenant)}",agent="{agent}",model="{model}"'
+            lines.append(f'cerebral_provider_tokens_total{{{base},kind="input"}} {c[INPUT]}')
+            lines.append(f'cerebral_provider_tokens_total{{{base},kind="output"}} {c[OUTPUT]}')
+        for name, help_text, index in (('cerebral_provider_cost_usd_total', 'Estimated provider cost in USD.', COST),
+                                       ('cerebral_provider_calls_total', 'Provider calls with recorded usage.', CALLS)):
+            lines.extend([f'# HELP {name} {help_text}', f'# TYPE {name} counter'])
+            for (tenant, agent, model), c in items:
+                lines.append(f'{name}{{tenant="{telemetry._escape(tenant)}",agent="{agent}",model="{model}"}} '
+                             f'{c[index]}')
+        lines.extend(['# HELP cerebral_budget_rejections_total Provider calls refused by a token or cost budget.',
+                      '# TYPE cerebral_budget_rejections_total counter'])
+        for scope, n in sorted(rejections.items()):
+            lines.append(f'cerebral_budget_rejections_total{{scope="{scope}"}} {n}')
+        return lines
+
+
+store = UsageStore()
+
+
+def record(model: str, usage) -> bool:
+    """Add one provider-reported usage; False if it carries no token counts."""
+    input_tokens = getattr(usage, 'input_tokens', None)
+    output_tokens = getattr(usage, 'output_tokens', None)
+    if input_tokens is None and output_tokens is None:
+        return False
+    store.add(model, input_tokens or 0, output_tokens or 0)
+    return True
+
+
+def record_estimate(model: str, prompt: str, output_tokens: int):
+    """Add a call whose provider reported no usage, from local counts.
+
+    The prompt is sized at four characters per token rather than counted, so
+    this fallback stays O(1) however long the transcript grows.
+    """
+    store.add(model, len(prompt) // 4, output_tokens, estimated=True)
+
+
+def reserve(model: str, prompt: str, max_output_tokens: Optional[int] = None) -> Optional[Reservation]:
+    return store.reserve(model, prompt, max_output_tokens)
+
+
+def release(reservation: Optional[Reservation]):
+    store.release(reservation)
+
+
+def render() -> str:
+    return '\n'.join(store.render()) + '\n'
+
+
+def reset():
+    """Start from empty counters and re-read the budgets from the environment (tests)."""
+    global store
+    store = UsageStore()
@@ -1,29 +1,199 @@
+import contextvars
 import uuid
-import os
-from typing import Dict, Any
-
-try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
 
+from . import accounting
+from . import jury_ensemble
+from . import openai_helper
 from . import prompts
+from . import retrieval
+from . import structured as so
+from . import telemetry
+from . import tokens
+from .breaker import CircuitOpenError
+from .fact_store import FactStore
+from .openai_helper import resolve_api_key
+from .routing import DEFAULT_MODELS
+from .transcript import Transcript
+from .utils import JuryStreamParser, parse_jury_line
+
+# canned replies used in mock mode, and in degraded mode while a provider circuit is open
+MOCK_REPLIES = {
+    'Opposing': "(mock) Opposing Counsel: The facts do not support that claim; can you prove presence?",
+    'Judge': "(mock) JUDGE: SUSTAINED - The objection is supported by the facts.",
+    'Jury': "Verdict: Guilty; Confidence: 60%",
+}
+
+# provider-side output caps per agent
+MAX_OUTPUT_TOKENS = {'Opposing': 300, 'Judge': 150, 'Jury': 60}
+
+# prompt templates are constants, so their counts are cached
+_template_tokens = lru_cache(maxsize=32)(tokens.count)
+
+
+def _opposing_prompt_parts(facts: str):
+    # the Opposing prompt with the facts filled in, split around the argument
+    head, _, tail = prompts.OPPOSING_PROMPT_TEMPLATE.partition('{argument}')
+    return head.format(facts=facts), tail
 
 
 class AgentManager:
-    def __init__(self):
-        # sessions: session_id -> dict with facts, title, transcript(list of tuples (speaker,text))
+    def __init__(self, jurors: int = 1, jury_quorum: int | None = None, structured: bool = False,
+                 hedger=None, degraded: bool = False, router=None, fact_budget: int = 0, fact_top_k: int = 8,
+                 max_prompt_tokens: int = 0):
+        # sessions: session_id -> dict with facts_id, title, transcript (Transcript of (speaker, text) tuples)
         self.sessions: Dict[str, Dict[str, Any]] = {}
+        # facts are stored once per distinct text; sessions hold the key (see fact_store.py)
+        self.fact_store = FactStore()
+        # jurors > 1 switches the Jury step to the concurrent ensemble (see jury_ensemble)
+        self.jurors = jurors
+        self.jury_quorum = jury_quorum
+        # structured=True asks Judge/Jury for schema-constrained JSON (see structured.py)
+        self.structured = structured
+        # optional hedging.Hedger: duplicate slow agent calls (see hedging.py)
+        self.hedger = hedger
+        # degraded=True answers from MOCK_REPLIES instead of failing while a circuit is open
+        self.degraded = degraded
+        # optional routing.Router: pick each role's model from live latency / quality stats
+        self.router = router
+        # fact_budget > 0: facts longer than this many tokens are cut to the chunks relevant to each call
+        self.fact_budget = fact_budget
+        self.fact_top_k = fact_top_k
+        # max_prompt_tokens > 0: older transcript entries are dropped from prompts that would exceed it
+        self.max_prompt_tokens = max_prompt_tokens
+
+    def configured_models(self) -> set:
+        """Every model this manager may call: the per-agent defaults, routed candidates and the hedge model."""
+        models = set(DEFAULT_MODELS.values())
+        if self.router is not None:
+            for candidates in self.router.routes.values():
+                models.update(candidates)
+        if self.hedger is not None and self.hedger.fallback_model:
+            models.add(self.hedger.fallback_model)
+        return models
 
     def create_session(self, title: str, facts: str) -> str:
         sid = str(uuid.uuid4())
         self.sessions[sid] = {
             'title': title,
-            'facts': facts,
-            'transcript': []
+            'facts_id': self.fact_store.put(facts),
+            'transcript': Transcript()
         }
+        if self.fact_budget:
+            self._fact_index(self.sessions[sid])
         return sid
 
+    def close_session(self, sid: str):
+        """Forget a session and release its references to the facts and evidence."""
+        sess = self.sessions.pop(sid, None)
+        if sess is not None:
+            self.fact_store.release(sess['facts_id'])
+            for doc in sess.get('evidence', ()):
+                doc.release()
+            accounting.store.forget(sid)
+
+    def facts(self, sess) -> str:
+        return self.fact_store.get(sess['facts_id'])
+
+    def attach_evidence(self, sid: str, doc):
+        """Add a stored evidence document (see evidence.py) to the session's facts.
+
+        Builds the document's retrieval index if this is its first session.
+        The session holds a reference to the document until it is closed;
+        raises evidence.EvidenceDeleted if the document is already deleted.
+        """
+        sess = self.get_session(sid)
+        if sess is None:
+            raise KeyError('session not found')
+        doc.retain()
+        doc.index()
+        sess.setdefault('evidence', []).append(doc)
+
+    def fork_session(self, sid: str, at_turn: Optional[int] = None) -> str:
+        """Branch a session after its first `at_turn` turns (all of them by default).
+
+        The branch shares the parent's facts and transcript prefix instead of
+        copying them (see transcript.py) and carries on independently. Parent
+        and branches send the same prompt_cache_key, so the provider can reuse
+        the cached prompt prefix they share.
+        """
+        parent = self.get_session(sid)
+        if parent is None:
+            raise KeyError('session not found')
+        transcript = parent['transcript']
+        n = len(transcript) if at_turn is None else transcript.turn_start(at_turn)
+        cache_key = parent.setdefault('cache_key', sid)
+        fork_sid = str(uuid.uuid4())
+        self.sessions[fork_sid] = {
+            'title': parent['title'],
+            'facts_id': self.fact_store.retain(parent['facts_id']),
+            'transcript': transcript.fork(n),
+            'parent': sid,
+            'forked_at': n,
+            'cache_key': cache_key,
+        }
+        if parent.get('evidence'):
+            self.sessions[fork_sid]['evidence'] = list(parent['evidence'])
+            for doc in parent['evidence']:
+                doc.retain()
+        return fork_sid
+
+    def estimate_turn(self, sid: str, argument: str) -> Dict[str, Any]:
+        """Prompt tokens and worst-case cost of the next turn, without rendering any prompt.
+
+        Sizes come from cached counts (transcript entries, facts, templates).
+        Each agent is assumed to see the agents before it reply at their
+        output cap, so the cost is an upper bound.
+        """
+        sess = self.get_session(sid)
+        if sess is None:
+            raise KeyError('session not found')
+        facts = self._prompt_facts(sess, argument)
+        base = self._facts_tokens(sess, facts)
+        history = sess['transcript'].tokens() + tokens.count(f"User: {argument}") + 1
+        judge_head = prompts.JUDGE_JSON_PROMPT if self.structured else prompts.JUDGE_PROMPT
+        jury_template = prompts.JURY_JSON_PROMPT if self.structured else prompts.JURY_PROMPT
+        prompt_tokens = {
+            'Opposing': _template_tokens(prompts.OPPOSING_PROMPT_TEMPLATE) + base + tokens.count(argument),
+            'Judge': _template_tokens(judge_head) + base + history + MAX_OUTPUT_TOKENS['Opposing'],
+            'Jury': (_template_tokens(jury_template) + base + history + MAX_OUTPUT_TOKENS['Opposing']
+                     + MAX_OUTPUT_TOKENS['Judge']),
+        }
+        agents = []
+        for agent, n in prompt_tokens.items():
+            if self.max_prompt_tokens and agent != 'Opposing':
+                # windowing drops transcript, never facts
+                n = min(n, max(self.max_prompt_tokens, n - history))
+            calls = self.jurors if agent == 'Jury' else 1
+            model = DEFAULT_MODELS[agent]
+            cost = tokens.estimate_cost(model, n, MAX_OUTPUT_TOKENS[agent])
+            agents.append({'agent': agent, 'model': model, 'calls': calls, 'prompt_tokens': n,
+                           'max_output_tokens': MAX_OUTPUT_TOKENS[agent],
+                           'max_cost_usd': None if cost is None else round(cost * calls, 6)})
+        costs = [a['max_cost_usd'] for a in agents]
+        return {
+            'agents': agents,
+            'prompt_tokens': sum(a['prompt_tokens'] * a['calls'] for a in agents),
+            'max_cost_usd': None if None in costs else round(sum(costs), 6),
+            'exact_counts': tokens.exact(),
+        }
+
+    def run_what_if(self, sid: str, arguments: List[str], at_turn: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Fork one branch per argument and run their turns concurrently."""
+        forks = [self.fork_session(sid, at_turn) for _ in arguments]
+
+        def branch(fork_sid, argument):
+            self.add_user_presentation(fork_sid, argument)
+            return {'session_id': fork_sid, 'argument': argument,
+                    'results': self.run_turn_sequence(fork_sid, argument)}
+
+        with ThreadPoolExecutor(max_workers=max(1, len(forks))) as pool:
+            # each branch keeps the caller's priority class and tenant (see scheduling.py)
+            futures = [pool.submit(contextvars.copy_context().run, branch, f, a) for f, a in zip(forks, arguments)]
+            return [f.result() for f in futures]
+
     def get_session(self, sid: str):
         return self.sessions.get(sid)
 
@@ -33,27 +203,221 @@ class AgentManager:
             raise KeyError('session not found')
         sess['transcript'].append(('User', text))
 
+    def _transcript_text(self, sess, reserved: int = 0) -> str:
+        """The transcript for a prompt whose other parts take `reserved` tokens.
+
+        Under max_prompt_tokens, only the newest entries that fit are kept,
+        behind a line saying how many were left out.
+        """
+        return self._transcript_window(sess, reserved)[0]
+
+    def _transcript_window(self, sess, reserved: int = 0):
+        # (text, tokens) of _transcript_text, the tokens from cached per-entry counts
+        transcript = sess['transcript']
+        start = transcript.window_start(self.max_prompt_tokens - reserved - 8) if self.max_prompt_tokens else 0
+        if not start:
+            return transcript.text(), transcript.tokens()
+        # the omission line costs about 8 tokens
+        return f"[{start} earlier entries omitted]\n" + transcript.text(start), transcript.tokens(start) + 8
+
+    def _cache_kwargs(self, sess) -> dict:
+        # only forked sessions share prompt prefixes worth routing to one cache
+        return {'prompt_cache_key': sess['cache_key']} if sess is not None and 'cache_key' in sess else {}
+
+    def _call(self, agent: str, api_key: str, model: str, prompt: str, **kwargs) -> str:
+        """One non-streaming agent call: routed and hedged when those are configured.
+
+        `model` is the role's default; a router may pick another candidate.
+        Streamed turns and ensemble jurors do not come through here, so they
+        are neither routed nor hedged (see routing.py and hedging.py).
+        """
+        def send(chosen: str) -> str:
+            if self.hedger is not None:
+                return self.hedger.call(api_key, agent, chosen, prompt, **kwargs)
+            return openai_helper.call_responses(api_key, model=chosen, input_text=prompt, **kwargs)
+
+        if self.router is not None:
+            return self.router.call(agent, model, send)
+        return send(model)
+
+    def _failure_reply(self, agent: str, exc: Exception, error_text: str):
+        """Return (transcript text, result fields) for a failed agent call.
+
+        In degraded mode an open circuit is answered instantly with the mock
+        reply, flagged 'degraded' so batch callers can tell it from a real one.
+        """
+        if not (self.degraded and isinstance(exc, CircuitOpenError)):
+            return error_text, {}
+        text = '(degraded) ' + MOCK_REPLIES[agent]
+        extra = {}
+        if agent == 'Judge':
+            text, extra = self._judge_fields(text)
+        elif agent == 'Jury':
+            text, extra = self._jury_fields(text)
+        return text, {**extra, 'degraded': True}
+
+    def _fact_index(self, sess) -> retrieval.FactIndex:
+        # one index per distinct facts text, shared by every session holding it
+        return self.fact_store.derived(sess['facts_id'], 'index', retrieval.FactIndex)
+
+    def _retrieves(self, sess) -> bool:
+        """Whether this session's facts are selected per call rather than sent whole."""
+        if sess.get('evidence'):
+            return True
+        return bool(self.fact_budget) and self._fact_index(sess).total_tokens > self.fact_budget
+
+    def _prompt_facts(self, sess, query: str = '') -> str:
+        """The facts for one agent call (see retrieval.py).
+
+        All of them while they fit `fact_budget`; otherwise the chunks most
+        relevant to `query` and the last few transcript entries. Attached
+        evidence documents always contribute excerpts, never their full text.
+        """
+        if not self._retrieves(sess):
+            return self.facts(sess)
+        transcript = sess['transcript']
+        recent = ' '.join(transcript[i][1] for i in range(max(0, len(transcript) - 6), len(transcript)))
+        query = query + ' ' + recent
+        budget = self.fact_budget or retrieval.DEFAULT_BUDGET
+        if self.fact_budget and self._fact_index(sess).total_tokens > self.fact_budget:
+            facts = self._fact_index(sess).select(query, budget, self.fact_top_k)
+        else:
+            facts = self.facts(sess)
+        for doc in sess.get('evidence', ()):
+            facts += f"\n\nEvidence {doc.id} (excerpts):\n" + doc.index().select(query, budget, self.fact_top_k)
+        return facts
+
+    def _facts_tokens(self, sess, facts: str) -> int:
+        """Tokens of `facts` as returned by _prompt_facts; whole facts are counted once per text."""
+        if self._retrieves(sess):
+            return tokens.count(facts)
+        return self.fact_store.derived(sess['facts_id'], 'tokens', tokens.count)
+
+    # Prompts are tokens.Sized: their size is summed from cached counts, so budget
+    # checks (accounting.reserve) never count a rendered prompt.
+
+    def _opposing_prompt(self, sess, user_argument: str) -> str:
+        with telemetry.span('prompt_render'):
+            if self._retrieves(sess):
+                facts = self._prompt_facts(sess, user_argument)
+                text = prompts.OPPOSING_PROMPT_TEMPLATE.format(facts=facts, argument=user_argument)
+            else:
+                facts = ''
+                head, tail = self.fact_store.derived(sess['facts_id'], 'opposing_prompt', _opposing_prompt_parts)
+                text = head + user_argument + tail
+            # _facts_tokens ignores `facts` when the whole text is used (its count is cached per text)
+            n = (_template_tokens(prompts.OPPOSING_PROMPT_TEMPLATE) + self._facts_tokens(sess, facts)
+                 + tokens.count(user_argument))
+            return tokens.Sized(text, n)
+
+    def _judge_prompt(self, sess) -> str:
+        with telemetry.span('prompt_render'):
+            head = prompts.JUDGE_JSON_PROMPT if self.structured else prompts.JUDGE_PROMPT
+            facts = self._prompt_facts(sess)
+            reserved = _template_tokens(head) + self._facts_tokens(sess, facts) + 8
+            transcript, n = self._transcript_window(sess, reserved)
+            return tokens.Sized(head + "\nPinned facts:\n" + facts + "\nTranscript:\n" + transcript, reserved + n)
+
+    def _jury_prompt(self, sess) -> str:
+        with telemetry.span('prompt_render'):
+            template = prompts.JURY_JSON_PROMPT if self.structured else prompts.JURY_PROMPT
+            facts = self._prompt_facts(sess)
+            reserved = _template_tokens(template) + self._facts_tokens(sess, facts)
+            transcript, n = self._transcript_window(sess, reserved)
+            return tokens.Sized(template.format(facts=facts, transcript=transcript), reserved + n)
+
+    def _judge_kwargs(self, sess=None) -> dict:
+        kwargs = self._cache_kwargs(sess)
+        if self.structured:
+            kwargs['text'] = so.text_format('judge_ruling', so.JUDGE_SCHEMA)
+        return kwargs
+
+    def _jury_kwargs(self, sess=None) -> dict:
+        # the Jury answers with one short line, so cap generation on the provider side too
+        kwargs = {'max_tokens': MAX_OUTPUT_TOKENS['Jury'], **self._cache_kwargs(sess)}
+        if self.structured:
+            kwargs['text'] = so.text_format('jury_verdict', so.JURY_SCHEMA)
+        return kwargs
+
+    def _judge_fields(self, text: str):
+        """Return (transcript text, result fields) for a Judge reply."""
+        with telemetry.span('parse'):
+            return self._parse_judge(text)
+
+    def _parse_judge(self, text: str):
+        if not self.structured:
+            return text, {}
+        fields, outcome = so.parse_judge(text)
+        if not fields:
+            return text, {'parse': outcome}
+        return so.render_judge(fields), {**fields, 'parse': outcome}
+
+    def _jury_fields(self, text: str):
+        """Return (transcript text, result fields) for a Jury reply."""
+        with telemetry.span('parse'):
+            return self._parse_jury(text)
+
+    def _parse_jury(self, text: str):
+        if self.structured:
+            fields, outcome = so.parse_jury(text)
+            if not fields:
+                return text, {'parse': outcome}
+            return so.render_jury(fields), {**fields, 'parse': outcome}
+        parsed = parse_jury_line(text)
+        if not parsed:
+            return text, {}
+        return text, {'verdict': parsed[0], 'confidence': parsed[1]}
+
+    def run_jury_ensemble(self, sid: str):
+        """Run the multi-juror ensemble on the session's current transcript.
+
+        Appends the aggregated verdict line to the transcript and returns a Jury
+        result dict carrying the per-juror details under 'ensemble'.
+        """
+        sess = self.get_session(sid)
+        if sess is None:
+            raise KeyError('session not found')
+        facts = self._prompt_facts(sess)
+        template = prompts.JURY_JSON_PROMPT if self.structured else prompts.JURY_PROMPT
+        # every juror's prompt is the Jury prompt behind a persona prefix; size for the longest one
+        prefix = max(_template_tokens(prompts.JUROR_PERSONA_PREFIX.format(index=self.jurors, persona=p))
+                     for p in prompts.JUROR_PERSONAS)
+        reserved = prefix + _template_tokens(template) + self._facts_tokens(sess, facts)
+        transcript, n = self._transcript_window(sess, reserved)
+        with accounting.session_context(sid):
+            ensemble = jury_ensemble.run_jury_ensemble(resolve_api_key(), facts, transcript, jurors=self.jurors,
+                                                       quorum=self.jury_quorum, structured=self.structured,
+                                                       prompt_tokens=reserved + n)
+        agg = ensemble['aggregate']
+        text = jury_ensemble.format_verdict_line(agg)
+        sess['transcript'].append(('Jury', text))
+        result = {'agent': 'Jury', 'text': text, 'ensemble': ensemble}
+        if agg['verdict']:
+            result['verdict'] = agg['verdict']
+            result['confidence'] = agg['confidence']
+        return result
+
     def call_opposing(self, sid: str, user_argument: str) -> str:
         """Call the Opposing Counsel agent (non-streaming) and return text reply."""
         sess = self.get_session(sid)
         if sess is None:
             raise KeyError('session not found')
 
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key or OpenAI is None:
+        api_key = resolve_api_key()
+        if not api_key:
             # Return a deterministic mocked reply when API not available
-            reply = "(mock) Opposing Counsel: The facts do not support that claim; can you prove presence?"
+            reply = MOCK_REPLIES['Opposing']
             sess['transcript'].append(('Opposing', reply))
             return reply
-        from .openai_helper import call_responses
-
-        prompt = prompts.OPPOSING_PROMPT_TEMPLATE.format(facts=sess['facts'], argument=user_argument)
+        prompt = self._opposing_prompt(sess, user_argument)
         try:
-            text = call_responses(api_key, model='gpt-5-codex', input_text=prompt, max_tokens=300)
+            with accounting.session_context(sid):
+                text = self._call('Opposing', api_key, 'gpt-5-codex', prompt,
+                                  max_tokens=MAX_OUTPUT_TOKENS['Opposing'], **self._cache_kwargs(sess))
             sess['transcript'].append(('Opposing', text))
             return text
         except Exception as e:
-            err = f"(error) {e}"
+            err, _ = self._failure_reply('Opposing', e, f"(error) {e}")
             sess['transcript'].append(('Opposing', err))
             return err
 
@@ -63,6 +427,10 @@ class AgentManager:
         Sequence: Opposing Counsel -> Judge -> Jury (verdict summary).
         Returns a list of dicts: [{'agent': 'Opposing', 'text': ...}, ...]
         """
+        with telemetry.turn(sid, 'sync'), accounting.session_context(sid):
+            return self._run_turn_sequence(sid, user_argument)
+
+    def _run_turn_sequence(self, sid: str, user_argument: str):
         sess = self.get_session(sid)
         if sess is None:
             raise KeyError('session not found')
@@ -70,63 +438,52 @@ class AgentManager:
         results = []
 
         # 1) Opposing Counsel
-        opposing_text = self.call_opposing(sid, user_argument)
-        results.append({'agent': 'Opposing', 'text': opposing_text})
+        with telemetry.agent_context('Opposing'):
+            opposing_text = self.call_opposing(sid, user_argument)
+            opposing = {'agent': 'Opposing', 'text': opposing_text}
+            if opposing_text.startswith('(degraded)'):
+                opposing['degraded'] = True
+            results.append(opposing)
 
         # 2) Judge - short ruling based on facts and transcript
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key or OpenAI is None:
-            judge_reply = "(mock) JUDGE: SUSTAINED - The objection is supported by the facts."
-            sess['transcript'].append(('Judge', judge_reply))
-            results.append({'agent': 'Judge', 'text': judge_reply})
-        else:
-            # use openai_helper for resilience
-            from .openai_helper import call_responses
-            transcript_text = "\n".join([f"{s}: {t}" for s, t in sess.get('transcript', [])])
-            prompt = prompts.JUDGE_PROMPT + "\nPinned facts:\n" + sess.get('facts', '') + "\nTranscript:\n" + transcript_text
-            try:
-                jtext = call_responses(api_key, model='gpt-5', input_text=prompt, max_tokens=150)
-                sess['transcript'].append(('Judge', jtext))
-                results.append({'agent': 'Judge', 'text': jtext})
-            except Exception as e:
-                jerr = f"(error) Judge: {e}"
-                sess['transcript'].append(('Judge', jerr))
-                results.append({'agent': 'Judge', 'text': jerr})
-
-        # 3) Jury - short verdict/confidence summary
+        with telemetry.agent_context('Judge'):
+            api_key = resolve_api_key()
+            if not api_key:
+                judge_reply, extra = self._judge_fields(MOCK_REPLIES['Judge'])
+                sess['transcript'].append(('Judge', judge_reply))
+                results.append({'agent': 'Judge', 'text': judge_reply, **extra})
+            else:
+                prompt = self._judge_prompt(sess)
+                try:
+                    jtext = self._call('Judge', api_key, 'gpt-5', prompt, max_tokens=MAX_OUTPUT_TOKENS['Judge'],
+                                       **self._judge_kwargs(sess))
+                    jtext, extra = self._judge_fields(jtext)
+                    sess['transcript'].append(('Judge', jtext))
+                    results.append({'agent': 'Judge', 'text': jtext, **extra})
+                except Exception as e:
+                    jerr, extra = self._failure_reply('Judge', e, f"(error) Judge: {e}")
+                    sess['transcript'].append(('Judge', jerr))
+                    results.append({'agent': 'Judge', 'text': jerr, **extra})
+
         # 3) Jury - short verdict/confidence summary (structured)
-        try:
-            from .utils import parse_jury_line
-        except Exception:
-            # fallback when running from different working directory
-            from backend.utils import parse_jury_line
-
-        if not api_key or OpenAI is None:
-            jury_reply = "Verdict: Guilty; Confidence: 60%"
-            sess['transcript'].append(('Jury', jury_reply))
-            parsed = parse_jury_line(jury_reply)
-            jury_result = {'agent': 'Jury', 'text': jury_reply}
-            if parsed:
-                jury_result['verdict'] = parsed[0]
-                jury_result['confidence'] = parsed[1]
-            results.append(jury_result)
-        else:
-            from .openai_helper import call_responses
-            transcript_text = "\n".join([f"{s}: {t}" for s, t in sess.get('transcript', [])])
-            jury_prompt = prompts.JURY_PROMPT.format(facts=sess.get('facts', ''), transcript=transcript_text)
-            try:
-                jtext = call_responses(api_key, model='gpt-5', input_text=jury_prompt, max_tokens=60)
-                sess['transcript'].append(('Jury', jtext))
-                jury_result = {'agent': 'Jury', 'text': jtext}
-                parsed = parse_jury_line(jtext)
-                if parsed:
-                    jury_result['verdict'] = parsed[0]
-                    jury_result['confidence'] = parsed[1]
-                results.append(jury_result)
-            except Exception as e:
-                jerr = f"(error) Jury: {e}"
-                sess['transcript'].append(('Jury', jerr))
-                results.append({'agent': 'Jury', 'text': jerr})
+        with telemetry.agent_context('Jury'):
+            if self.jurors > 1:
+                results.append(self.run_jury_ensemble(sid))
+            elif not api_key:
+                jury_reply, extra = self._jury_fields(MOCK_REPLIES['Jury'])
+                sess['transcript'].append(('Jury', jury_reply))
+                results.append({'agent': 'Jury', 'text': jury_reply, **extra})
+            else:
+                jury_prompt = self._jury_prompt(sess)
+                try:
+                    jtext = self._call('Jury', api_key, 'gpt-5', jury_prompt, **self._jury_kwargs(sess))
+                    jtext, extra = self._jury_fields(jtext)
+                    sess['transcript'].append(('Jury', jtext))
+                    results.append({'agent': 'Jury', 'text': jtext, **extra})
+                except Exception as e:
+                    jerr, extra = self._failure_reply('Jury', e, f"(error) Jury: {e}")
+                    sess['transcript'].append(('Jury', jerr))
+                    results.append({'agent': 'Jury', 'text': jerr, **extra})
 
         return results
 
@@ -137,6 +494,15 @@ class AgentManager:
         and sends it to the WebSocket (or similar). This method blocks while streaming and
         returns when finished.
         """
+        with telemetry.turn(sid, 'stream'), accounting.session_context(sid):
+            self._run_turn_sequence_stream(sid, user_argument, send_sync)
+
+    def _run_turn_sequence_stream(self, sid: str, user_argument: str, raw_send):
+        def send_sync(payload):
+            # the 'send' phase covers the caller's delivery of every delta and final message
+            with telemetry.span('send'):
+                raw_send(payload)
+
         sess = self.get_session(sid)
         if sess is None:
             raise KeyError('session not found')
@@ -152,102 +518,134 @@ class AgentManager:
             except Exception:
                 pass
 
-        api_key = os.getenv('OPENAI_API_KEY')
+        api_key = resolve_api_key()
 
         # 1) Opposing Counsel (stream if available)
-        agent = 'Opposing'
-        prompt = prompts.OPPOSING_PROMPT_TEMPLATE.format(facts=sess['facts'], argument=user_argument)
-        if not api_key or OpenAI is None:
-            # mock streaming: send a couple deltas then done
-            parts = ['(mock) Opposing:', ' The facts do not support that claim.', ' Can you provide evidence?']
-            accum = ''
-            for p in parts:
-                accum += p
-                try:
-                    send_sync({'type': 'delta', 'agent': agent, 'delta': p})
-                except Exception:
-                    pass
-            send_final(agent, accum)
-        else:
-            try:
-                from .openai_helper import stream_responses
+        with telemetry.agent_context('Opposing'):
+            agent = 'Opposing'
+            prompt = self._opposing_prompt(sess, user_argument)
+            if not api_key:
+                # mock streaming: send a couple deltas then done
+                parts = ['(mock) Opposing:', ' The facts do not support that claim.', ' Can you provide evidence?']
                 accum = ''
-                for chunk in stream_responses(api_key, model='gpt-5-codex', input_text=prompt):
-                    text = str(chunk)
-                    accum += text
+                for p in parts:
+                    accum += p
                     try:
-                        send_sync({'type': 'delta', 'agent': agent, 'delta': text})
+                        send_sync({'type': 'delta', 'agent': agent, 'delta': p})
                     except Exception:
                         pass
                 send_final(agent, accum)
-            except Exception as e:
-                send_final(agent, f"(error) {e}")
+            else:
+                try:
+                    accum = ''
+                    for chunk in openai_helper.stream_responses(api_key, model='gpt-5-codex', input_text=prompt,
+                                                                **self._cache_kwargs(sess)):
+                        text = str(chunk)
+                        accum += text
+                        try:
+                            send_sync({'type': 'delta', 'agent': agent, 'delta': text})
+                        except Exception:
+                            pass
+                    send_final(agent, accum)
+                except Exception as e:
+                    text, extra = self._failure_reply(agent, e, f"(error) {e}")
+                    send_final(agent, text, extra=extra)
 
         # 2) Judge
-        agent = 'Judge'
-        transcript_text = "\n".join([f"{s}: {t}" for s, t in sess.get('transcript', [])])
-        judge_prompt = prompts.JUDGE_PROMPT + "\nPinned facts:\n" + sess.get('facts', '') + "\nTranscript:\n" + transcript_text
-        if not api_key or OpenAI is None:
-            parts = ['(mock) JUDGE: SUSTAINED -', ' The objection is supported by the facts.']
-            accum = ''
-            for p in parts:
-                accum += p
-                try:
-                    send_sync({'type': 'delta', 'agent': agent, 'delta': p})
-                except Exception:
-                    pass
-            send_final(agent, accum)
-        else:
-            try:
-                from .openai_helper import stream_responses
+        with telemetry.agent_context('Judge'):
+            agent = 'Judge'
+            judge_prompt = self._judge_prompt(sess)
+            if not api_key:
+                parts = ['(mock) JUDGE: SUSTAINED -', ' The objection is supported by the facts.']
                 accum = ''
-                for chunk in stream_responses(api_key, model='gpt-5', input_text=judge_prompt):
-                    text = str(chunk)
-                    accum += text
+                for p in parts:
+                    accum += p
                     try:
-                        send_sync({'type': 'delta', 'agent': agent, 'delta': text})
+                        send_sync({'type': 'delta', 'agent': agent, 'delta': p})
                     except Exception:
                         pass
-                send_final(agent, accum)
-            except Exception as e:
-                send_final(agent, f"(error) {e}")
+                text, extra = self._judge_fields(accum)
+                send_final(agent, text, extra=extra)
+            else:
+                try:
+                    accum = ''
+                    fparser = so.JsonFieldStreamParser(so.JUDGE_VALIDATOR) if self.structured else None
+                    for chunk in openai_helper.stream_responses(api_key, model='gpt-5', input_text=judge_prompt,
+                                                                **self._judge_kwargs(sess)):
+                        text = str(chunk)
+                        accum += text
+                        try:
+                            send_sync({'type': 'delta', 'agent': agent, 'delta': text})
+                            if fparser is not None:
+                                # forward each field as soon as its value is complete
+                                for name, value in fparser.feed(text):
+                                    send_sync({'type': 'field', 'agent': agent, 'name': name, 'value': value})
+                        except Exception:
+                            pass
+                    text, extra = self._judge_fields(accum)
+                    send_final(agent, text, extra=extra)
+                except Exception as e:
+                    text, extra = self._failure_reply(agent, e, f"(error) {e}")
+                    send_final(agent, text, extra=extra)
 
         # 3) Jury
-        from .utils import parse_jury_line
-        agent = 'Jury'
-        transcript_text = "\n".join([f"{s}: {t}" for s, t in sess.get('transcript', [])])
-        jury_prompt = prompts.JURY_PROMPT.format(facts=sess.get('facts', ''), transcript=transcript_text)
-        if not api_key or OpenAI is None:
-            parts = ['Verdict: Guilty; ', 'Confidence: 60%']
-            accum = ''
-            for p in parts:
-                accum += p
+        with telemetry.agent_context('Jury'):
+            agent = 'Jury'
+
+            def send_verdict(verdict, confidence):
                 try:
-                    send_sync({'type': 'delta', 'agent': agent, 'delta': p})
+                    send_sync({'type': 'verdict', 'agent': agent, 'verdict': verdict, 'confidence': confidence})
                 except Exception:
                     pass
-            parsed = parse_jury_line(accum)
-            extra = {}
-            if parsed:
-                extra['verdict'] = parsed[0]
-                extra['confidence'] = parsed[1]
-            send_final(agent, accum, extra=extra)
-        else:
-            try:
-                from .openai_helper import stream_responses
+
+            if self.jurors > 1:
+                # jurors are aggregated as a panel, so there are no deltas to forward
+                result = self.run_jury_ensemble(sid)
+                if 'verdict' in result:
+                    send_verdict(result['verdict'], result['confidence'])
+                payload = {'type': 'done', **result}
+                try:
+                    send_sync(payload)
+                except Exception:
+                    pass
+            elif not api_key:
+                parts = ['Verdict: Guilty; ', 'Confidence: 60%']
                 accum = ''
-                for chunk in stream_responses(api_key, model='gpt-5', input_text=jury_prompt):
-                    text = str(chunk)
-                    accum += text
+                for p in parts:
+                    accum += p
                     try:
-                        send_sync({'type': 'delta', 'agent': agent, 'delta': text})
+                        send_sync({'type': 'delta', 'agent': agent, 'delta': p})
                     except Exception:
                         pass
-                parsed = parse_jury_line(accum)
-                extra = {}
-                if parsed:
-                    extra['verdict'] = parsed[0]
-                    extra['confidence'] = parsed[1]
-                send_final(agent, accum, extra=extra)
-            except Exception as e:
-                send_final(agent, f"(error) {e}")
+                text, extra = self._jury_fields(accum)
+                if 'verdict' in extra:
+                    send_verdict(extra['verdict'], extra['confidence'])
+                send_final(agent, text, extra=extra)
+            else:
+                try:
+                    parser = so.JuryFieldStreamParser() if self.structured else JuryStreamParser()
+                    stream = openai_helper.stream_responses(api_key, model='gpt-5',
+                                                            input_text=self._jury_prompt(sess),
+                                                            **self._jury_kwargs(sess))
+                    try:
+                        for chunk in stream:
+                            text = str(chunk)
+                            matched = parser.feed(text)
+                            try:
+                                send_sync({'type': 'delta', 'agent': agent, 'delta': text})
+                                for name, value in getattr(parser, 'new_fields', ()):
+                                    send_sync({'type': 'field', 'agent': agent, 'name': name, 'value': value})
+                            except Exception:
+                                pass
+                            if matched:
+                                # the verdict line is complete: emit it now and stop paying for tokens
+                                send_verdict(*parser.result)
+                                break
+                    finally:
+                        # closing the generator exits the provider stream context
+                        stream.close()
+                    text, extra = self._jury_fields(parser.text)
+                    send_final(agent, text, extra=extra)
+                except Exception as e:
+                    text, extra = self._failure_reply(agent, e, f"(error) {e}")
+                    send_final(agent, text, extra=extra)
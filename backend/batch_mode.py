@@ -0,0 +1,316 @@
+"""Offline batch execution for non-interactive workloads.
+
+Instead of one synchronous `call_responses` per agent call, the turns of many
+sessions are collected into provider batch files and run as three waves that
+follow the turn's dependency chain: every Opposing reply, then every Judge
+ruling (which needs the Opposing reply in the transcript), then every Jury
+verdict. Each wave is one batch: submit, poll until complete, map the results
+back onto sessions by `custom_id`.
+
+`OpenAIBatchBackend` talks to the provider's Files + Batches endpoints;
+`LocalBatchBackend` is a file-based stand-in that answers with the fake
+provider, so the wave scheduler can be tested and benchmarked offline.
+
+Budgets apply as for live calls (see accounting.py): each request line holds
+its worst case while its wave runs, a session over budget gets an error reply
+instead of a line, and the usage in the batch output is recorded per session
+and agent (at the standard, not the batch, prices).
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import accounting
+from .agent_manager import MAX_OUTPUT_TOKENS, AgentManager
+
+BATCH_ENDPOINT = '/v1/responses'
+TERMINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+
+def request_line(custom_id: str, model: str, prompt: str, **body) -> Dict[str, Any]:
+    """One line of a provider batch input file."""
+    if 'max_tokens' in body:
+        body['max_output_tokens'] = body.pop('max_tokens')
+    return {'custom_id': custom_id, 'method': 'POST', 'url': BATCH_ENDPOINT,
+            'body': {'model': model, 'input': prompt, **body}}
+
+
+def _text_from_body(body: Dict[str, Any]) -> str:
+    text = body.get('output_text')
+    if text:
+        return text
+    parts = []
+    for item in body.get('output') or []:
+        for content in item.get('content') or []:
+            if content.get('type') in (None, 'output_text') and content.get('text'):
+                parts.append(content['text'])
+    return ''.join(parts)
+
+
+def parse_output_line(line: Dict[str, Any]) -> Tuple[str, Optional[str], Optional[str]]:
+    """Return (custom_id, text, error) for one line of a batch output file."""
+    cid = line.get('custom_id')
+    if line.get('error'):
+        return cid, None, str(line['error'].get('message') or line['error'])
+    resp = line.get('response') or {}
+    if resp.get('status_code', 200) >= 400:
+        return cid, None, f"status {resp.get('status_code')}"
+    return cid, _text_from_body(resp.get('body') or {}), None
+
+
+class OpenAIBatchBackend:
+    """Provider batch API: upload a JSONL file, create a batch, poll, download."""
+
+    def __init__(self, client, completion_window: str = '24h'):
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, lines: List[Dict[str, Any]]) -> str:
+        data = ''.join(json.dumps(line) + '\n' for line in lines).encode('utf-8')
+        f = self.client.files.create(file=('batch.jsonl', data), purpose='batch')
+        batch = self.client.batches.create(input_file_id=f.id, endpoint=BATCH_ENDPOINT,
+                                           completion_window=self.completion_window)
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> Iterable[Dict[str, Any]]:
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, getattr(batch, 'error_file_id', None)):
+            if not file_id:
+                continue
+            for raw in self.client.files.content(file_id).text.splitlines():
+                if raw.strip():
+                    yield json.loads(raw)
+
+
+class LocalBatchBackend:
+    """File-based stand-in for the batch endpoint.
+
+    Input and output files are written under `directory` in the provider's
+    JSONL format. Each batch is processed on a background thread by
+    `responder` (a client with `responses.create`, the fake provider by
+    default) after `delay` seconds of simulated queueing.
+    """
+
+    def __init__(self, directory: str, responder=None, delay: float = 0.0):
+        if responder is None:
+            from .fake_provider import FakeOpenAI
+            responder = FakeOpenAI()
+        self.directory = directory
+        self.responder = responder
+        self.delay = delay
+        self._status: Dict[str, str] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, batch_id: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{batch_id}.{kind}.jsonl")
+
+    def submit(self, lines: List[Dict[str, Any]]) -> str:
+        batch_id = 'batch_' + uuid.uuid4().hex
+        with open(self._path(batch_id, 'input'), 'w', encoding='utf-8') as fh:
+            for line in lines:
+                fh.write(json.dumps(line) + '\n')
+        self._status[batch_id] = 'in_progress'
+        threading.Thread(target=self._process, args=(batch_id,), daemon=True).start()
+        return batch_id
+
+    def _process(self, batch_id: str):
+        time.sleep(self.delay)
+        with open(self._path(batch_id, 'input'), encoding='utf-8') as src, \
+                open(self._path(batch_id, 'output'), 'w', encoding='utf-8') as out:
+            for raw in src:
+                req = json.loads(raw)
+                body = dict(req['body'])
+                try:
+                    resp = self.responder.responses.create(model=body.pop('model'), input=body.pop('input'), **body)
+                    out_body = {'output_text': resp.output_text}
+                    if getattr(resp, 'usage', None) is not None:
+                        out_body['usage'] = {'input_tokens': resp.usage.input_tokens,
+                                             'output_tokens': resp.usage.output_tokens}
+                    line = {'custom_id': req['custom_id'], 'response': {'status_code': 200, 'body': out_body}}
+                except Exception as e:
+                    line = {'custom_id': req['custom_id'], 'error': {'message': str(e)}}
+                out.write(json.dumps(line) + '\n')
+        self._status[batch_id] = 'completed'
+
+    def status(self, batch_id: str) -> str:
+        return self._status.get(batch_id, 'failed')
+
+    def results(self, batch_id: str) -> Iterable[Dict[str, Any]]:
+        with open(self._path(batch_id, 'output'), encoding='utf-8') as fh:
+            for raw in fh:
+                if raw.strip():
+                    yield json.loads(raw)
+
+
+def line_usage(line: Dict[str, Any]) -> Optional[Dict[str, int]]:
+    """The `usage` object of one batch output line, if it reports one."""
+    return ((line.get('response') or {}).get('body') or {}).get('usage')
+
+
+def run_batch(backend, lines: List[Dict[str, Any]], poll_interval: float = 5.0,
+              timeout: Optional[float] = None,
+              on_usage: Optional[Callable[[str, Dict[str, int]], None]] = None
+              ) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    """Submit one batch and block until it finishes; returns custom_id -> (text, error).
+
+    `on_usage(custom_id, usage)` is called for each output line that reports usage.
+    """
+    if not lines:
+        return {}
+    batch_id = backend.submit(lines)
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        status = backend.status(batch_id)
+        if status in TERMINAL_STATUSES:
+            break
+        if deadline and time.monotonic() > deadline:
+            raise TimeoutError(f'batch {batch_id} still {status}')
+        time.sleep(poll_interval)
+    out = {}
+    for line in backend.results(batch_id):
+        cid, text, err = parse_output_line(line)
+        out[cid] = (text, err)
+        usage = line_usage(line)
+        if on_usage is not None and usage:
+            on_usage(cid, usage)
+    if status != 'completed':
+        for line in lines:
+            out.setdefault(line['custom_id'], (None, f'batch {status}'))
+    return out
+
+
+def run_turns_batched(manager: AgentManager, turns: List[Tuple[str, str]], backend,
+                      poll_interval: float = 5.0, timeout: Optional[float] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Run one Opposing -> Judge -> Jury turn for many sessions as three batch waves.
+
+    `turns` is a list of (session_id, user_argument); each session should
+    appear once. Returns session_id -> agent results in the same shape as
+    `AgentManager.run_turn_sequence`.
+    """
+    results: Dict[str, List[Dict[str, Any]]] = {sid: [] for sid, _ in turns}
+    sessions = {}
+    for sid, argument in turns:
+        sess = manager.get_session(sid)
+        if sess is None:
+            raise KeyError(f'session not found: {sid}')
+        sessions[sid] = (sess, argument)
+        manager.add_user_presentation(sid, argument)
+
+    waves = [
+        ('Opposing', 'gpt-5-codex', lambda sess, arg: manager._opposing_prompt(sess, arg),
+         {'max_tokens': MAX_OUTPUT_TOKENS['Opposing']}),
+        ('Judge', 'gpt-5', lambda sess, arg: manager._judge_prompt(sess),
+         {'max_tokens': MAX_OUTPUT_TOKENS['Judge'], **manager._judge_kwargs()}),
+        ('Jury', 'gpt-5', lambda sess, arg: manager._jury_prompt(sess), manager._jury_kwargs()),
+    ]
+    for agent, model, build, kwargs in waves:
+        lines, held, refused = [], [], {}
+
+        def on_usage(cid, usage):
+            sid = cid.rpartition(':')[0]
+            accounting.store.add(model, usage.get('input_tokens') or 0, usage.get('output_tokens') or 0,
+                                 session=sid, agent=agent)
+
+        for sid, (sess, arg) in sessions.items():
+            prompt = build(sess, arg)
+            try:
+                with accounting.session_context(sid):
+                    held.append(accounting.reserve(model, prompt, kwargs.get('max_tokens')))
+            except accounting.BudgetExceeded as e:
+                refused[f"{sid}:{agent}"] = (None, str(e))
+                continue
+            lines.append(request_line(f"{sid}:{agent}", model, prompt, **dict(kwargs)))
+        try:
+            answers = run_batch(backend, lines, poll_interval=poll_interval, timeout=timeout, on_usage=on_usage)
+        finally:
+            for reservation in held:
+                accounting.release(reservation)
+        answers.update(refused)
+        for sid, (sess, _) in sessions.items():
+            text, err = answers.get(f"{sid}:{agent}", (None, 'missing from batch output'))
+            extra = {}
+            if err is not None:
+                text = f"(error) {agent}: {err}"
+            elif agent == 'Judge':
+                text, extra = manager._judge_fields(text)
+            elif agent == 'Jury':
+                text, extra = manager._jury_fields(text)
+            sess['transcript'].append((agent, text))
+            results[sid].append({'agent': agent, 'text': text, **extra})
+    return results
+
+
+def run_cases_batched(manager: AgentManager, cases: List[Dict[str, Any]], backend,
+                      poll_interval: float = 5.0, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Evaluate whole cases in batch mode: one three-wave round per argument position."""
+    sids = [manager.create_session(c.get('title', ''), c['facts']) for c in cases]
+    out = [{'title': c.get('title'), 'turns': []} for c in cases]
+    try:
+        rounds = max((len(c.get('arguments') or []) for c in cases), default=0)
+        for r in range(rounds):
+            turns = [(sid, c['arguments'][r]) for sid, c in zip(sids, cases) if len(c.get('arguments') or []) > r]
+            answers = run_turns_batched(manager, turns, backend, poll_interval=poll_interval, timeout=timeout)
+            for i, sid in enumerate(sids):
+                if sid in answers:
+                    out[i]['turns'].append(answers[sid])
+        for entry in out:
+            jury = entry['turns'][-1][-1] if entry['turns'] else {}
+            entry['verdict'] = jury.get('verdict')
+            entry['confidence'] = jury.get('confidence')
+    finally:
+        for sid in sids:
+            manager.close_session(sid)
+    return out
+
+
+def main(argv=None):
+    import argparse
+    import sys
+    from .openai_helper import get_client, resolve_api_key
+
+    ap = argparse.ArgumentParser(description='Evaluate a JSONL file of cases through provider batch waves.')
+    ap.add_argument('input', help='JSONL cases file ({"title", "facts", "arguments": [...]} per line)')
+    ap.add_argument('-o', '--output', default='-', help="JSONL results file, or '-' for stdout")
+    ap.add_argument('--local', metavar='DIR', help='use the file-based local stand-in in DIR')
+    ap.add_argument('--chunk', type=int, default=1000, help='cases per batch wave')
+    ap.add_argument('--poll', type=float, default=30.0, help='poll interval in seconds')
+    args = ap.parse_args(argv)
+
+    if args.local:
+        backend = LocalBatchBackend(args.local)
+        poll = min(args.poll, 0.05)
+    else:
+        api_key = resolve_api_key()
+        if not api_key:
+            ap.error('OPENAI_API_KEY not set (or use --local)')
+        backend = OpenAIBatchBackend(get_client(api_key))
+        poll = args.poll
+
+    manager = AgentManager()
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        with open(args.input, encoding='utf-8') as src:
+            chunk = []
+            for raw in src:
+                if raw.strip():
+                    chunk.append(json.loads(raw))
+                if len(chunk) >= args.chunk:
+                    for res in run_cases_batched(manager, chunk, backend, poll_interval=poll):
+                        out.write(json.dumps(res) + '\n')
+                    chunk = []
+            if chunk:
+                for res in run_cases_batched(manager, chunk, backend, poll_interval=poll):
+                    out.write(json.dumps(res) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
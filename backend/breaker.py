@@ -0,0 +1,121 @@
+"""Per-model circuit breakers for provider calls.
+
+A breaker opens after `failure_threshold` consecutive provider failures.
+While it is open, calls fail at once with CircuitOpenError instead of waiting
+for a network timeout. After `reset_timeout` seconds it goes half-open and
+lets a single probe call through. A successful probe closes the breaker; a
+failed one opens it again.
+
+Only failures that say something about the provider count: network errors,
+timeouts, 429 and 5xx. Client mistakes (other 4xx, rejected keyword
+arguments) do not.
+
+    CEREBRAL_BREAKER_FAILURES=5     consecutive failures before opening
+    CEREBRAL_BREAKER_RESET_S=30     seconds open before a half-open probe
+"""
+import os
+import threading
+import time
+from typing import Any, Dict
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without contacting the provider while a model's breaker is open."""
+
+    def __init__(self, model: str, retry_in: float):
+        super().__init__(f'provider circuit open for {model}; retry in {retry_in:.1f}s')
+        self.model = model
+        self.retry_in = retry_in
+
+
+def counts_as_failure(exc: BaseException) -> bool:
+    if isinstance(exc, (TypeError, CircuitOpenError)):
+        return False
+    status = getattr(exc, 'status_code', None)
+    if isinstance(status, int) and 400 <= status < 500 and status != 429:
+        return False
+    return True
+
+
+class CircuitBreaker:
+    def __init__(self, model: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.stats = {'opened': 0, 'rejected': 0}
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go to the provider now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            waited = time.monotonic() - self.opened_at
+            if self.state == OPEN and waited >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self.stats['rejected'] += 1
+            raise CircuitOpenError(self.model, max(0.0, self.reset_timeout - waited))
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self, exc: BaseException):
+        with self._lock:
+            if not counts_as_failure(exc):
+                # a half-open probe that failed for a client reason proves nothing either way
+                self._probing = False
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.stats['opened'] += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures, **self.stats}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def breaker_for(model: str) -> CircuitBreaker:
+    """Process-wide breaker for `model`, created on first use from the environment."""
+    with _registry_lock:
+        b = _breakers.get(model)
+        if b is None:
+            b = _breakers[model] = CircuitBreaker(
+                model,
+                failure_threshold=int(os.getenv('CEREBRAL_BREAKER_FAILURES', '5')),
+                reset_timeout=float(os.getenv('CEREBRAL_BREAKER_RESET_S', '30')),
+            )
+        return b
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    with _registry_lock:
+        items = list(_breakers.items())
+    return {model: b.snapshot() for model, b in items}
+
+
+def reset():
+    """Forget every breaker (tests)."""
+    with _registry_lock:
+        _breakers.clear()
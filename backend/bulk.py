@@ -0,0 +1,252 @@
+"""Bulk, non-interactive case evaluation over JSONL.
+
+Input is one {"title", "facts", "arguments": [...]} object per line; each
+case runs through the agent pipeline in a throwaway session and one result
+line is produced per case, in completion order. Only `concurrency` cases are
+in flight and input is read as slots free up, so memory stays flat however
+large the input is. A checkpoint file records finished line numbers so an
+interrupted run resumes where it stopped.
+
+CLI:
+
+    python -m backend.bulk cases.jsonl -o results.jsonl --checkpoint results.ckpt
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+
+from .agent_manager import AgentManager
+from .scheduling import call_class
+
+
+class CaseFailed(Exception):
+    pass
+
+
+def evaluate_case(manager: AgentManager, case: Dict[str, Any]) -> Dict[str, Any]:
+    """Run every argument of a case through one session; raise CaseFailed on agent errors."""
+    if not isinstance(case, dict) or not isinstance(case.get('facts'), str):
+        raise ValueError('case must be an object with string "facts"')
+    arguments = case.get('arguments') or []
+    if isinstance(arguments, str) or not all(isinstance(a, str) for a in arguments):
+        raise ValueError('"arguments" must be a list of strings')
+
+    sid = manager.create_session(case.get('title', ''), case['facts'])
+    try:
+        turns = []
+        for arg in arguments:
+            manager.add_user_presentation(sid, arg)
+            results = manager.run_turn_sequence(sid, arg)
+            failed = [r['agent'] for r in results
+                      if r.get('degraded') or str(r.get('text', '')).startswith('(error)')]
+            if failed:
+                raise CaseFailed('agent error: ' + ', '.join(failed))
+            turns.append(results)
+        jury = turns[-1][-1] if turns else {}
+        return {'verdict': jury.get('verdict'), 'confidence': jury.get('confidence'), 'turns': turns}
+    finally:
+        manager.close_session(sid)
+
+
+class Checkpoint:
+    """Completed line numbers, stored as a low-water mark plus the finished lines above it.
+
+    Results complete out of order, and only lines above the low-water mark are
+    listed. The list is usually about as long as the in-flight window, but one
+    slow case holds the mark back while every later case that finishes is
+    added, so it can grow until that case completes.
+
+    A result line is written to the output before its line is marked, so a
+    crash between the two re-runs that case on resume and writes its row
+    again: delivery is at-least-once, and consumers should de-duplicate on
+    the line number if that matters.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.low_water = 0
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as fh:
+                data = json.load(fh)
+            self.low_water = int(data.get('low_water', 0))
+            self.done = set(data.get('done', []))
+
+    def is_done(self, line: int) -> bool:
+        return line < self.low_water or line in self.done
+
+    def mark(self, line: int):
+        self.done.add(line)
+        while self.low_water in self.done:
+            self.done.discard(self.low_water)
+            self.low_water += 1
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump({'low_water': self.low_water, 'done': sorted(self.done)}, fh)
+        os.replace(tmp, self.path)
+
+
+async def _run_with_retries(manager: AgentManager, case: Dict[str, Any], retries: int,
+                            backoff: float, tenant: Optional[str] = None) -> Dict[str, Any]:
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            # to_thread copies the context, so the worker's provider calls are batch priority
+            with call_class('batch', tenant):
+                out = await asyncio.to_thread(evaluate_case, manager, case)
+            out['attempts'] = attempt
+            return out
+        except ValueError:
+            raise
+        except Exception:
+            if attempt > retries:
+                raise
+            await asyncio.sleep(backoff * (2 ** (attempt - 1)))
+
+
+async def evaluate_stream(lines: AsyncIterator[str], manager: AgentManager, concurrency: int = 8,
+                          retries: int = 2, backoff: float = 0.5,
+                          checkpoint: Optional[Checkpoint] = None,
+                          tenant: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Evaluate JSONL case lines, yielding one result dict per case as it completes.
+
+    Lines are numbered from 0 (blank lines included) and results carry that
+    number as `line`. Lines already recorded in `checkpoint` are skipped.
+    Provider calls run in the 'batch' priority class for `tenant`.
+    """
+    concurrency = max(1, int(concurrency))
+    pending: Dict[asyncio.Task, tuple] = {}
+    line_no = -1
+    exhausted = False
+    it = lines.__aiter__()
+
+    async def fill():
+        nonlocal line_no, exhausted
+        while not exhausted and len(pending) < concurrency:
+            try:
+                raw = await it.__anext__()
+            except StopAsyncIteration:
+                exhausted = True
+                return
+            line_no += 1
+            if checkpoint and checkpoint.is_done(line_no):
+                continue
+            if not raw.strip():
+                if checkpoint:
+                    checkpoint.mark(line_no)
+                continue
+            try:
+                case = json.loads(raw)
+            except ValueError as e:
+                task = asyncio.ensure_future(_fail(ValueError(f'invalid JSON: {e}')))
+                pending[task] = (line_no, {}, time.perf_counter())
+                continue
+            task = asyncio.ensure_future(_run_with_retries(manager, case, retries, backoff, tenant))
+            pending[task] = (line_no, case if isinstance(case, dict) else {}, time.perf_counter())
+
+    try:
+        await fill()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                line, case, t0 = pending.pop(task)
+                result: Dict[str, Any] = {'line': line, 'title': case.get('title')}
+                try:
+                    result.update(task.result())
+                    result['status'] = 'ok'
+                except Exception as e:
+                    result['status'] = 'error'
+                    result['error'] = str(e)
+                result['latency_ms'] = (time.perf_counter() - t0) * 1000.0
+                yield result
+                if checkpoint:
+                    checkpoint.mark(line)
+                    checkpoint.save()
+            await fill()
+    finally:
+        # the consumer may stop early (e.g. client disconnect); drop cases still in flight
+        for task in pending:
+            task.cancel()
+
+
+async def _fail(exc: Exception):
+    raise exc
+
+
+async def _aiter(iterable: Iterable[str]) -> AsyncIterator[str]:
+    for item in iterable:
+        yield item
+
+
+async def aiter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream (e.g. an HTTP request body) into decoded lines."""
+    partial = []
+    async for chunk in chunks:
+        # only the new bytes are split; an unfinished line is kept as pieces
+        *complete, rest = chunk.split(b'\n')
+        if complete:
+            partial.append(complete[0])
+            complete[0] = b''.join(partial)
+            partial = []
+            for raw in complete:
+                yield raw.decode('utf-8', errors='replace')
+        if rest:
+            partial.append(rest)
+    if partial:
+        yield b''.join(partial).decode('utf-8', errors='replace')
+
+
+async def run_file(src, out, manager: AgentManager, concurrency: int = 8, retries: int = 2,
+                   checkpoint: Optional[Checkpoint] = None, tenant: Optional[str] = None) -> Dict[str, int]:
+    counts = {'ok': 0, 'error': 0}
+    async for result in evaluate_stream(_aiter(src), manager, concurrency=concurrency,
+                                        retries=retries, checkpoint=checkpoint, tenant=tenant):
+        out.write(json.dumps(result) + '\n')
+        out.flush()
+        counts[result['status']] += 1
+    return counts
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Evaluate a JSONL file of cases through the agent pipeline.')
+    ap.add_argument('input', help="JSONL cases file, or '-' for stdin")
+    ap.add_argument('-o', '--output', default='-', help="JSONL results file (appended to), or '-' for stdout")
+    ap.add_argument('--checkpoint', help='checkpoint file; finished cases are skipped on rerun')
+    ap.add_argument('--concurrency', type=int, default=8)
+    ap.add_argument('--retries', type=int, default=2)
+    ap.add_argument('--jurors', type=int, default=1)
+    ap.add_argument('--tenant', help='tenant whose batch budget and fair share the run uses')
+    args = ap.parse_args(argv)
+
+    src = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    out = sys.stdout if args.output == '-' else open(args.output, 'a', encoding='utf-8')
+    manager = AgentManager(jurors=args.jurors)
+    checkpoint = Checkpoint(args.checkpoint)
+
+    async def runner():
+        # size the thread pool to the concurrency limit rather than the default cap
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.concurrency))
+        return await run_file(src, out, manager, args.concurrency, args.retries, checkpoint, args.tenant)
+
+    try:
+        counts = asyncio.run(runner())
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(counts), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
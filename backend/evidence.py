@@ -0,0 +1,267 @@
+"""Streaming evidence uploads stored on disk and read through memory maps.
+
+`EvidenceStore.ingest(chunks)` writes an upload to disk as it arrives and cuts
+it into retrieval chunks on the fly: at paragraph breaks, or at the last
+sentence end or space before `CHUNK_BYTES`. Only the unfinished tail of the
+current chunk is held in memory, plus a (start, end) byte-offset pair per
+chunk, so memory stays flat however large the upload is.
+
+A stored `Document` memory-maps the file. `doc[i]` and `doc.slice(start, end)`
+decode only the bytes asked for, and `DocumentIndex` builds the BM25 index of
+retrieval.py over the chunks without loading the whole text. Sessions attach
+documents with `AgentManager.attach_evidence`, and agents then get the
+excerpts most relevant to each call. Each session holding a document counts
+as a reference to it; `EvidenceStore.delete` refuses a document that still
+has any, and frees the file, descriptor and map of one that has none.
+
+Multipart bodies are parsed as they stream; the first file part is stored.
+
+    CEREBRAL_EVIDENCE_DIR=/var/lib/cerebral/evidence   default: a temporary directory
+    CEREBRAL_EVIDENCE_MAX_MB=1024
+"""
+import mmap
+import os
+import tempfile
+import threading
+import uuid
+from array import array
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+
+import numpy as np
+
+from .retrieval import CHUNK_TOKENS, FactIndex
+
+# retrieval chunks are about CHUNK_TOKENS tokens at ~4 bytes each
+CHUNK_BYTES = CHUNK_TOKENS * 4
+_SENTENCE_ENDS = (b'. ', b'! ', b'? ', b'.\n', b'!\n', b'?\n')
+
+
+class EvidenceTooLarge(Exception):
+    pass
+
+
+class EvidenceInUse(Exception):
+    pass
+
+
+class EvidenceDeleted(Exception):
+    pass
+
+
+def _cut(buf: bytearray, pos: int, final: bool) -> int:
+    """Length of the next chunk starting at `pos`, or 0 if more data is needed first."""
+    window = pos + CHUNK_BYTES
+    brk = buf.find(b'\n\n', pos, window + 2)
+    if brk >= 0:
+        return brk + 2 - pos
+    if len(buf) > window:
+        cut = max(buf.rfind(end, pos, window) for end in _SENTENCE_ENDS)
+        if cut < 0:
+            cut = max(buf.rfind(b' ', pos, window), buf.rfind(b'\n', pos, window))
+        if cut > pos:
+            return cut + 1 - pos
+        # one unbroken run of text: hard cut, but never inside a UTF-8 sequence
+        cut = window
+        while cut > pos + 1 and buf[cut] & 0xC0 == 0x80:
+            cut -= 1
+        return cut - pos
+    return len(buf) - pos if final else 0
+
+
+class _Chunker:
+    """Incrementally records (start, end) offsets of non-blank chunks in a byte stream."""
+
+    def __init__(self):
+        self.spans = array('q')
+        self._buf = bytearray()
+        self._base = 0
+
+    def feed(self, data: bytes, final: bool = False):
+        self._buf += data
+        pos = 0
+        while pos < len(self._buf):
+            n = _cut(self._buf, pos, final)
+            if n == 0:
+                break
+            piece = bytes(self._buf[pos:pos + n])
+            lead = len(piece) - len(piece.lstrip())
+            body = piece.strip()
+            if body:
+                start = self._base + pos + lead
+                self.spans.extend((start, start + len(body)))
+            pos += n
+        del self._buf[:pos]
+        self._base += pos
+
+    def close(self) -> np.ndarray:
+        self.feed(b'', final=True)
+        return np.frombuffer(self.spans, dtype=np.int64).reshape(-1, 2).copy()
+
+
+class Document:
+    """A stored upload: the file, memory-mapped, and its chunk offsets."""
+
+    def __init__(self, evidence_id: str, path: Path, spans: np.ndarray):
+        self.id = evidence_id
+        self.path = path
+        self.spans = spans
+        self.size = path.stat().st_size
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        self._index: Optional['DocumentIndex'] = None
+        # sessions holding this document; delete is refused while any do
+        self.sessions = 0
+        self.deleted = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def __getitem__(self, i: int) -> str:
+        start, end = self.spans[i]
+        return self.slice(int(start), int(end))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def slice(self, start: int, end: int) -> str:
+        return self._map[max(0, start):min(end, self.size)].decode('utf-8', errors='replace')
+
+    def text(self) -> str:
+        return self.slice(0, self.size)
+
+    def index(self) -> 'DocumentIndex':
+        """The retrieval index over this document, built on first use."""
+        with self._lock:
+            if self._index is None:
+                self._index = DocumentIndex(self)
+            return self._index
+
+    def retain(self):
+        with self._lock:
+            if self.deleted:
+                raise EvidenceDeleted(self.id)
+            self.sessions += 1
+
+    def release(self):
+        with self._lock:
+            self.sessions = max(0, self.sessions - 1)
+
+    def info(self) -> Dict[str, int]:
+        return {'evidence_id': self.id, 'bytes': self.size, 'chunks': len(self), 'sessions': self.sessions}
+
+    def close(self):
+        if self.size:
+            self._map.close()
+        self._file.close()
+
+
+class DocumentIndex(FactIndex):
+    """BM25 over a stored document's chunks, read from the memory map as needed."""
+
+    def __init__(self, doc: Document, k1: float = 1.2, b: float = 0.75):
+        self.doc = doc
+        self._build(doc, k1, b)
+
+    def full_text(self) -> str:
+        return self.doc.text()
+
+
+async def aiter_multipart_file(chunks: AsyncIterator[bytes], boundary: str) -> AsyncIterator[bytes]:
+    """The body of the first file part of a multipart/form-data stream, as it arrives."""
+    delimiter = b'\r\n--' + boundary.encode()
+    # the first delimiter has no leading CRLF; prepending one lets a single search find them all
+    buf = bytearray(b'\r\n')
+    state = 'preamble'
+    async for data in chunks:
+        buf += data
+        while True:
+            if state in ('preamble', 'skip'):
+                i = buf.find(delimiter)
+                if i < 0:
+                    del buf[:max(0, len(buf) - len(delimiter))]
+                    break
+                del buf[:i + len(delimiter)]
+                state = 'headers'
+            if state == 'headers':
+                i = buf.find(b'\r\n\r\n')
+                if i < 0:
+                    break
+                headers = bytes(buf[:i]).lower()
+                del buf[:i + 4]
+                state = 'file' if b'filename=' in headers else 'skip'
+                continue
+            if state == 'file':
+                i = buf.find(delimiter)
+                if i >= 0:
+                    yield bytes(buf[:i])
+                    return
+                # keep enough to recognise a delimiter split across reads
+                keep = len(delimiter) - 1
+                if len(buf) > keep:
+                    yield bytes(buf[:-keep])
+                    del buf[:-keep]
+                break
+    if state == 'file':
+        raise ValueError('multipart body ended inside the file part')
+    raise ValueError('multipart body has no file part')
+
+
+class EvidenceStore:
+    def __init__(self, root: Optional[Path] = None, max_bytes: Optional[int] = None):
+        env_root = os.getenv('CEREBRAL_EVIDENCE_DIR')
+        self._root = root or (Path(env_root) if env_root else None)
+        self.max_bytes = (int(os.getenv('CEREBRAL_EVIDENCE_MAX_MB', '1024')) << 20) if max_bytes is None else max_bytes
+        self._docs: Dict[str, Document] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def root(self) -> Path:
+        if self._root is None:
+            self._root = Path(tempfile.mkdtemp(prefix='cerebral-evidence-'))
+        self._root.mkdir(parents=True, exist_ok=True)
+        return self._root
+
+    async def ingest(self, chunks: AsyncIterator[bytes]) -> Document:
+        """Write a byte stream to disk, chunking it as it goes; raise EvidenceTooLarge past max_bytes."""
+        evidence_id = uuid.uuid4().hex
+        path = self.root / f'{evidence_id}.txt'
+        chunker = _Chunker()
+        written = 0
+        try:
+            with open(path, 'wb') as out:
+                async for data in chunks:
+                    written += len(data)
+                    if written > self.max_bytes:
+                        raise EvidenceTooLarge(f'evidence larger than {self.max_bytes} bytes')
+                    out.write(data)
+                    chunker.feed(data)
+            doc = Document(evidence_id, path, chunker.close())
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+        with self._lock:
+            self._docs[evidence_id] = doc
+        return doc
+
+    def get(self, evidence_id: str) -> Optional[Document]:
+        return self._docs.get(evidence_id)
+
+    def delete(self, evidence_id: str) -> bool:
+        """Remove a document and its file; False if unknown, EvidenceInUse while sessions hold it."""
+        with self._lock:
+            doc = self._docs.get(evidence_id)
+            if doc is None:
+                return False
+            with doc._lock:
+                if doc.sessions:
+                    raise EvidenceInUse(f'evidence is attached to {doc.sessions} session(s)')
+                doc.deleted = True
+            del self._docs[evidence_id]
+        doc.close()
+        doc.path.unlink(missing_ok=True)
+        return True
+
+
+store = EvidenceStore()
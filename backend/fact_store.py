@@ -0,0 +1,79 @@
+"""Content-addressed pool of pinned case facts.
+
+Bulk runs, simulations and demo traffic create many sessions with the same
+facts. `FactStore.put(text)` keeps one copy per distinct text, keyed by its
+SHA-256, and counts references; sessions hold only the key. `release(key)`
+drops a reference, and the text goes once nothing refers to it.
+
+Artifacts derived from the facts (rendered prompt blocks, chunk indexes) are
+built once per key with `derived(key, name, build)` and dropped along with the
+text. `stats()` reports how much the pool saves.
+"""
+import hashlib
+import sys
+import threading
+from typing import Any, Callable, Dict
+
+
+class FactStore:
+    def __init__(self):
+        self._texts: Dict[str, str] = {}
+        self._refs: Dict[str, int] = {}
+        self._derived: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def put(self, text: str) -> str:
+        """Store `text` (or find the copy already stored) and take a reference to it."""
+        key = self.key(text)
+        with self._lock:
+            self._texts.setdefault(key, text)
+            self._refs[key] = self._refs.get(key, 0) + 1
+        return key
+
+    def retain(self, key: str) -> str:
+        with self._lock:
+            self._refs[key] += 1
+        return key
+
+    def release(self, key: str):
+        with self._lock:
+            refs = self._refs.get(key, 0) - 1
+            if refs > 0:
+                self._refs[key] = refs
+                return
+            self._refs.pop(key, None)
+            self._texts.pop(key, None)
+            self._derived.pop(key, None)
+
+    def get(self, key: str) -> str:
+        return self._texts[key]
+
+    def derived(self, key: str, name: str, build: Callable[[str], Any]) -> Any:
+        """`build(text)` for these facts, computed once and cached until the facts are released."""
+        cache = self._derived.get(key)
+        if cache is not None and name in cache:
+            return cache[name]
+        # built outside the lock; two threads racing on a cold entry just build it twice
+        value = build(self.get(key))
+        with self._lock:
+            if key in self._texts:
+                self._derived.setdefault(key, {})[name] = value
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sizes = {key: sys.getsizeof(text) for key, text in self._texts.items()}
+            refs = dict(self._refs)
+        resident = sum(sizes.values())
+        logical = sum(size * refs[key] for key, size in sizes.items())
+        return {
+            'facts': len(sizes),
+            'references': sum(refs.values()),
+            'resident_bytes': resident,
+            'bytes_saved': logical - resident,
+            'dedup_ratio': round(logical / resident, 3) if resident else 1.0,
+        }
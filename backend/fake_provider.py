@@ -0,0 +1,192 @@
+"""Local stand-in for the OpenAI client.
+
+Mimics the slice of the SDK the backend uses (`responses.create` and
+`responses.stream`) with configurable latency and seeded, role-aware replies,
+so tests, benchmarks and load runs never touch the network.
+
+Enable it for a running backend with `CEREBRAL_FAKE_PROVIDER=1`; the latency
+can be tuned with `CEREBRAL_FAKE_LATENCY_MS`.
+"""
+import json
+import os
+import random
+import threading
+import time
+import types
+
+
+class _Evt:
+    def __init__(self, **kw):
+        for k, v in kw.items():
+            setattr(self, k, v)
+
+
+def _usage(prompt: str, text: str):
+    # rough 4-chars-per-token estimate, good enough for a stand-in
+    inp = max(1, len(prompt) // 4)
+    out = max(1, len(text) // 4)
+    return types.SimpleNamespace(input_tokens=inp, output_tokens=out, total_tokens=inp + out)
+
+
+# keyword arguments the real `Responses.create`/`stream` accept (subset); anything
+# else raises TypeError the same way the SDK does
+ACCEPTED_KWARGS = frozenset({
+    'instructions', 'max_output_tokens', 'metadata', 'parallel_tool_calls', 'previous_response_id', 'prompt_cache_key',
+    'reasoning', 'store', 'temperature', 'text', 'tool_choice', 'tools', 'top_p', 'truncation', 'user',
+})
+
+
+def _check_kwargs(method: str, kwargs):
+    for k in kwargs:
+        if k not in ACCEPTED_KWARGS:
+            raise TypeError(f"Responses.{method}() got an unexpected keyword argument '{k}'")
+
+
+class FakeRateLimitError(Exception):
+    """429 from the fake provider; carries `status_code` like the SDK's RateLimitError."""
+    status_code = 429
+
+
+def _wants_json(kwargs) -> bool:
+    fmt = (kwargs.get('text') or {}).get('format') or {}
+    return fmt.get('type') == 'json_schema'
+
+
+class _FakeResponses:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model, input, **kwargs):
+        _check_kwargs('create', kwargs)
+        self._owner.last_kwargs = kwargs
+        self._owner._admit()
+        try:
+            text = self._owner._reply(input, structured=_wants_json(kwargs))
+            time.sleep(self._owner._sample_latency())
+        finally:
+            self._owner._leave()
+        return types.SimpleNamespace(output_text=text, model=model, usage=_usage(input, text))
+
+    def stream(self, model, input, **kwargs):
+        _check_kwargs('stream', kwargs)
+        self._owner.last_kwargs = kwargs
+        owner = self._owner
+        text = owner._reply(input, structured=_wants_json(kwargs))
+        first = owner._sample_latency()
+
+        class Ctx:
+            def __enter__(self_inner):
+                owner._admit()
+
+                def gen():
+                    time.sleep(first)
+                    words = text.split(' ')
+                    for i, w in enumerate(words):
+                        if i and owner.token_delay:
+                            time.sleep(owner.token_delay)
+                        yield _Evt(type='response.output_text.delta', delta=w if i == 0 else ' ' + w)
+                    yield _Evt(type='response.completed', response=types.SimpleNamespace(usage=_usage(input, text)))
+                return gen()
+
+            def __exit__(self_inner, exc_type, exc, tb):
+                owner._leave()
+                return False
+
+        return Ctx()
+
+
+class _FakeModels:
+    IDS = ('gpt-5', 'gpt-5-codex', 'gpt-5-mini')
+
+    def list(self):
+        return types.SimpleNamespace(data=[types.SimpleNamespace(id=i, object='model') for i in self.IDS])
+
+
+class FakeOpenAI:
+    """Drop-in replacement for `openai.OpenAI` with simulated latency.
+
+    `latency` is the time to the first token (seconds), `jitter` a fraction of
+    it added uniformly at random, and `token_delay` the gap between streamed
+    words. `guilty_rate` biases the verdicts produced for Jury prompts.
+    `max_concurrency` is a hidden provider-side limit: requests beyond that
+    many in flight are rejected with FakeRateLimitError (429). With
+    probability `tail_prob` a request's latency is multiplied by `tail_factor`,
+    giving the long tail real providers show.
+    """
+
+    def __init__(self, api_key=None, latency=None, jitter=0.0, token_delay=0.0, guilty_rate=0.6, seed=None,
+                 max_concurrency=None, tail_prob=0.0, tail_factor=10.0):
+        if latency is None:
+            latency = float(os.getenv('CEREBRAL_FAKE_LATENCY_MS', '0')) / 1000.0
+        self.api_key = api_key
+        self.latency = latency
+        self.jitter = jitter
+        self.token_delay = token_delay
+        self.guilty_rate = guilty_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.last_kwargs = None
+        self.max_concurrency = max_concurrency
+        self.tail_prob = tail_prob
+        self.tail_factor = tail_factor
+        self.inflight = 0
+        self.rejected = 0
+        self.responses = _FakeResponses(self)
+        self.models = _FakeModels()
+
+    def _admit(self):
+        with self._lock:
+            if self.max_concurrency is not None and self.inflight >= self.max_concurrency:
+                self.rejected += 1
+                raise FakeRateLimitError('Rate limit reached (fake provider)')
+            self.inflight += 1
+
+    def _leave(self):
+        with self._lock:
+            self.inflight -= 1
+
+    def _sample_latency(self) -> float:
+        if not self.jitter and not self.tail_prob:
+            return self.latency
+        with self._lock:
+            latency = self.latency * (1.0 + self.jitter * self._rng.random())
+            if self.tail_prob and self._rng.random() < self.tail_prob:
+                latency *= self.tail_factor
+            return latency
+
+    def _reply(self, prompt: str, structured: bool = False) -> str:
+        with self._lock:
+            self.calls += 1
+            r = self._rng.random()
+            conf = self._rng.randint(45, 95)
+        if 'You are the Jury' in prompt:
+            if r < self.guilty_rate:
+                verdict = 'Guilty'
+            elif r < 0.95:
+                verdict = 'Not Guilty'
+            else:
+                verdict = 'No Verdict'
+            if structured:
+                return json.dumps({'verdict': verdict, 'confidence': conf})
+            return f"Verdict: {verdict}; Confidence: {conf}%"
+        if 'You are the Judge' in prompt:
+            ruling = 'SUSTAINED' if r < 0.5 else 'OVERRULED'
+            reason = 'The ruling follows from the pinned facts.'
+            if structured:
+                return json.dumps({'ruling': ruling, 'reason': reason})
+            return f"{ruling} - {reason}"
+        return "(fake) Opposing Counsel: Objection, the facts do not place the defendant at the scene."
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_client() -> FakeOpenAI:
+    """Process-wide fake client, so counters and seeded state are shared."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = FakeOpenAI()
+        return _shared
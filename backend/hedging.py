@@ -0,0 +1,207 @@
+"""Hedged agent calls: race a duplicate request against a slow first token.
+
+`Hedger.call` streams the primary request on a worker thread. If no first
+token has arrived by the rolling p90 time-to-first-token for that agent, a
+duplicate is sent, optionally to a faster fallback model. Whichever attempt
+produces a token first wins and the loser is cancelled: its stream is closed
+at its next event, which ends the provider stream and frees its limiter
+slot. Hedges are capped by `HedgeBudget`, a maximum fraction of recent calls.
+
+The primary's first-token time is recorded even when it loses, so `stats()`
+can compare the p99 actually seen with the p99 the primary alone would have
+given.
+
+Only non-streaming agent calls (`AgentManager._call`) are hedged, since a
+hedge returns the winner's whole text. Streamed turns and the jurors of the
+Jury ensemble call the provider directly and are neither hedged nor counted
+against the hedge budget.
+"""
+import contextvars
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+import numpy as np
+
+from .openai_helper import stream_responses
+
+
+class LatencyTracker:
+    """Rolling window of time-to-first-token samples (ms)."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+
+    def add(self, ms: float):
+        with self._lock:
+            self.samples.append(ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The q-th percentile, or None until `min_samples` have been seen."""
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            data = np.fromiter(self.samples, dtype=np.float64, count=len(self.samples))
+        return float(np.percentile(data, q))
+
+
+class HedgeBudget:
+    """Allow a hedge only while hedges stay under `max_rate` of the last `window` calls."""
+
+    def __init__(self, max_rate: float = 0.1, window: int = 200):
+        self.max_rate = max_rate
+        # one [hedged] cell per call, so a call can be marked after it was recorded
+        self._recent: Deque[list] = deque(maxlen=window)
+        self._hedges = 0
+        self._lock = threading.Lock()
+
+    def record_call(self) -> list:
+        cell = [False]
+        with self._lock:
+            if len(self._recent) == self._recent.maxlen and self._recent[0][0]:
+                self._hedges -= 1
+            self._recent.append(cell)
+        return cell
+
+    def try_hedge(self, cell: list) -> bool:
+        with self._lock:
+            if cell[0] or (self._hedges + 1) / len(self._recent) > self.max_rate:
+                return False
+            cell[0] = True
+            self._hedges += 1
+            return True
+
+
+class Hedger:
+    """Per-agent latency trackers, the hedge budget and outcome counters."""
+
+    def __init__(self, budget: float = 0.1, fallback_model: Optional[str] = None, quantile: float = 90.0,
+                 min_samples: int = 20, stream: Callable = stream_responses):
+        self.budget = HedgeBudget(budget)
+        self.fallback_model = fallback_model
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.stream = stream
+        self.trackers: Dict[str, LatencyTracker] = {}
+        self.counts = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'errors': 0}
+        self.ttft_ms: Deque[float] = deque(maxlen=1000)
+        self.primary_ttft_ms: Deque[float] = deque(maxlen=1000)
+        self._lock = threading.Lock()
+
+    def tracker(self, agent: str) -> LatencyTracker:
+        with self._lock:
+            t = self.trackers.get(agent)
+            if t is None:
+                t = self.trackers[agent] = LatencyTracker(min_samples=self.min_samples)
+            return t
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counts[key] += 1
+
+    def call(self, api_key: str, agent: str, model: str, input_text: str, **kwargs) -> str:
+        """Return the full reply text of whichever attempt produced a token first."""
+        tracker = self.tracker(agent)
+        threshold = tracker.percentile(self.quantile)
+        cell = self.budget.record_call()
+        self._count('calls')
+
+        events: queue.Queue = queue.Queue()
+        cancelled: Dict[str, threading.Event] = {}
+        started = time.perf_counter()
+
+        def on_first(tag: str):
+            ms = (time.perf_counter() - started) * 1000.0
+            if tag == 'primary':
+                # recorded here, not by the caller, so a losing primary's latency
+                # still reaches the p90 and the primary-only p99
+                tracker.add(ms)
+                with self._lock:
+                    self.primary_ttft_ms.append(ms)
+            events.put((tag, 'first', ms))
+
+        def attempt(tag: str, attempt_model: str):
+            stop = cancelled[tag]
+            gen = self.stream(api_key, model=attempt_model, input_text=input_text, **kwargs)
+            parts = []
+            first = True
+            try:
+                for chunk in gen:
+                    if first:
+                        first = False
+                        on_first(tag)
+                    if stop.is_set():
+                        return
+                    parts.append(str(chunk))
+                if first:
+                    on_first(tag)
+                events.put((tag, 'done', ''.join(parts)))
+            except Exception as e:
+                events.put((tag, 'error', e))
+            finally:
+                gen.close()
+
+        def launch(tag: str, attempt_model: str):
+            cancelled[tag] = threading.Event()
+            # keep the caller's priority class and tenant (see scheduling.py)
+            ctx = contextvars.copy_context()
+            threading.Thread(target=ctx.run, args=(attempt, tag, attempt_model), daemon=True,
+                             name=f'hedge-{agent}-{tag}').start()
+
+        launch('primary', model)
+        running = {'primary'}
+        winner: Optional[str] = None
+        timeout = threshold / 1000.0 if threshold is not None else None
+
+        while True:
+            try:
+                tag, kind, value = events.get(timeout=timeout)
+            except queue.Empty:
+                timeout = None
+                if 'hedge' not in cancelled and self.budget.try_hedge(cell):
+                    self._count('hedged')
+                    launch('hedge', self.fallback_model or model)
+                    running.add('hedge')
+                continue
+            if kind == 'first':
+                if winner is None:
+                    winner = tag
+                    timeout = None
+                    with self._lock:
+                        self.ttft_ms.append(value)
+                    if tag == 'hedge':
+                        self._count('hedge_wins')
+                    for other, ev in cancelled.items():
+                        if other != tag:
+                            ev.set()
+                continue
+            if kind == 'error':
+                running.discard(tag)
+                if tag == winner or not running:
+                    self._count('errors')
+                    raise value
+                continue
+            if tag == winner:
+                return value
+            running.discard(tag)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+            ttft = np.fromiter(self.ttft_ms, dtype=np.float64)
+            primary = np.fromiter(self.primary_ttft_ms, dtype=np.float64)
+        calls = counts['calls'] or 1
+        out: Dict[str, Any] = {
+            **counts,
+            'hedge_rate': counts['hedged'] / calls,
+            'win_rate': counts['hedge_wins'] / counts['hedged'] if counts['hedged'] else 0.0,
+        }
+        if ttft.size and primary.size:
+            out['ttft_p99_ms'] = float(np.percentile(ttft, 99))
+            out['primary_ttft_p99_ms'] = float(np.percentile(primary, 99))
+            out['p99_improvement_ms'] = out['primary_ttft_p99_ms'] - out['ttft_p99_ms']
+        return out
@@ -0,0 +1,171 @@
+"""Multi-juror ensemble: fan out K Jury calls concurrently and aggregate them.
+
+Each juror gets the usual Jury prompt prefixed with a persona from
+`prompts.JUROR_PERSONAS`, is parsed with `utils.parse_jury_line` (or, in
+structured mode, asked for the Jury JSON schema and parsed with
+`structured.parse_jury`), and the panel is reduced with NumPy into a
+majority, a confidence-weighted vote and agreement/dispersion statistics.
+"""
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import prompts, tokens
+from . import structured as so
+from .openai_helper import call_responses
+from .utils import parse_jury_line
+
+VERDICTS = ('Guilty', 'Not Guilty', 'No Verdict')
+_VERDICT_INDEX = {v.lower(): i for i, v in enumerate(VERDICTS)}
+
+MOCK_JUROR_REPLY = "Verdict: Guilty; Confidence: 60%"
+
+
+def juror_prompt(index: int, facts: str, transcript: str, personas: Optional[List[str]] = None,
+                 structured: bool = False) -> str:
+    personas = personas or prompts.JUROR_PERSONAS
+    persona = personas[index % len(personas)]
+    prefix = prompts.JUROR_PERSONA_PREFIX.format(index=index + 1, persona=persona)
+    template = prompts.JURY_JSON_PROMPT if structured else prompts.JURY_PROMPT
+    return prefix + template.format(facts=facts, transcript=transcript)
+
+
+def aggregate_verdicts(parsed: List[Optional[Tuple[str, int]]]) -> Dict[str, Any]:
+    """Reduce parsed juror lines to panel statistics.
+
+    `parsed` holds `parse_jury_line` results; None entries count as unparsed
+    and are left out of the vote. Ties on the head count are broken by the
+    confidence-weighted vote.
+    """
+    valid = [p for p in parsed if p and p[0].lower() in _VERDICT_INDEX]
+    n = len(valid)
+    result: Dict[str, Any] = {'jurors': n, 'unparsed': len(parsed) - n}
+    if n == 0:
+        result.update({'verdict': None, 'weighted_verdict': None, 'confidence': None,
+                       'agreement': 0.0, 'dispersion': None, 'votes': {}, 'weighted_votes': {},
+                       'confidence_mean': None, 'confidence_std': None})
+        return result
+
+    idx = np.fromiter((_VERDICT_INDEX[v.lower()] for v, _ in valid), dtype=np.intp, count=n)
+    conf = np.fromiter((min(max(c, 0), 100) for _, c in valid), dtype=np.float64, count=n) / 100.0
+
+    counts = np.bincount(idx, minlength=len(VERDICTS))
+    weights = np.bincount(idx, weights=conf, minlength=len(VERDICTS))
+    # lexsort sorts by the last key first: head count, then weight
+    majority = int(np.lexsort((weights, counts))[-1])
+    weighted = int(np.argmax(weights))
+
+    p = counts[counts > 0] / n
+    entropy = float(-(p * np.log(p)).sum() / np.log(len(VERDICTS)))
+
+    result.update({
+        'verdict': VERDICTS[majority],
+        'weighted_verdict': VERDICTS[weighted],
+        'confidence': int(round(float(conf[idx == majority].mean()) * 100)),
+        'agreement': float(counts[majority] / n),
+        'dispersion': entropy,
+        'votes': {VERDICTS[i]: int(c) for i, c in enumerate(counts) if c},
+        'weighted_votes': {VERDICTS[i]: round(float(w), 4) for i, w in enumerate(weights) if counts[i]},
+        'confidence_mean': float(conf.mean() * 100),
+        'confidence_std': float(conf.std() * 100),
+    })
+    return result
+
+
+def run_jury_ensemble(api_key: Optional[str], facts: str, transcript: str, jurors: int = 5,
+                      quorum: Optional[int] = None, personas: Optional[List[str]] = None,
+                      model: str = 'gpt-5', max_tokens: int = 60, structured: bool = False,
+                      prompt_tokens: Optional[int] = None) -> Dict[str, Any]:
+    """Run `jurors` Jury calls concurrently and aggregate their verdicts.
+
+    Wall-clock time is that of the slowest juror, or less with `quorum`: once
+    that many jurors agree on a verdict the function returns without waiting
+    for the rest, which are reported with status 'skipped'. Jurors that have
+    not started yet are never sent; calls already in flight cannot be
+    interrupted (the SDK call is blocking), so they still run to completion in
+    the background and their tokens are still billed. With no `api_key` every
+    juror returns the mock line, matching the single-juror mock mode.
+    `structured` requests the Jury JSON schema from every juror.
+    `prompt_tokens`, when the caller has it from cached counts, sizes every
+    juror's prompt for the budget checks instead of counting each one.
+    """
+    jurors = max(1, int(jurors))
+    extra = {'text': so.text_format('jury_verdict', so.JURY_SCHEMA)} if structured else {}
+    started = time.perf_counter()
+
+    def run_one(i: int) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        entry: Dict[str, Any] = {'juror': i + 1}
+        try:
+            if not api_key:
+                text = MOCK_JUROR_REPLY
+            else:
+                prompt = juror_prompt(i, facts, transcript, personas, structured)
+                if prompt_tokens is not None:
+                    prompt = tokens.Sized(prompt, prompt_tokens)
+                text = call_responses(api_key, model=model, input_text=prompt, max_tokens=max_tokens, **extra)
+            entry['text'] = text
+            entry['status'] = 'ok'
+            if structured:
+                fields, _ = so.parse_jury(text)
+                parsed = (fields['verdict'], fields['confidence']) if fields else None
+            else:
+                parsed = parse_jury_line(text)
+            if parsed:
+                entry['verdict'], entry['confidence'] = parsed
+        except Exception as e:
+            entry['text'] = f"(error) Jury: {e}"
+            entry['status'] = 'error'
+        entry['latency_ms'] = (time.perf_counter() - t0) * 1000.0
+        return entry
+
+    entries: List[Dict[str, Any]] = []
+    tally: Dict[str, int] = {}
+    quorum_reached = False
+    pool = ThreadPoolExecutor(max_workers=jurors, thread_name_prefix='juror')
+    try:
+        # jurors inherit the caller's priority class and tenant (see scheduling.py)
+        pending = {pool.submit(contextvars.copy_context().run, run_one, i): i for i in range(jurors)}
+        while pending and not quorum_reached:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                pending.pop(fut)
+                entry = fut.result()
+                entries.append(entry)
+                if 'verdict' in entry:
+                    key = entry['verdict'].lower()
+                    tally[key] = tally.get(key, 0) + 1
+                    if quorum and tally[key] >= quorum:
+                        quorum_reached = True
+        for i in sorted(pending.values()):
+            entries.append({'juror': i + 1, 'status': 'skipped'})
+    finally:
+        # return without waiting; queued jurors are cancelled, running ones finish in the background
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    entries.sort(key=lambda e: e['juror'])
+    answered = [e for e in entries if e['status'] != 'skipped']
+    parsed = [(e['verdict'], e['confidence']) if 'verdict' in e else None for e in answered]
+    latencies = np.array([e['latency_ms'] for e in answered], dtype=np.float64)
+
+    return {
+        'aggregate': aggregate_verdicts(parsed),
+        'jurors': entries,
+        'quorum': quorum,
+        'quorum_reached': quorum_reached,
+        'wall_ms': (time.perf_counter() - started) * 1000.0,
+        'latency_ms': {
+            'max': float(latencies.max()) if latencies.size else 0.0,
+            'mean': float(latencies.mean()) if latencies.size else 0.0,
+        },
+    }
+
+
+def format_verdict_line(aggregate: Dict[str, Any]) -> str:
+    """Render an aggregate back into the strict single-juror line format."""
+    if not aggregate.get('verdict'):
+        return "Verdict: No Verdict; Confidence: 0%"
+    return f"Verdict: {aggregate['verdict']}; Confidence: {aggregate['confidence']}%"
@@ -0,0 +1,214 @@
+"""Fixed-memory latency histograms with windowed percentile views.
+
+`LogHistogram` counts samples (in milliseconds) in log-spaced buckets, in the
+style of HDR histograms. Every bucket is `precision` (default 2%) wider than
+the one before it, so any reported percentile is within that relative error
+of the exact value. Its memory is one NumPy array, no matter how many samples
+it has seen. Merging two histograms means adding their arrays.
+
+`WindowedHistogram` keeps an all-time histogram plus rings of time slots:
+10 s slots for the last 1 and 5 minutes, and 5 min slots for the last hour.
+A slot stores only the buckets its samples landed in (a dict of bucket index
+to count), so a slot costs a few hundred bytes rather than a full ~7 KB
+bucket array, and merging the slots of a window adds only those entries.
+Expired slots are dropped when a new one is opened, so the memory per series
+is bounded: one dense array plus at most 42 sparse slots.
+
+`record(operation, ms, agent)` feeds the process-wide registry; telemetry.py
+calls it for every phase it observes, `LatencyMiddleware` for every HTTP
+request and main.py for every WebSocket message. `/debug/latency` serves
+`report()`.
+"""
+import math
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+QUANTILES = (('p50', 50.0), ('p90', 90.0), ('p99', 99.0), ('p999', 99.9))
+
+# window name -> (slot seconds, number of slots)
+WINDOWS = {'1m': (10, 6), '5m': (10, 30), '1h': (300, 12)}
+
+
+class LogHistogram:
+    """Log-bucketed counts between `lowest` and `highest` ms, plus under- and overflow buckets."""
+
+    def __init__(self, lowest: float = 0.01, highest: float = 600_000.0, precision: float = 0.02):
+        self.lowest = lowest
+        self.highest = highest
+        self.precision = precision
+        self._log_growth = math.log1p(precision)
+        n = int(math.ceil(math.log(highest / lowest) / self._log_growth))
+        # [0] underflow, [1..n] log buckets, [n+1] overflow
+        self.counts = np.zeros(n + 2, dtype=np.int64)
+        self.total = 0.0
+
+    def index(self, ms: float) -> int:
+        if ms < self.lowest:
+            return 0
+        i = int(math.log(ms / self.lowest) / self._log_growth) + 1
+        return min(i, len(self.counts) - 1)
+
+    def record(self, ms: float):
+        self.counts[self.index(ms)] += 1
+        self.total += ms
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def empty_like(self) -> 'LogHistogram':
+        return LogHistogram(self.lowest, self.highest, self.precision)
+
+    def merge(self, other: 'LogHistogram'):
+        self.counts += other.counts
+        self.total += other.total
+
+    def values(self) -> np.ndarray:
+        """Representative value of each bucket: its geometric midpoint."""
+        n = len(self.counts) - 2
+        mids = self.lowest * np.exp((np.arange(n) + 0.5) * self._log_growth)
+        return np.concatenate(([self.lowest], mids, [self.highest]))
+
+    def percentiles(self, qs) -> Optional[np.ndarray]:
+        n = self.count
+        if n == 0:
+            return None
+        cum = np.cumsum(self.counts)
+        ranks = np.maximum(1, np.ceil(np.asarray(qs, dtype=np.float64) / 100.0 * n))
+        return self.values()[np.searchsorted(cum, ranks)]
+
+    def summary(self) -> Dict[str, float]:
+        n = self.count
+        out: Dict[str, float] = {'count': n}
+        if n:
+            out['mean_ms'] = round(self.total / n, 3)
+            for (name, _), v in zip(QUANTILES, self.percentiles([q for _, q in QUANTILES])):
+                out[f'{name}_ms'] = round(float(v), 3)
+        return out
+
+
+class _Slot:
+    """Sparse counts of one time slot: bucket index -> samples, plus their sum."""
+    __slots__ = ('counts', 'total')
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0.0
+
+
+class WindowedHistogram:
+    """All-time histogram plus rings of sparse slots for the 1m / 5m / 1h views."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, **histogram_kwargs):
+        self.clock = clock
+        self.all = LogHistogram(**histogram_kwargs)
+        # slot seconds -> {slot number: sparse slot}
+        self._rings: Dict[int, Dict[int, _Slot]] = {}
+        self._keep = {}
+        for seconds, slots in WINDOWS.values():
+            self._rings.setdefault(seconds, {})
+            self._keep[seconds] = max(self._keep.get(seconds, 0), slots)
+
+    def record(self, ms: float):
+        i = self.all.index(ms)
+        self.all.counts[i] += 1
+        self.all.total += ms
+        now = self.clock()
+        for seconds, ring in self._rings.items():
+            slot = int(now // seconds)
+            s = ring.get(slot)
+            if s is None:
+                for old in [n for n in ring if n <= slot - self._keep[seconds]]:
+                    del ring[old]
+                s = ring[slot] = _Slot()
+            s.counts[i] = s.counts.get(i, 0) + 1
+            s.total += ms
+
+    def window(self, name: str) -> LogHistogram:
+        if name == 'all':
+            return self.all
+        seconds, slots = WINDOWS[name]
+        current = int(self.clock() // seconds)
+        out = self.all.empty_like()
+        for slot, s in self._rings[seconds].items():
+            if slot > current - slots and s.counts:
+                np.add.at(out.counts, np.fromiter(s.counts.keys(), dtype=np.intp, count=len(s.counts)),
+                          np.fromiter(s.counts.values(), dtype=np.int64, count=len(s.counts)))
+                out.total += s.total
+        return out
+
+
+class LatencyRegistry:
+    """Windowed histograms keyed by (operation, agent role)."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._series: Dict[Tuple[str, str], WindowedHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, ms: float, agent: str = 'none'):
+        with self._lock:
+            h = self._series.get((operation, agent))
+            if h is None:
+                h = self._series[(operation, agent)] = WindowedHistogram(self.clock)
+            h.record(ms)
+
+    def report(self, window: str = '5m') -> Dict[str, Dict[str, Dict[str, float]]]:
+        """{operation: {agent: {count, mean_ms, p50_ms, p90_ms, p99_ms, p999_ms}}} for `window`."""
+        if window != 'all' and window not in WINDOWS:
+            raise ValueError(f'unknown window: {window}')
+        with self._lock:
+            out: Dict[str, Dict[str, Dict[str, float]]] = {}
+            for (operation, agent), h in sorted(self._series.items()):
+                summary = h.window(window).summary()
+                if summary['count']:
+                    out.setdefault(operation, {})[agent] = summary
+            return out
+
+
+_registry = LatencyRegistry()
+
+
+def record(operation: str, ms: float, agent: Optional[str] = None):
+    _registry.record(operation, ms, agent or 'none')
+
+
+def report(window: str = '5m'):
+    return _registry.report(window)
+
+
+def reset():
+    """Start a fresh registry (tests)."""
+    global _registry
+    _registry = LatencyRegistry()
+
+
+class LatencyMiddleware:
+    """ASGI middleware recording each HTTP request as 'http <METHOD> <route path>'.
+
+    The time is taken when the response starts, so streaming endpoints report
+    their time to first byte rather than the length of the stream.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        recorded = False
+
+        async def timed_send(message):
+            nonlocal recorded
+            if not recorded and message['type'] == 'http.response.start':
+                recorded = True
+                # the router has stored the matched route in the shared scope by now
+                path = getattr(scope.get('route'), 'path', None) or 'unmatched'
+                record(f"http {scope['method']} {path}", (time.perf_counter() - t0) * 1000.0)
+            await send(message)
+
+        await self.app(scope, receive, timed_send)
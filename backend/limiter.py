@@ -0,0 +1,223 @@
+"""Adaptive (AIMD) concurrency limits for outbound provider calls.
+
+Every `call_responses` / `stream_responses` call takes a slot from the
+limiter of its model before it reaches the provider; calls beyond the current
+window wait in a FIFO queue. The window grows additively (about one slot per
+window's worth of healthy completions) and is cut multiplicatively when the
+provider answers 429/5xx or when latency rises well above its baseline. Only
+one cut is applied per window: failures of calls that were started before the
+last cut do not cut again. Which waiting call gets a free slot is decided by
+the priority / fair-queuing scheduler in scheduling.py.
+
+Limits are per model and configured from the environment:
+
+    CEREBRAL_ADAPTIVE_LIMIT=0             disable the limiter entirely
+    CEREBRAL_LIMIT_INITIAL=8              starting window
+    CEREBRAL_LIMIT_MAX=64                 ceiling for every model
+    CEREBRAL_MODEL_LIMITS=gpt-5=32,gpt-5-codex=16   per-model ceilings
+
+`snapshot()` returns the live view served by `GET /api/limits`.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, NamedTuple, Optional
+
+from . import scheduling, telemetry
+from .utils import env_flag
+
+
+def is_overload(exc: BaseException) -> bool:
+    """True for provider errors that signal overload: 429 and 5xx."""
+    status = getattr(exc, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(exc, 'response', None), 'status_code', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return type(exc).__name__ in ('RateLimitError', 'InternalServerError', 'APITimeoutError')
+
+
+class Ticket(NamedTuple):
+    epoch: int
+    priority: str
+
+
+class AIMDLimiter:
+    """Thread-safe additive-increase / multiplicative-decrease concurrency window.
+
+    A completion counts as congestion when the short-term latency average is
+    more than `latency_tolerance` times the slow-moving baseline and at least
+    `min_excess_ms` above it (so fast local calls never trip it).
+    """
+
+    def __init__(self, initial: float = 8, minimum: float = 1, maximum: float = 64,
+                 backoff: float = 0.5, latency_tolerance: float = 3.0, min_excess_ms: float = 100.0,
+                 smoothing: float = 0.2, baseline_smoothing: float = 0.02,
+                 budgets: Optional[scheduling.Budgets] = None):
+        self.minimum = float(minimum)
+        self.maximum = float(maximum)
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.min_excess_ms = min_excess_ms
+        self.smoothing = smoothing
+        self.baseline_smoothing = baseline_smoothing
+        self.inflight = 0
+        self.epoch = 0
+        self.latency_ms: Optional[float] = None
+        self.baseline_ms: Optional[float] = None
+        self.stats = {'ok': 0, 'overload': 0, 'error': 0, 'decreases': 0}
+        self.inflight_by_class = {p: 0 for p in scheduling.PRIORITIES}
+        self._cond = threading.Condition()
+        self._queue = scheduling.FairQueue(budgets or scheduling.budgets())
+
+    def _dispatch(self) -> bool:
+        granted = False
+        now = time.monotonic()
+        while self.inflight < max(1, int(self.limit)):
+            w = self._queue.pop(self.inflight_by_class, self.limit, now)
+            if w is None:
+                break
+            self.inflight += 1
+            self.inflight_by_class[w.priority] += 1
+            granted = True
+        if granted:
+            self._cond.notify_all()
+        return granted
+
+    def acquire(self, timeout: Optional[float] = None, priority: Optional[str] = None,
+                tenant: Optional[str] = None) -> Ticket:
+        """Wait for a slot; returns the ticket to hand back to `release`.
+
+        `priority` and `tenant` default to the caller's `scheduling.call_class`.
+        """
+        ctx_priority, ctx_tenant = scheduling.current()
+        priority = priority or ctx_priority
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            w = self._queue.push(priority, tenant or ctx_tenant)
+            self._dispatch()
+            while not w.granted:
+                # rate budgets refill with time, not on release, so wake up to re-check them
+                wait = self._queue.retry_after(time.monotonic())
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._queue.remove(w)
+                        raise TimeoutError('no provider slot became free')
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+                if not w.granted:
+                    self._dispatch()
+            return Ticket(self.epoch, priority)
+
+    def release(self, ticket: Ticket, latency_ms: float, outcome: str = 'ok'):
+        """Return a slot. `outcome` is 'ok', 'overload' (429/5xx) or 'error' (anything else)."""
+        epoch = ticket.epoch
+        with self._cond:
+            self.inflight -= 1
+            self.inflight_by_class[ticket.priority] -= 1
+            self.stats[outcome] += 1
+            congested = outcome == 'overload'
+            if outcome == 'ok':
+                if self.latency_ms is None:
+                    self.latency_ms = self.baseline_ms = latency_ms
+                else:
+                    self.latency_ms += self.smoothing * (latency_ms - self.latency_ms)
+                    self.baseline_ms += self.baseline_smoothing * (latency_ms - self.baseline_ms)
+                congested = (self.latency_ms > self.latency_tolerance * self.baseline_ms
+                             and self.latency_ms - self.baseline_ms > self.min_excess_ms)
+            if congested and epoch == self.epoch:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                self.epoch += 1
+                self.stats['decreases'] += 1
+                # let the short-term average start over at the new window
+                self.latency_ms = self.baseline_ms
+            elif outcome == 'ok' and not congested:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None, priority: Optional[str] = None,
+             tenant: Optional[str] = None):
+        queued = time.perf_counter()
+        ticket = self.acquire(timeout, priority, tenant)
+        t0 = time.perf_counter()
+        telemetry.observe('queue_wait', t0 - queued, start=queued)
+        outcome = 'ok'
+        try:
+            yield
+        except GeneratorExit:
+            # a stream closed early by its consumer is a normal completion
+            raise
+        except BaseException as e:
+            outcome = 'overload' if is_overload(e) else 'error'
+            raise
+        finally:
+            self.release(ticket, (time.perf_counter() - t0) * 1000.0, outcome)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'limit': round(self.limit, 2),
+                'inflight': self.inflight,
+                'inflight_by_class': dict(self.inflight_by_class),
+                'queued': len(self._queue),
+                'queued_by_class': self._queue.depth(),
+                'latency_ms': self.latency_ms,
+                'baseline_ms': self.baseline_ms,
+                'max': self.maximum,
+                **self.stats,
+            }
+
+
+def enabled() -> bool:
+    return env_flag('CEREBRAL_ADAPTIVE_LIMIT', default=True)
+
+
+def _model_ceilings() -> Dict[str, float]:
+    out = {}
+    for item in os.getenv('CEREBRAL_MODEL_LIMITS', '').split(','):
+        name, sep, value = item.partition('=')
+        if sep and name.strip():
+            out[name.strip()] = float(value)
+    return out
+
+
+_limiters: Dict[str, AIMDLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def limiter_for(model: str) -> AIMDLimiter:
+    """Process-wide limiter for `model`, created on first use from the environment."""
+    with _registry_lock:
+        lim = _limiters.get(model)
+        if lim is None:
+            ceiling = _model_ceilings().get(model, float(os.getenv('CEREBRAL_LIMIT_MAX', '64')))
+            lim = AIMDLimiter(initial=float(os.getenv('CEREBRAL_LIMIT_INITIAL', '8')), maximum=ceiling)
+            _limiters[model] = lim
+        return lim
+
+
+@contextmanager
+def provider_slot(model: str, priority: Optional[str] = None, tenant: Optional[str] = None):
+    """Hold a slot of `model`'s limiter for the duration of the block (no-op when disabled)."""
+    if not enabled():
+        yield
+        return
+    with limiter_for(model).slot(priority=priority, tenant=tenant):
+        yield
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    with _registry_lock:
+        items = list(_limiters.items())
+    return {model: lim.snapshot() for model, lim in items}
+
+
+def reset():
+    """Forget every limiter (tests and benchmarks)."""
+    with _registry_lock:
+        _limiters.clear()
+    scheduling.reset()
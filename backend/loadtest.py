@@ -0,0 +1,393 @@
+"""Load generator for live courtrooms: many concurrent WebSocket sessions.
+
+Each simulated courtroom creates a session with `POST /api/session`, opens
+`/ws/session/{id}` and sends `present` messages at `rate` per second,
+waiting for the Opposing, Judge and Jury replies of each turn. The client
+side records turn latency (send to last reply), time to first reply and
+errors; at the end the server's own `/debug/latency` view is fetched too.
+
+Without `--url` the app runs in-process behind an ASGI transport, against
+the fake provider, so a run needs no server or network. With `--url` it
+drives a running backend over real sockets; start that one with
+`CEREBRAL_FAKE_PROVIDER=1` and a WebSocket-capable uvicorn
+(`pip install 'uvicorn[standard]'`).
+
+    python -m backend.loadtest --clients 1000 --rate 0.5 --duration 60 -o load.json
+    python -m backend.loadtest --url http://127.0.0.1:8000 --clients 200 --compare load.json
+
+The report is JSON, so two runs (say, two commits) can be compared with
+`--compare`.
+"""
+import asyncio
+import base64
+import json
+import os
+import random
+import struct
+import subprocess
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .latency import LogHistogram
+
+AGENTS = ('Opposing', 'Judge', 'Jury')
+REPORT_VERSION = 1
+
+
+class ASGITransport:
+    """Talks to an ASGI app in this process; no sockets involved."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, path: str, body: Optional[dict] = None) -> Tuple[int, Any]:
+        path, _, query = path.partition('?')
+        payload = json.dumps(body).encode() if body is not None else b''
+        scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+                 'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+                 'root_path': '', 'headers': [(b'content-type', b'application/json')],
+                 'client': ('127.0.0.1', 0), 'server': ('127.0.0.1', 80)}
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                await asyncio.Event().wait()
+            sent = True
+            return {'type': 'http.request', 'body': payload, 'more_body': False}
+
+        status, chunks = 500, []
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        await self.app(scope, receive, send)
+        return status, json.loads(b''.join(chunks) or b'null')
+
+    async def websocket(self, path: str) -> 'ASGIWebSocket':
+        ws = ASGIWebSocket(self.app, path)
+        await ws.connect()
+        return ws
+
+
+class ASGIWebSocket:
+    def __init__(self, app, path: str):
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        scope = {'type': 'websocket', 'asgi': {'version': '3.0'}, 'scheme': 'ws', 'path': path,
+                 'raw_path': path.encode(), 'query_string': b'', 'root_path': '', 'headers': [],
+                 'client': ('127.0.0.1', 0), 'server': ('127.0.0.1', 80), 'subprotocols': []}
+        self.task = asyncio.ensure_future(app(scope, self.inbox.get, self.outbox.put))
+
+    async def connect(self):
+        await self.inbox.put({'type': 'websocket.connect'})
+        message = await self.outbox.get()
+        if message['type'] != 'websocket.accept':
+            raise ConnectionError(f'websocket rejected: {message}')
+
+    async def send_json(self, obj):
+        await self.inbox.put({'type': 'websocket.receive', 'text': json.dumps(obj)})
+
+    async def receive_json(self):
+        message = await self.outbox.get()
+        if message['type'] == 'websocket.close':
+            raise ConnectionError('websocket closed by server')
+        return json.loads(message.get('text') or message.get('bytes'))
+
+    async def close(self):
+        await self.inbox.put({'type': 'websocket.disconnect', 'code': 1000})
+        try:
+            await asyncio.wait_for(self.task, 5.0)
+        except (asyncio.TimeoutError, Exception):
+            self.task.cancel()
+
+
+class NetworkTransport:
+    """Plain HTTP/1.1 and RFC 6455 WebSocket over asyncio streams, so no client library is needed."""
+
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 80
+
+    async def request(self, method: str, path: str, body: Optional[dict] = None) -> Tuple[int, Any]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b''
+        head = (f'{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nConnection: close\r\n'
+                f'Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n')
+        writer.write(head.encode() + payload)
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+        header, _, data = raw.partition(b'\r\n\r\n')
+        status = int(header.split(b' ', 2)[1])
+        if b'transfer-encoding: chunked' in header.lower():
+            data = _dechunk(data)
+        return status, json.loads(data or b'null')
+
+    async def websocket(self, path: str) -> 'NetworkWebSocket':
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((f'GET {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nUpgrade: websocket\r\n'
+                      f'Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n'
+                      f'Sec-WebSocket-Version: 13\r\n\r\n').encode())
+        await writer.drain()
+        header = await reader.readuntil(b'\r\n\r\n')
+        if b' 101 ' not in header.split(b'\r\n', 1)[0]:
+            writer.close()
+            raise ConnectionError(f'websocket upgrade refused: {header.splitlines()[0]!r}')
+        return NetworkWebSocket(reader, writer)
+
+
+def _dechunk(data: bytes) -> bytes:
+    out = []
+    while data:
+        size, _, rest = data.partition(b'\r\n')
+        n = int(size.split(b';')[0], 16)
+        if n == 0:
+            break
+        out.append(rest[:n])
+        data = rest[n + 2:]
+    return b''.join(out)
+
+
+class NetworkWebSocket:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def _send_frame(self, opcode: int, payload: bytes):
+        head = bytes([0x80 | opcode])
+        n = len(payload)
+        if n < 126:
+            head += bytes([0x80 | n])
+        elif n < 1 << 16:
+            head += bytes([0x80 | 126]) + struct.pack('!H', n)
+        else:
+            head += bytes([0x80 | 127]) + struct.pack('!Q', n)
+        mask = os.urandom(4)
+        # clients must mask every frame they send
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        self.writer.write(head + mask + masked)
+        await self.writer.drain()
+
+    async def send_json(self, obj):
+        await self._send_frame(0x1, json.dumps(obj).encode())
+
+    async def receive_json(self):
+        parts = []
+        while True:
+            b0, b1 = await self.reader.readexactly(2)
+            n = b1 & 0x7F
+            if n == 126:
+                n = struct.unpack('!H', await self.reader.readexactly(2))[0]
+            elif n == 127:
+                n = struct.unpack('!Q', await self.reader.readexactly(8))[0]
+            mask = await self.reader.readexactly(4) if b1 & 0x80 else None
+            payload = await self.reader.readexactly(n)
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+            opcode = b0 & 0x0F
+            if opcode == 0x8:
+                raise ConnectionError('websocket closed by server')
+            if opcode == 0x9:
+                await self._send_frame(0xA, payload)
+                continue
+            if opcode in (0x0, 0x1, 0x2):
+                parts.append(payload)
+                if b0 & 0x80:
+                    return json.loads(b''.join(parts))
+
+    async def close(self):
+        try:
+            await self._send_frame(0x8, struct.pack('!H', 1000))
+        except (ConnectionError, OSError):
+            pass
+        self.writer.close()
+
+
+class LoadStats:
+    def __init__(self):
+        self.turn_ms = LogHistogram()
+        self.ttft_ms = LogHistogram()
+        self.counts = {'sessions_opened': 0, 'session_failures': 0, 'turns_sent': 0, 'turns_completed': 0,
+                       'turn_errors': 0, 'timeouts': 0, 'disconnects': 0}
+        self.agent_errors = {a: 0 for a in AGENTS}
+
+
+async def courtroom(transport, index: int, args, stats: LoadStats, stop_at: float, rng: random.Random):
+    loop = asyncio.get_running_loop()
+    await asyncio.sleep(args.ramp * index / max(1, args.clients))
+    try:
+        status, body = await transport.request('POST', '/api/session',
+                                               {'title': f'load-{index}', 'facts': args.facts})
+        if status != 200:
+            raise ConnectionError(f'session create returned {status}')
+        ws = await transport.websocket(f"/ws/session/{body['session_id']}")
+    except Exception:
+        stats.counts['session_failures'] += 1
+        return
+    stats.counts['sessions_opened'] += 1
+    interval = 1.0 / args.rate
+    next_at = loop.time()
+    turns = 0
+    try:
+        while loop.time() < stop_at and (not args.turns or turns < args.turns):
+            delay = next_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            next_at += rng.expovariate(args.rate) if args.poisson else interval
+            turns += 1
+            stats.counts['turns_sent'] += 1
+            t0 = loop.time()
+            await ws.send_json({'type': 'present', 'text': args.argument})
+            first = None
+            failed = False
+            for _ in AGENTS:
+                try:
+                    msg = await asyncio.wait_for(ws.receive_json(), args.timeout)
+                except asyncio.TimeoutError:
+                    stats.counts['timeouts'] += 1
+                    return
+                if first is None:
+                    first = loop.time()
+                text = msg.get('text') or ''
+                if text.startswith('(error)') or msg.get('degraded'):
+                    failed = True
+                    agent = msg.get('agent')
+                    if agent in stats.agent_errors:
+                        stats.agent_errors[agent] += 1
+            stats.ttft_ms.record((first - t0) * 1000.0)
+            stats.turn_ms.record((loop.time() - t0) * 1000.0)
+            stats.counts['turns_completed'] += 1
+            if failed:
+                stats.counts['turn_errors'] += 1
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        # a dropped socket ends readexactly early and a garbled frame fails to decode;
+        # under overload both are expected, so count them instead of aborting the run
+        stats.counts['disconnects'] += 1
+    finally:
+        await ws.close()
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              timeout=5, check=True).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+async def run_load(transport, args) -> Dict[str, Any]:
+    """Drive `args.clients` courtrooms for `args.duration` seconds; returns the report dict."""
+    stats = LoadStats()
+    rng = random.Random(args.seed)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    stop_at = started + args.ramp + args.duration
+    await asyncio.gather(*(courtroom(transport, i, args, stats, stop_at, random.Random(rng.random()))
+                           for i in range(args.clients)))
+    elapsed = loop.time() - started
+    c = stats.counts
+    try:
+        _, server = await transport.request('GET', '/debug/latency?window=all')
+    except Exception as e:
+        server = {'error': str(e)}
+    return {
+        'version': REPORT_VERSION,
+        'commit': _git_commit(),
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'target': args.url or 'in-process',
+        'config': {k: getattr(args, k) for k in ('clients', 'rate', 'duration', 'turns', 'ramp', 'poisson',
+                                                 'timeout', 'latency_ms')},
+        'elapsed_s': round(elapsed, 3),
+        'counts': c,
+        'agent_errors': stats.agent_errors,
+        'error_rate': ((c['turn_errors'] + c['timeouts'] + c['disconnects']) / c['turns_sent']
+                       if c['turns_sent'] else 0.0),
+        'turns_per_s': round(c['turns_completed'] / elapsed, 3) if elapsed else 0.0,
+        'turn_latency': stats.turn_ms.summary(),
+        'ttft': stats.ttft_ms.summary(),
+        'server': server,
+    }
+
+
+# (report path, higher is worse) for the numbers --compare looks at
+COMPARED = (
+    (('turn_latency', 'p50_ms'), True), (('turn_latency', 'p99_ms'), True),
+    (('ttft', 'p50_ms'), True), (('ttft', 'p99_ms'), True),
+    (('error_rate',), True), (('turns_per_s',), False),
+)
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Dict[str, Optional[float]]]:
+    """Per metric: baseline, current and the relative change where higher means worse."""
+    out = {}
+    for path, higher_is_worse in COMPARED:
+        a, b = base, new
+        for key in path:
+            a = a.get(key) if isinstance(a, dict) else None
+            b = b.get(key) if isinstance(b, dict) else None
+        change = None
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)) and a:
+            change = (b - a) / a if higher_is_worse else (a - b) / a
+        out['.'.join(path)] = {'baseline': a, 'current': b, 'regression': change}
+    return out
+
+
+def main(argv=None):
+    import argparse
+    import sys
+
+    ap = argparse.ArgumentParser(description='Drive many concurrent courtroom WebSocket sessions.')
+    ap.add_argument('--url', help='backend base URL; runs the app in-process against the fake provider if omitted')
+    ap.add_argument('--clients', type=int, default=100, help='concurrent courtrooms')
+    ap.add_argument('--rate', type=float, default=0.5, help="'present' messages per second per courtroom")
+    ap.add_argument('--duration', type=float, default=30.0, help='seconds to run after the ramp')
+    ap.add_argument('--turns', type=int, default=0, help='stop each courtroom after this many turns (0: no limit)')
+    ap.add_argument('--ramp', type=float, default=5.0, help='seconds over which courtrooms are opened')
+    ap.add_argument('--poisson', action='store_true', help='exponential gaps between messages')
+    ap.add_argument('--timeout', type=float, default=60.0, help='seconds to wait for a reply')
+    ap.add_argument('--latency-ms', type=float, default=50.0, help='fake provider latency (in-process only)')
+    ap.add_argument('--facts', default='The defendant was seen near the bank at 9pm.')
+    ap.add_argument('--argument', default='The witness could not have seen the defendant in the dark.')
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('-o', '--output', default='-', help="JSON report file, or '-' for stdout")
+    ap.add_argument('--compare', metavar='REPORT', help='earlier report to compare against')
+    ap.add_argument('--max-regression', type=float, default=None,
+                    help='exit 1 if any compared metric is worse by more than this fraction')
+    args = ap.parse_args(argv)
+
+    if args.url:
+        transport = NetworkTransport(args.url)
+    else:
+        os.environ['CEREBRAL_FAKE_PROVIDER'] = '1'
+        os.environ['CEREBRAL_FAKE_LATENCY_MS'] = str(args.latency_ms)
+        from .main import app
+        transport = ASGITransport(app)
+
+    report = asyncio.run(run_load(transport, args))
+    failed = False
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            report['comparison'] = compare(json.load(f), report)
+        if args.max_regression is not None:
+            failed = any(m['regression'] is not None and m['regression'] > args.max_regression
+                         for m in report['comparison'].values())
+
+    text = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,44 @@
 from fastapi import FastAPI
 import logging
 from pydantic import BaseModel
+import hmac
 import os
+import threading
+import time
+from contextlib import asynccontextmanager
 
-try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None
 from . import prompts
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
 import json
-from pathlib import Path
-from fastapi import WebSocket, WebSocketDisconnect
+from fastapi import Request, WebSocket, WebSocketDisconnect
 from .agent_manager import AgentManager
-
-# single global manager for demo
-manager = AgentManager()
+from .openai_helper import load_sdk, resolve_api_key
+from . import accounting, evidence, latency, model_catalog, profiling, static_assets, telemetry
+from .hedging import Hedger
+from .routing import Router
+from .utils import env_flag
+
+# the SDK is loaded on the first endpoint that needs it (see openai_helper.load_sdk)
+OpenAI = None
+
+
+def _sdk():
+    return OpenAI or load_sdk()
+
+
+# single global manager for demo; CEREBRAL_JURORS > 1 enables the jury ensemble
+manager = AgentManager(
+    jurors=int(os.getenv('CEREBRAL_JURORS', '1')),
+    jury_quorum=int(os.getenv('CEREBRAL_JURY_QUORUM', '0')) or None,
+    structured=env_flag('CEREBRAL_STRUCTURED'),
+    hedger=Hedger(budget=float(os.getenv('CEREBRAL_HEDGE_BUDGET', '0.1')),
+                  fallback_model=os.getenv('CEREBRAL_HEDGE_MODEL') or None) if env_flag('CEREBRAL_HEDGE') else None,
+    degraded=env_flag('CEREBRAL_DEGRADED'),
+    router=Router.from_env(),
+    fact_budget=int(os.getenv('CEREBRAL_FACT_BUDGET', '1500')),
+    fact_top_k=int(os.getenv('CEREBRAL_FACT_TOP_K', '8')),
+    max_prompt_tokens=int(os.getenv('CEREBRAL_MAX_PROMPT_TOKENS', '0')),
+)
 
 # basic logger for the backend module
 logger = logging.getLogger('cerebral')
@@ -27,7 +50,31 @@ if not logger.handlers:
     logger.addHandler(h)
     logger.setLevel(logging.INFO)
 
-app = FastAPI(title="Cerebral Courtroom - Backend")
+
+
+def _check_configured_models():
+    """Warn about agent models the provider does not list, and warm the model catalog."""
+    api_key = resolve_api_key()
+    if not api_key:
+        return
+    try:
+        missing = model_catalog.catalog.missing(api_key, manager.configured_models())
+    except Exception as e:
+        logger.warning("could not check configured models: %s", e)
+        return
+    if missing:
+        logger.warning("configured models not offered by the provider: %s", ', '.join(missing))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # in the background, so a slow provider does not hold up startup
+    threading.Thread(target=_check_configured_models, daemon=True, name='model-check').start()
+    yield
+
+
+app = FastAPI(title="Cerebral Courtroom - Backend", lifespan=lifespan)
+app.add_middleware(latency.LatencyMiddleware)
 
 class CaseSubmission(BaseModel):
     title: str
@@ -42,19 +89,18 @@ async def health():
 
 @app.get("/models")
 async def list_models():
-    """Return available OpenAI models for the configured API key."""
-    api_key = os.getenv("OPENAI_API_KEY")
+    """Return available OpenAI models for the configured API key (cached, see model_catalog.py)."""
+    api_key = resolve_api_key()
     if not api_key:
-        return {"error": "OPENAI_API_KEY not set"}
-    if OpenAI is None:
+        if not os.getenv("OPENAI_API_KEY"):
+            return {"error": "OPENAI_API_KEY not set"}
         return {"error": "openai package not installed in this env"}
-    client = OpenAI(api_key=api_key)
+    import asyncio
     try:
-        models = client.models.list()
-        ids = [m.id for m in models.data]
-        return {"models": ids}
+        ids = await asyncio.to_thread(model_catalog.catalog.get, api_key)
     except Exception as e:
         return {"error": str(e)}
+    return {"models": ids, "missing_configured": sorted(manager.configured_models() - set(ids))}
 
 
 @app.post("/api/case")
@@ -74,10 +120,11 @@ async def demo_opposing(payload: DemoArg):
     api_key = os.getenv('OPENAI_API_KEY')
     if not api_key:
         return {"error": "OPENAI_API_KEY not set"}
-    if OpenAI is None:
+    sdk_class = _sdk()
+    if sdk_class is None:
         return {"error": "openai package not installed"}
 
-    client = OpenAI(api_key=api_key)
+    client = sdk_class(api_key=api_key)
     prompt = prompts.OPPOSING_PROMPT_TEMPLATE.format(facts=payload.facts, argument=payload.argument)
     try:
         resp = client.responses.create(
@@ -101,15 +148,19 @@ async def demo_opposing_stream(facts: str, argument: str):
     api_key = os.getenv('OPENAI_API_KEY')
     if not api_key:
         return {"error": "OPENAI_API_KEY not set"}
-    if OpenAI is None:
+    sdk_class = _sdk()
+    if sdk_class is None:
         return {"error": "openai package not installed"}
 
-    client = OpenAI(api_key=api_key)
+    client = sdk_class(api_key=api_key)
     prompt = prompts.OPPOSING_PROMPT_TEMPLATE.format(facts=facts, argument=argument)
 
     def event_generator():
+        from .limiter import provider_slot
         try:
-            with client.responses.stream(model="gpt-5-codex", input=prompt) as stream:
+            # read-only viewers queue behind live courtroom turns
+            with provider_slot('gpt-5-codex', priority='spectator'), \
+                    client.responses.stream(model="gpt-5-codex", input=prompt) as stream:
                 for event in stream:
                     # stream output text deltas to client
                     if getattr(event, 'type', None) == 'response.output_text.delta':
@@ -125,20 +176,237 @@ async def demo_opposing_stream(facts: str, argument: str):
     return StreamingResponse(event_generator(), media_type='text/event-stream')
 
 
+class SimulationRequest(BaseModel):
+    facts: str
+    arguments: list[str]
+    trials: int = 100
+    concurrency: int = 8
+    target_ci_width: float | None = None
+    min_trials: int = 30
+    tenant: str | None = None
+
+
+@app.post('/api/simulate')
+async def simulate(payload: SimulationRequest):
+    """Run a Monte Carlo batch of trials and stream progress as Server-Sent Events.
+
+    Emits one `progress` event per completed trial and a final `done` event
+    with the verdict histogram, confidence quantiles and bootstrap intervals.
+    """
+    import asyncio
+    import threading
+    from .simulation import run_simulation
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def publish(event):
+        loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    def work():
+        try:
+            summary = run_simulation(
+                payload.facts, payload.arguments,
+                trials=min(payload.trials, 100_000),
+                concurrency=min(max(payload.concurrency, 1), 256),
+                target_ci_width=payload.target_ci_width,
+                min_trials=payload.min_trials,
+                on_progress=lambda p: publish({'type': 'progress', **p}),
+                manager=manager,
+                stop_event=stop,
+                tenant=payload.tenant,
+            )
+            publish({'type': 'done', 'summary': summary})
+        except Exception as e:
+            logger.exception("[simulate] failed")
+            publish({'type': 'error', 'error': str(e)})
+
+    async def event_generator():
+        worker = asyncio.ensure_future(asyncio.to_thread(work))
+        try:
+            while True:
+                event = await queue.get()
+                yield f"data: {json.dumps(event)}\n\n"
+                if event['type'] in ('done', 'error'):
+                    break
+        finally:
+            # client gone or stream finished: stop launching trials, let in-flight ones drain
+            stop.set()
+            await worker
+
+    return StreamingResponse(event_generator(), media_type='text/event-stream')
+
+
+@app.post('/api/bulk')
+async def bulk_evaluate(request: Request, concurrency: int = 8, retries: int = 2, tenant: str | None = None):
+    """Evaluate a JSONL request body of cases, streaming JSONL results in completion order.
+
+    Each input line is {"title", "facts", "arguments": [...]}. The body is
+    spooled to a temporary file before the response starts (reading it from
+    inside the response iterator races Starlette's disconnect listener), so
+    large uploads are never held in memory.
+    """
+    import tempfile
+    from .bulk import aiter_lines, evaluate_stream
+
+    spool = tempfile.TemporaryFile()
+    try:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+    except Exception:
+        spool.close()
+        raise
+
+    async def spooled_chunks():
+        while True:
+            chunk = spool.read(64 * 1024)
+            if not chunk:
+                return
+            yield chunk
+
+    async def result_lines():
+        try:
+            async for result in evaluate_stream(aiter_lines(spooled_chunks()), manager,
+                                                concurrency=min(max(concurrency, 1), 256), retries=retries,
+                                                tenant=tenant):
+                yield json.dumps(result) + "\n"
+        finally:
+            spool.close()
+
+    return StreamingResponse(result_lines(), media_type='application/x-ndjson')
+
+
+@app.get('/api/limits')
+async def provider_limits():
+    """Live view of the adaptive per-model concurrency windows (see limiter.py)."""
+    from . import limiter
+    return {'enabled': limiter.enabled(), 'models': limiter.snapshot()}
+
+
+@app.get('/api/breakers')
+async def provider_breakers():
+    """Circuit breaker state per model (see breaker.py)."""
+    from . import breaker
+    return {'degraded_mode': manager.degraded, 'models': breaker.snapshot()}
+
+
+@app.get('/api/routing')
+async def routing_report():
+    """Per-role model choices, their latency / error / quality stats and latency saved."""
+    if manager.router is None:
+        return {'enabled': False}
+    return {'enabled': True, **manager.router.report()}
+
+
+@app.get('/api/hedging')
+async def hedging_stats():
+    """Hedge rate, hedge win rate and time-to-first-token p99 with and without hedging."""
+    if manager.hedger is None:
+        return {'enabled': False}
+    return {'enabled': True, **manager.hedger.stats()}
+
+
+@app.get('/api/facts')
+async def fact_store_stats():
+    """Distinct pinned facts held, session references to them and the bytes deduplication saves."""
+    return manager.fact_store.stats()
+
+
+@app.get('/api/usage')
+async def usage_report():
+    """Tokens and cost per tenant and per (tenant, agent, model), with budgets and rejection counts."""
+    return accounting.store.snapshot()
+
+
+@app.get('/debug/latency')
+async def debug_latency(window: str = '5m'):
+    """p50/p90/p99/p999 per operation and agent role over the last 1m, 5m, 1h or all time."""
+    try:
+        return {'window': window, 'operations': latency.report(window)}
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+def _admin_denied(request: Request):
+    """403 response unless the request carries CEREBRAL_ADMIN_TOKEN in X-Admin-Token."""
+    token = os.getenv('CEREBRAL_ADMIN_TOKEN')
+    given = request.headers.get('x-admin-token', '')
+    if token and hmac.compare_digest(given.encode(), token.encode()):
+        return None
+    return JSONResponse({"error": "admin token required"}, status_code=403)
+
+
+@app.get('/debug/profile')
+async def debug_profile(request: Request, seconds: float = 10.0, hz: float = 100.0):
+    """Sample every thread's stack for `seconds`; returns collapsed stacks for a flame graph."""
+    denied = _admin_denied(request)
+    if denied:
+        return denied
+    import asyncio
+    try:
+        result = await asyncio.to_thread(profiling.sample_stacks, seconds, hz)
+    except profiling.ProfilerBusy as e:
+        return JSONResponse({"error": str(e)}, status_code=409)
+    headers = {'X-Profile-Samples': str(result['samples']),
+               'X-Profile-Sampler-CPU': f"{result['sampler_cpu_fraction']:.4f}"}
+    return PlainTextResponse(result['collapsed'], headers=headers)
+
+
+@app.post('/debug/memory/start')
+async def debug_memory_start(request: Request, frames: int = 1):
+    """Start tracemalloc (if needed) and take the baseline snapshot."""
+    denied = _admin_denied(request)
+    if denied:
+        return denied
+    import asyncio
+    # the baseline snapshot walks every traced block; keep it off the event loop
+    await asyncio.to_thread(profiling.memory.start, frames)
+    return {'tracing': True}
+
+
+@app.get('/debug/memory/diff')
+async def debug_memory_diff(request: Request, top: int = 25):
+    """Traced memory change per module since the previous snapshot."""
+    denied = _admin_denied(request)
+    if denied:
+        return denied
+    import asyncio
+    try:
+        return await asyncio.to_thread(profiling.memory.diff, top)
+    except RuntimeError as e:
+        return JSONResponse({"error": str(e)}, status_code=409)
+
+
+@app.post('/debug/memory/stop')
+async def debug_memory_stop(request: Request):
+    denied = _admin_denied(request)
+    if denied:
+        return denied
+    profiling.memory.stop()
+    return {'tracing': False}
+
+
+@app.get('/metrics')
+async def metrics():
+    """Per-agent phase latencies, tokens/sec, turn times and token/cost usage in the Prometheus text format."""
+    return PlainTextResponse(telemetry.render() + accounting.render(), media_type='text/plain; version=0.0.4')
+
+
 @app.get('/demo.html')
-async def demo_page():
+async def demo_page(request: Request):
     """Serve the demo HTML page so the demo is a single URL (no CORS needed)."""
-    base = Path(__file__).resolve().parent.parent
-    demo_path = base / 'frontend' / 'demo.html'
-    if demo_path.exists():
-        return FileResponse(str(demo_path))
-    return {"error": "demo page not found"}
+    response = static_assets.assets.response('demo.html', request.headers)
+    if response is None:
+        return {"error": "demo page not found"}
+    return response
 
 
 @app.get('/')
-async def root_redirect():
+async def root_redirect(request: Request):
     """Serve demo at root for convenience"""
-    return FileResponse(str((Path(__file__).resolve().parent.parent / 'frontend' / 'demo.html')))
+    return await demo_page(request)
 
 
 @app.post('/api/session')
@@ -147,6 +415,138 @@ async def create_session(payload: CaseSubmission):
     return {"session_id": sid}
 
 
+@app.delete('/api/session/{session_id}')
+async def close_session(session_id: str):
+    """Forget a session, releasing its facts and any evidence it holds."""
+    if manager.get_session(session_id) is None:
+        return {"error": "session not found"}
+    manager.close_session(session_id)
+    return {"closed": session_id}
+
+
+class ForkRequest(BaseModel):
+    at_turn: int | None = None
+
+
+@app.post('/api/session/{session_id}/fork')
+async def fork_session(session_id: str, payload: ForkRequest):
+    try:
+        sid = manager.fork_session(session_id, payload.at_turn)
+    except KeyError:
+        return {"error": "session not found"}
+    return {"session_id": sid}
+
+
+class WhatIfRequest(BaseModel):
+    arguments: list[str]
+    at_turn: int | None = None
+
+
+@app.post('/api/session/{session_id}/what-if')
+async def what_if(session_id: str, payload: WhatIfRequest):
+    """Run each argument as its own branch of the session, concurrently.
+
+    Every branch forks the session after `at_turn` turns (default: all of
+    them) and plays one turn, so alternatives can be compared side by side.
+    """
+    import asyncio
+    if manager.get_session(session_id) is None:
+        return {"error": "session not found"}
+    branches = await asyncio.to_thread(manager.run_what_if, session_id, payload.arguments[:16], payload.at_turn)
+    return {"branches": branches}
+
+
+class EstimateRequest(BaseModel):
+    argument: str
+
+
+@app.post('/api/session/{session_id}/estimate')
+async def estimate_turn(session_id: str, payload: EstimateRequest):
+    """Prompt tokens per agent and the worst-case cost of presenting `argument` next."""
+    try:
+        return manager.estimate_turn(session_id, payload.argument)
+    except KeyError:
+        return {"error": "session not found"}
+
+
+@app.get('/api/session/{session_id}/usage')
+async def session_usage(session_id: str):
+    """Tokens and cost the session has used so far, per agent, and its budget."""
+    if manager.get_session(session_id) is None:
+        return {"error": "session not found"}
+    return accounting.store.session(session_id)
+
+
+@app.post('/api/evidence')
+async def upload_evidence(request: Request):
+    """Store an evidence document sent as the raw body or as a multipart/form-data file part.
+
+    The body is written to disk and chunked as it streams in (see evidence.py),
+    so large exhibits are never held in memory.
+    """
+    body = request.stream()
+    content_type = request.headers.get('content-type', '')
+    if content_type.startswith('multipart/form-data'):
+        boundary = next((p.strip()[len('boundary='):].strip('"') for p in content_type.split(';')
+                         if p.strip().startswith('boundary=')), '')
+        if not boundary:
+            return JSONResponse({"error": "multipart body without a boundary"}, status_code=400)
+        body = evidence.aiter_multipart_file(body, boundary)
+    try:
+        doc = await evidence.store.ingest(body)
+    except evidence.EvidenceTooLarge as e:
+        return JSONResponse({"error": str(e)}, status_code=413)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return doc.info()
+
+
+@app.get('/api/evidence/{evidence_id}')
+async def evidence_info(evidence_id: str):
+    doc = evidence.store.get(evidence_id)
+    if doc is None:
+        return {"error": "evidence not found"}
+    return doc.info()
+
+
+@app.delete('/api/evidence/{evidence_id}')
+async def delete_evidence(evidence_id: str):
+    """Remove a stored document and its file; 409 while it is attached to a session."""
+    try:
+        deleted = evidence.store.delete(evidence_id)
+    except evidence.EvidenceInUse as e:
+        return JSONResponse({"error": str(e)}, status_code=409)
+    if not deleted:
+        return {"error": "evidence not found"}
+    return {"deleted": evidence_id}
+
+
+@app.get('/api/evidence/{evidence_id}/text')
+async def evidence_text(evidence_id: str, start: int = 0, end: int | None = None):
+    """Bytes [start, end) of a stored document as text, at most 1 MiB per request."""
+    doc = evidence.store.get(evidence_id)
+    if doc is None:
+        return {"error": "evidence not found"}
+    end = doc.size if end is None else end
+    return PlainTextResponse(doc.slice(start, min(end, start + (1 << 20))))
+
+
+@app.post('/api/session/{session_id}/evidence/{evidence_id}')
+async def attach_evidence(session_id: str, evidence_id: str):
+    import asyncio
+    doc = evidence.store.get(evidence_id)
+    if doc is None:
+        return {"error": "evidence not found"}
+    try:
+        # the first attach builds the document's retrieval index
+        await asyncio.to_thread(manager.attach_evidence, session_id, doc)
+    except KeyError:
+        return {"error": "session not found"}
+    except evidence.EvidenceDeleted:
+        return {"error": "evidence not found"}
+    return doc.info()
+
+
 @app.websocket('/ws/session/{session_id}')
 async def ws_session(ws: WebSocket, session_id: str):
     await ws.accept()
@@ -157,6 +557,7 @@ async def ws_session(ws: WebSocket, session_id: str):
             logger.debug("[ws] recv for %s: %s", session_id, data)
             # data: {type: 'present', text: '...'}
             if data.get('type') == 'present':
+                t_msg = time.perf_counter()
                 text = data.get('text', '')
                 manager.add_user_presentation(session_id, text)
                 # run the multi-agent sequence in a background thread so we don't block the event loop
@@ -173,6 +574,9 @@ async def ws_session(ws: WebSocket, session_id: str):
                 # send each agent's reply as it becomes available
                 for r in results:
                     logger.debug("[ws] send to %s: %s", session_id, r)
+                    t0 = time.perf_counter()
                     await ws.send_json({'type': 'agent_reply', 'agent': r.get('agent'), 'text': r.get('text')})
+                    telemetry.observe('send', time.perf_counter() - t0, agent=r.get('agent'), start=t0)
+                latency.record('ws present', (time.perf_counter() - t_msg) * 1000.0)
     except WebSocketDisconnect:
         return
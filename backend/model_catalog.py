@@ -0,0 +1,118 @@
+"""Cached provider model listing.
+
+`ModelCatalog.get(api_key)` returns the model ids visible to that key. The
+first call for a key fetches the list; concurrent callers wait for that one
+fetch instead of starting their own. Once an entry is older than `ttl`, it is
+still returned at once while a single background refresh replaces it
+(stale-while-revalidate). A failed refresh keeps the old list. Entries are
+keyed by a hash of the API key, never the key itself.
+
+main.py serves `/models` from the process-wide `catalog` and, at startup,
+checks the models AgentManager is configured to call against it.
+
+    CEREBRAL_MODELS_TTL_S=300
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger('cerebral')
+
+
+def list_models(api_key: str) -> List[str]:
+    """Model ids from the provider (or the fake provider)."""
+    from .openai_helper import get_client
+    return sorted(m.id for m in get_client(api_key).models.list().data)
+
+
+class _Entry:
+    def __init__(self):
+        self.models: Optional[List[str]] = None
+        self.fetched_at = 0.0
+        self.error: Optional[BaseException] = None
+        self.refreshing = False
+        self.ready = threading.Event()
+
+
+class ModelCatalog:
+    def __init__(self, fetch: Callable[[str], List[str]] = list_models, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.fetch = fetch
+        self.ttl = float(os.getenv('CEREBRAL_MODELS_TTL_S', '300')) if ttl is None else ttl
+        self.clock = clock
+        self.stats = {'hits': 0, 'stale_hits': 0, 'fetches': 0, 'refresh_errors': 0}
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+    def get(self, api_key: str, timeout: float = 30.0) -> List[str]:
+        key = self._key(api_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            leader = entry is None
+            if leader:
+                entry = self._entries[key] = _Entry()
+        if leader:
+            return self._fill(key, entry, api_key)
+        if not entry.ready.wait(timeout):
+            raise TimeoutError('model list fetch timed out')
+        if entry.models is None:
+            raise entry.error or RuntimeError('model list unavailable')
+        with self._lock:
+            stale = self.clock() - entry.fetched_at > self.ttl
+            start_refresh = stale and not entry.refreshing
+            if start_refresh:
+                entry.refreshing = True
+            self.stats['stale_hits' if stale else 'hits'] += 1
+        if start_refresh:
+            threading.Thread(target=self._refresh, args=(entry, api_key), daemon=True,
+                             name='model-catalog-refresh').start()
+        return entry.models
+
+    def _fill(self, key: str, entry: _Entry, api_key: str) -> List[str]:
+        """Cold fetch by the single leader; waiters are released either way."""
+        try:
+            with self._lock:
+                self.stats['fetches'] += 1
+            entry.models = self.fetch(api_key)
+            entry.fetched_at = self.clock()
+            return entry.models
+        except BaseException as e:
+            entry.error = e
+            with self._lock:
+                # forget the failed entry so the next call tries again
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            raise
+        finally:
+            entry.ready.set()
+
+    def _refresh(self, entry: _Entry, api_key: str):
+        with self._lock:
+            self.stats['fetches'] += 1
+        try:
+            models = self.fetch(api_key)
+        except Exception as e:
+            logger.warning('model list refresh failed, serving the cached list: %s', e)
+            with self._lock:
+                self.stats['refresh_errors'] += 1
+                entry.refreshing = False
+            return
+        with self._lock:
+            entry.models = models
+            entry.fetched_at = self.clock()
+            entry.refreshing = False
+
+    def missing(self, api_key: str, wanted: Iterable[str]) -> List[str]:
+        """Names in `wanted` that the provider does not list for this key."""
+        available = set(self.get(api_key))
+        return sorted(set(wanted) - available)
+
+
+catalog = ModelCatalog()
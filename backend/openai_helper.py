@@ -1,10 +1,95 @@
+import importlib.util
+import os
+import re
+import time
 import typing
 import traceback
 
-try:
-    from openai import OpenAI  # type: ignore
-except Exception:
-    OpenAI = None
+from . import accounting, telemetry, tokens
+from .breaker import breaker_for
+from .limiter import is_overload, provider_slot
+from .utils import env_flag
+
+# The SDK takes a large share of cold start, and mock and fake-provider runs
+# never use it, so it is imported on the first real call (see load_sdk).
+# Tests replace this name with a fake client class.
+OpenAI = None
+_sdk_loaded = False
+_sdk_found = None
+
+# 429/5xx answers are retried this many times, after the limiter has shrunk the window
+OVERLOAD_RETRIES = int(os.getenv('CEREBRAL_OVERLOAD_RETRIES', '2'))
+OVERLOAD_BACKOFF = 0.25
+
+
+_UNEXPECTED_KWARG_RE = re.compile(r"unexpected keyword argument '(\w+)'")
+
+
+def _normalize_kwargs(kwargs: dict) -> dict:
+    # callers use the familiar `max_tokens`; the Responses API calls it `max_output_tokens`
+    if 'max_tokens' in kwargs and 'max_output_tokens' not in kwargs:
+        kwargs = dict(kwargs)
+        kwargs['max_output_tokens'] = kwargs.pop('max_tokens')
+    return kwargs
+
+
+def _drop_rejected(kwargs: dict, exc: TypeError) -> dict | None:
+    """Return kwargs without the one a TypeError names, or None if it names none of them."""
+    m = _UNEXPECTED_KWARG_RE.search(str(exc))
+    if not m or m.group(1) not in kwargs:
+        return None
+    alt = dict(kwargs)
+    alt.pop(m.group(1))
+    return alt
+
+
+def load_sdk():
+    """The `openai.OpenAI` class, imported on first use; None if the package is missing."""
+    global OpenAI, _sdk_loaded, _sdk_found
+    if OpenAI is None and not _sdk_loaded:
+        _sdk_loaded = True
+        try:
+            from openai import OpenAI as sdk_class  # type: ignore
+        except Exception:
+            sdk_class = None
+        OpenAI = sdk_class
+        _sdk_found = sdk_class is not None
+    return OpenAI
+
+
+def sdk_available() -> bool:
+    """Whether the SDK can be used, without importing it."""
+    global _sdk_found
+    if OpenAI is not None:
+        return True
+    if _sdk_found is None:
+        _sdk_found = importlib.util.find_spec('openai') is not None
+    return _sdk_found
+
+
+def fake_provider_enabled() -> bool:
+    return env_flag('CEREBRAL_FAKE_PROVIDER')
+
+
+def resolve_api_key() -> str | None:
+    """Return the key agent calls should use, or None when agents must run in mock mode."""
+    api_key = os.getenv('OPENAI_API_KEY')
+    if fake_provider_enabled():
+        return api_key or 'fake'
+    if not api_key or not sdk_available():
+        return None
+    return api_key
+
+
+def get_client(api_key: str):
+    """Build a provider client, honouring the local fake provider switch."""
+    if fake_provider_enabled():
+        from .fake_provider import shared_client
+        return shared_client()
+    sdk_class = load_sdk()
+    if sdk_class is None:
+        raise RuntimeError('openai package not installed')
+    return sdk_class(api_key=api_key)
 
 
 def _get_text_from_resp(resp) -> str:
@@ -37,47 +122,85 @@ def _get_text_from_resp(resp) -> str:
 def call_responses(api_key: str | None, model: str, input_text: str, **kwargs) -> str:
     """Call the OpenAI Responses API in a resilient way.
 
-    Tries a couple of call shapes if the installed SDK rejects some kwargs
-    (for example older/newer SDKs may not accept `max_tokens`).
+    `max_tokens` is sent as `max_output_tokens`. If the installed SDK rejects
+    a keyword argument, only the kwarg named by the TypeError is dropped and
+    the call retried; the bare call is the last resort. Each attempt holds a
+    slot of the model's adaptive concurrency limiter (see limiter.py), and
+    429/5xx answers are retried with backoff up to OVERLOAD_RETRIES times.
+    While the model's circuit breaker is open the call fails at once with
+    `breaker.CircuitOpenError` (see breaker.py), and a call that could exceed
+    a token or cost budget is refused with `accounting.BudgetExceeded` before
+    it is sent (see accounting.py).
 
     Returns a plain text string (best-effort). If OpenAI client is not
     available or api_key is None, raises RuntimeError.
     """
     if not api_key:
         raise RuntimeError('OPENAI API key not provided')
-    if OpenAI is None:
-        raise RuntimeError('openai package not installed')
 
-    client = OpenAI(api_key=api_key)
+    client = get_client(api_key)
 
-    # Try primary call shape first
-    last_exc = None
-    try:
-        resp = client.responses.create(model=model, input=input_text, **kwargs)
-        return _get_text_from_resp(resp)
-    except TypeError as e:
-        # often caused by unexpected keyword arguments; try fallback shapes
-        last_exc = e
-    except Exception as e:
-        # non-TypeError (network etc.) — rethrow
-        raise
+    kwargs = _normalize_kwargs(kwargs)
 
-    # Fallback 1: remove common unsupported kwargs like max_tokens
+    reservation = accounting.reserve(model, input_text, kwargs.get('max_output_tokens'))
     try:
-        alt_kwargs = dict(kwargs)
-        if 'max_tokens' in alt_kwargs:
-            alt_kwargs.pop('max_tokens')
-        resp = client.responses.create(model=model, input=input_text, **alt_kwargs)
-        return _get_text_from_resp(resp)
-    except Exception as e:
-        last_exc = e
+        breaker = breaker_for(model)
+        breaker.before_call()
+        try:
+            text = _create(client, model, input_text, kwargs)
+        except Exception as e:
+            breaker.record_failure(e)
+            raise
+        breaker.record_success()
+        return text
+    finally:
+        accounting.release(reservation)
+
+
+def _timed_create(client, model: str, input_text: str, kwargs: dict):
+    # without streaming the first token arrives with the whole reply
+    t0 = time.perf_counter()
+    resp = client.responses.create(model=model, input=input_text, **kwargs)
+    seconds = time.perf_counter() - t0
+    telemetry.observe('ttft', seconds, start=t0)
+    usage = getattr(resp, 'usage', None)
+    telemetry.observe_tokens(model, getattr(usage, 'output_tokens', 0) or 0, seconds)
+    tokens.calibrate(input_text, usage)
+    if not accounting.record(model, usage):
+        accounting.record_estimate(model, input_text, tokens.count(_get_text_from_resp(resp)))
+    return resp
 
-    # Fallback 2: try without any kwargs
-    try:
-        resp = client.responses.create(model=model, input=input_text)
-        return _get_text_from_resp(resp)
-    except Exception as e:
-        last_exc = e
+
+def _create(client, model: str, input_text: str, kwargs: dict) -> str:
+    # Try the full call shape first, shedding only the kwargs the SDK rejects.
+    # Non-TypeError failures (network etc.) are rethrown as-is.
+    last_exc = None
+    overloads = 0
+    while True:
+        try:
+            with provider_slot(model):
+                resp = _timed_create(client, model, input_text, kwargs)
+            return _get_text_from_resp(resp)
+        except TypeError as e:
+            last_exc = e
+            alt = _drop_rejected(kwargs, e)
+            if alt is None:
+                break
+            kwargs = alt
+        except Exception as e:
+            if not is_overload(e) or overloads >= OVERLOAD_RETRIES:
+                raise
+            time.sleep(OVERLOAD_BACKOFF * (2 ** overloads))
+            overloads += 1
+
+    # Fallback: try without any kwargs
+    if kwargs:
+        try:
+            with provider_slot(model):
+                resp = _timed_create(client, model, input_text, {})
+            return _get_text_from_resp(resp)
+        except Exception as e:
+            last_exc = e
 
     # All attempts failed — surface a helpful error
     tb = traceback.format_exception(type(last_exc), last_exc, last_exc.__traceback__)
@@ -97,26 +220,26 @@ def stream_responses(api_key: str | None, model: str, input_text: str, **kwargs)
     """
     if not api_key:
         raise RuntimeError('OPENAI API key not provided')
-    if OpenAI is None:
-        raise RuntimeError('openai package not installed')
 
-    client = OpenAI(api_key=api_key)
+    client = get_client(api_key)
+
+    kwargs = _normalize_kwargs(kwargs)
 
     # Try to use a streaming context if available on the client
-    try:
-        # Many SDKs expose `client.responses.stream(...)` as a context manager
-        stream_ctx = client.responses.stream(model=model, input=input_text, **kwargs)
-    except TypeError:
-        # unsupported kwargs — try with fewer kwargs
+    stream_ctx = None
+    while True:
         try:
-            alt_kwargs = dict(kwargs)
-            if 'max_tokens' in alt_kwargs:
-                alt_kwargs.pop('max_tokens')
-            stream_ctx = client.responses.stream(model=model, input=input_text, **alt_kwargs)
+            # Many SDKs expose `client.responses.stream(...)` as a context manager
+            stream_ctx = client.responses.stream(model=model, input=input_text, **kwargs)
+        except TypeError as e:
+            # unsupported kwarg — drop just that one and retry
+            alt = _drop_rejected(kwargs, e)
+            if alt is not None:
+                kwargs = alt
+                continue
         except Exception:
-            stream_ctx = None
-    except Exception:
-        stream_ctx = None
+            pass
+        break
 
     if stream_ctx is None:
         # Streaming not available; fallback to non-streaming call
@@ -124,44 +247,83 @@ def stream_responses(api_key: str | None, model: str, input_text: str, **kwargs)
         yield full
         return
 
+    # held until the stream ends; a stream that is never iterated never reserves
+    reservation = accounting.reserve(model, input_text, kwargs.get('max_output_tokens'))
+    breaker = breaker_for(model)
+    try:
+        breaker.before_call()
+    except BaseException:
+        accounting.release(reservation)
+        raise
     # If stream_ctx is a context manager, iterate inside a with-block.
     try:
-        with stream_ctx as stream:
-            for event in stream:
-                # Common streaming event patterns:
-                # - event.type == 'response.output_text.delta' and event.delta contains text
-                # - event.output_text may be present on final event
-                try:
-                    etype = getattr(event, 'type', None)
-                    if etype == 'response.output_text.delta':
-                        delta = getattr(event, 'delta', '')
-                        if delta is None:
-                            delta = ''
-                        yield str(delta)
-                        continue
-                except Exception:
-                    pass
-
-                # Some SDKs yield partial Response objects with output_text attribute
-                try:
-                    partial = getattr(event, 'output_text', None)
-                    if partial:
-                        yield str(partial)
-                        continue
-                except Exception:
-                    pass
-
-                # As a last resort, stringify the event
+        # the slot is held until the stream ends or the consumer closes it
+        with provider_slot(model):
+            t_req = time.perf_counter()
+            with stream_ctx as stream:
+                telemetry.observe('provider_connect', time.perf_counter() - t_req, start=t_req)
+                timer = telemetry.StreamTimer(model, t_req)
+                reported = False
                 try:
-                    s = str(event)
-                    if s:
-                        yield s
-                except Exception:
-                    continue
-    except Exception:
+                    for event in stream:
+                        # Common streaming event patterns:
+                        # - event.type == 'response.output_text.delta' and event.delta contains text
+                        # - event.output_text may be present on final event
+                        try:
+                            etype = getattr(event, 'type', None)
+                            if etype == 'response.completed':
+                                usage = getattr(getattr(event, 'response', None), 'usage', None)
+                                timer.usage(usage)
+                                tokens.calibrate(input_text, usage)
+                                reported = accounting.record(model, usage)
+                                continue
+                            if etype == 'response.output_text.delta':
+                                delta = getattr(event, 'delta', '')
+                                if delta is None:
+                                    delta = ''
+                                timer.chunk()
+                                yield str(delta)
+                                continue
+                        except Exception:
+                            pass
+
+                        # Some SDKs yield partial Response objects with output_text attribute
+                        try:
+                            partial = getattr(event, 'output_text', None)
+                            if partial:
+                                timer.chunk()
+                                yield str(partial)
+                                continue
+                        except Exception:
+                            pass
+
+                        # As a last resort, stringify the event
+                        try:
+                            s = str(event)
+                            if s:
+                                timer.chunk()
+                                yield s
+                        except Exception:
+                            continue
+                finally:
+                    timer.finish()
+                    if not reported and timer.chunks:
+                        # closed early or no usage event: deltas stand in for output tokens
+                        accounting.record_estimate(model, input_text, timer.chunks)
+    except GeneratorExit:
+        # closed early by the consumer after receiving output
+        accounting.release(reservation)
+        breaker.record_success()
+        raise
+    except Exception as e:
+        accounting.release(reservation)
+        breaker.record_failure(e)
         # If streaming failed mid-way, try to return a final non-streaming text
         try:
             final = call_responses(api_key, model, input_text)
             yield final
         except Exception:
             raise
+        return
+    accounting.release(reservation)
+    breaker.record_success()
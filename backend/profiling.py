@@ -0,0 +1,171 @@
+"""On-demand CPU and memory profiling for a live backend.
+
+`sample_stacks(seconds, hz)` is a statistical profiler: a background thread
+reads every other thread's stack `hz` times a second via
+`sys._current_frames()` and counts each distinct stack. The result is in the
+collapsed format used by flamegraph.pl and speedscope (`frame;frame;frame
+count`, one stack per line). No tracing hook is installed, so the threads
+being profiled do no extra work; at the default 100 Hz the sampler's cost is
+well under a few percent of one core. Only one profile runs at a time.
+
+`MemoryTracker` wraps tracemalloc. `start()` records a baseline snapshot;
+each `diff()` compares a new snapshot with the previous one and groups the
+change by module. The few-percent figure above is for the stack sampler
+only. tracemalloc's overhead is far larger: every allocation in every thread
+is traced while it is on, which commonly makes allocation-heavy code
+noticeably slower and uses extra memory per live block, and each snapshot
+walks the whole traced heap. It therefore only runs between `start()` and
+`stop()`, and main.py takes the snapshots on a worker thread so the event
+loop keeps serving live courtrooms meanwhile.
+
+main.py serves both under /debug/profile and /debug/memory/*, only for
+requests carrying the CEREBRAL_ADMIN_TOKEN.
+"""
+import collections
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+MAX_SECONDS = 60.0
+MAX_HZ = 1000.0
+
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+def _frame_name(code) -> str:
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f'{module}:{code.co_name}:{code.co_firstlineno}'
+
+
+def _collapse(frame) -> List[str]:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+def sample_stacks(seconds: float = 10.0, hz: float = 100.0) -> Dict[str, Any]:
+    """Sample all other threads for `seconds` at `hz`; returns collapsed stacks and the sampler's cost."""
+    seconds = min(max(seconds, 0.01), MAX_SECONDS)
+    hz = min(max(hz, 1.0), MAX_HZ)
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy('a profile is already running')
+    try:
+        counts: Dict[str, int] = collections.Counter()
+        names = {}
+        me = threading.get_ident()
+        interval = 1.0 / hz
+        samples = 0
+        busy = 0.0
+        start = time.perf_counter()
+        deadline = start + seconds
+        next_tick = start
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now < next_tick:
+                time.sleep(next_tick - now)
+                continue
+            next_tick += interval
+            if next_tick < now:
+                # we fell behind; skip missed ticks rather than sampling in a burst
+                next_tick = now + interval
+            t0 = time.perf_counter()
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = [names.get(ident, f'thread-{ident}')] + _collapse(frame)
+                counts[';'.join(stack)] += 1
+            samples += 1
+            busy += time.perf_counter() - t0
+        elapsed = time.perf_counter() - start
+    finally:
+        _profile_lock.release()
+    collapsed = '\n'.join(f'{stack} {n}' for stack, n in sorted(counts.items()))
+    return {'collapsed': collapsed + '\n' if collapsed else '', 'samples': samples, 'seconds': elapsed,
+            'hz': hz, 'sampler_cpu_fraction': busy / elapsed if elapsed else 0.0}
+
+
+def _module_of(filename: str) -> str:
+    """Dotted module name for a source file, relative to the first matching sys.path entry."""
+    path = os.path.abspath(filename)
+    best = None
+    for root in sys.path:
+        root = os.path.abspath(root or os.curdir)
+        if path.startswith(root + os.sep) and (best is None or len(root) > len(best)):
+            best = root
+    rel = os.path.relpath(path, best) if best else os.path.basename(path)
+    rel = os.path.splitext(rel)[0]
+    parts = [p for p in rel.split(os.sep) if p not in ('site-packages', 'dist-packages')]
+    if parts and parts[-1] == '__init__':
+        parts.pop()
+    return '.'.join(parts) or filename
+
+
+class MemoryTracker:
+    """tracemalloc snapshots, diffed against the previous snapshot and grouped by module."""
+
+    def __init__(self):
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._started_here = False
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1):
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+                self._started_here = True
+            self._previous = self._snapshot()
+
+    def stop(self):
+        with self._lock:
+            if self._started_here:
+                tracemalloc.stop()
+                self._started_here = False
+            self._previous = None
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+
+    def diff(self, top: int = 25) -> Dict[str, Any]:
+        """Per-module change in traced memory since the previous snapshot (or start)."""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                raise RuntimeError('tracemalloc is not running; start it first')
+            current = self._snapshot()
+            previous, self._previous = self._previous, current
+        by_module: Dict[str, Dict[str, int]] = {}
+        for stat in current.compare_to(previous, 'filename') if previous else current.statistics('filename'):
+            module = _module_of(stat.traceback[0].filename)
+            entry = by_module.setdefault(module, {'size': 0, 'size_diff': 0, 'count': 0, 'count_diff': 0})
+            entry['size'] += stat.size
+            entry['count'] += stat.count
+            entry['size_diff'] += getattr(stat, 'size_diff', stat.size)
+            entry['count_diff'] += getattr(stat, 'count_diff', stat.count)
+        ranked = sorted(by_module.items(), key=lambda kv: abs(kv[1]['size_diff']), reverse=True)[:top]
+        traced, peak = tracemalloc.get_traced_memory()
+        return {'traced_bytes': traced, 'peak_bytes': peak,
+                'modules': [{'module': m, **v} for m, v in ranked]}
+
+
+memory = MemoryTracker()
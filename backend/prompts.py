@@ -26,3 +26,42 @@ Facts:
 Transcript:
 {transcript}
 """
+
+
+# Personas used by the multi-juror ensemble. Each juror sees the same facts and
+# transcript; the persona only shifts what they weigh most heavily.
+JUROR_PERSONAS = [
+    "a retired schoolteacher who weighs witness credibility carefully",
+    "an engineer who trusts physical evidence and timelines over testimony",
+    "a small-business owner who is sceptical of unsupported claims",
+    "a nurse who pays close attention to motive and state of mind",
+    "a university student who insists on proof beyond reasonable doubt",
+    "a former police dispatcher familiar with how incidents are reported",
+    "a librarian who looks for gaps and inconsistencies in the record",
+]
+
+JUROR_PERSONA_PREFIX = """
+You are juror #{index} on a panel, {persona}. Reach your own verdict independently.
+"""
+
+
+# Structured-output variants. The provider is asked to honour a JSON schema
+# (see backend/structured.py); the wording keeps models without schema support
+# on the same format.
+JUDGE_JSON_PROMPT = """
+You are the Judge. Keep rulings short and base them only on the pinned case facts and the transcript.
+Respond with ONLY a JSON object of the form:
+{"ruling": "SUSTAINED" or "OVERRULED", "reason": "<one-sentence reason>"}
+"""
+
+JURY_JSON_PROMPT = """
+You are the Jury. Based only on the pinned facts and the transcript, decide a verdict and a confidence percentage.
+Respond with ONLY a JSON object of the form:
+{{"verdict": "Guilty" or "Not Guilty" or "No Verdict", "confidence": <integer 0-100>}}
+
+Facts:
+{facts}
+
+Transcript:
+{transcript}
+"""
@@ -0,0 +1,130 @@
+"""Relevant-fact retrieval for prompts over large case files.
+
+`FactIndex(facts)` splits the pinned facts into chunks of about
+`CHUNK_TOKENS` tokens (paragraphs, split at sentence ends when a paragraph is
+too long) and builds a BM25 index over them. The per-posting BM25 weights are
+computed when the index is built, so a query is a handful of NumPy
+scatter-adds. `select(query, budget, k)` returns the top-`k` chunks for the
+query that fit in `budget` tokens, in their original order, with `[...]`
+between chunks that were not adjacent. Facts that already fit the budget are
+returned unchanged.
+
+AgentManager builds one index per distinct facts text (cached in the fact
+store, see fact_store.py) and queries it with the current argument and the
+recent transcript.
+
+    CEREBRAL_FACT_BUDGET=1500   facts token budget per prompt (0 sends the full facts)
+    CEREBRAL_FACT_TOP_K=8
+"""
+import re
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .tokens import count as count_tokens
+
+CHUNK_TOKENS = 120
+# facts budget for sources that can never be sent whole (see evidence.py) when none is configured
+DEFAULT_BUDGET = 1500
+GAP = '[...]'
+
+_WORD = re.compile(r'[a-z0-9]+')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def _terms(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def chunk_facts(text: str, chunk_tokens: int = CHUNK_TOKENS) -> List[str]:
+    """Paragraphs, packed or split at sentence ends so each chunk stays near `chunk_tokens`."""
+    chunks = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if count_tokens(paragraph) <= chunk_tokens:
+            chunks.append(paragraph)
+            continue
+        current, used = '', 0
+        for sentence in _SENTENCE_END.split(paragraph):
+            n = count_tokens(sentence)
+            if current and used + n > chunk_tokens:
+                chunks.append(current)
+                current, used = sentence, n
+            else:
+                current = f'{current} {sentence}' if current else sentence
+                used += n
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+class FactIndex:
+    """BM25 over the chunks of one facts text."""
+
+    def __init__(self, facts: str, chunk_tokens: int = CHUNK_TOKENS, k1: float = 1.2, b: float = 0.75):
+        self.facts = facts
+        self._build(chunk_facts(facts, chunk_tokens), k1, b)
+
+    def _build(self, chunks: Sequence[str], k1: float, b: float):
+        # `chunks` may be lazy (see evidence.Document): it is read once here, then only for selected chunks
+        self.chunks = chunks
+        n = len(chunks)
+        # token count per chunk, taken once here; selections are sized by summing them
+        self.tokens = np.zeros(n, dtype=np.int64)
+        counts: Dict[str, Dict[int, int]] = {}
+        lengths = np.zeros(n)
+        for i, chunk in enumerate(chunks):
+            self.tokens[i] = count_tokens(chunk)
+            terms = _terms(chunk)
+            lengths[i] = len(terms)
+            for term in terms:
+                postings = counts.setdefault(term, {})
+                postings[i] = postings.get(i, 0) + 1
+        self.total_tokens = int(self.tokens.sum())
+        norm = k1 * (1.0 - b + b * lengths / max(lengths.mean(), 1.0)) if n else lengths
+        # term -> (chunk ids, BM25 weight of the term in each chunk)
+        self.postings: Dict[str, tuple] = {}
+        for term, postings in counts.items():
+            ids = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            tf = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            idf = np.log1p((n - len(ids) + 0.5) / (len(ids) + 0.5))
+            self.postings[term] = (ids, idf * tf * (k1 + 1.0) / (tf + norm[ids]))
+
+    def full_text(self) -> str:
+        return self.facts
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.chunks))
+        for term in set(_terms(query)):
+            hit = self.postings.get(term)
+            if hit is not None:
+                np.add.at(scores, hit[0], hit[1])
+        return scores
+
+    def select(self, query: str, budget: int, k: int = 8) -> str:
+        """The facts to put in a prompt: all of them if they fit `budget` tokens, else the best chunks."""
+        if budget <= 0 or self.total_tokens <= budget:
+            return self.full_text()
+        scores = self.scores(query)
+        # best score first, earlier chunk first on ties; leading chunks if nothing matches at all
+        order = np.lexsort((np.arange(len(scores)), -scores))
+        if scores.any():
+            order = order[scores[order] > 0]
+        chosen, used = [], 0
+        for i in order:
+            if len(chosen) >= k:
+                break
+            if used + self.tokens[i] <= budget:
+                chosen.append(int(i))
+                used += int(self.tokens[i])
+        parts, last = [], -1
+        for i in sorted(chosen):
+            if i != last + 1:
+                parts.append(GAP)
+            parts.append(self.chunks[i])
+            last = i
+        if last != len(self.chunks) - 1:
+            parts.append(GAP)
+        return '\n'.join(parts)
@@ -0,0 +1,213 @@
+"""Latency-aware model routing per agent role.
+
+Each role (Opposing, Judge, Jury) has candidate models in preference order
+and a latency SLO. Every call goes to the first candidate whose live p90
+latency is within the SLO, whose error rate is low and whose replies keep
+passing the role's quality guard. If no candidate qualifies, the fastest
+healthy one is used. Every `explore_every`-th call goes to the least-sampled
+candidate, so the measurements stay current.
+
+The quality guard checks that a reply is still usable by the pipeline; for
+example, a Jury reply must parse with `utils.parse_jury_line` (or as the Jury
+JSON object). A reply that fails the guard, or a call that errors, on a
+non-default model is retried once on the role's default model.
+
+Only non-streaming agent calls (`AgentManager._call`) are routed. Streamed
+turns (`run_turn_sequence_stream`) and the jurors of the Jury ensemble
+(jury_ensemble.py) always call the role's default model, so the SLOs and
+quality guards here do not cover them: a streamed reply has already reached
+the client by the time the guard could reject it.
+
+    CEREBRAL_ROUTES=Jury=gpt-5-mini|gpt-5,Judge=gpt-5|gpt-5-mini
+    CEREBRAL_SLO_MS=Jury=1500,Judge=4000,Opposing=8000
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+from .utils import parse_jury_line
+
+DEFAULT_MODELS = {'Opposing': 'gpt-5-codex', 'Judge': 'gpt-5', 'Jury': 'gpt-5'}
+DEFAULT_SLO_MS = {'Opposing': 8000.0, 'Judge': 4000.0, 'Jury': 1500.0}
+
+_RULING_RE = re.compile(r"\b(SUSTAINED|OVERRULED)\b", re.IGNORECASE)
+
+
+def _jury_ok(text: str) -> bool:
+    if parse_jury_line(text) is not None:
+        return True
+    try:
+        obj = json.loads(text)
+    except ValueError:
+        return False
+    return isinstance(obj, dict) and 'verdict' in obj and 'confidence' in obj
+
+
+QUALITY_GUARDS: Dict[str, Callable[[str], bool]] = {
+    'Opposing': lambda text: bool(text.strip()),
+    'Judge': lambda text: _RULING_RE.search(text) is not None,
+    'Jury': _jury_ok,
+}
+
+
+class ModelStats:
+    """Rolling latency samples and error / quality-failure rates for one role on one model."""
+
+    def __init__(self, window: int = 100):
+        self.latency_ms: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[str] = deque(maxlen=window)   # 'ok', 'error', 'quality'
+        self.calls = 0
+
+    def record(self, outcome: str, latency_ms: Optional[float]):
+        self.calls += 1
+        self.outcomes.append(outcome)
+        if latency_ms is not None and outcome != 'error':
+            self.latency_ms.append(latency_ms)
+
+    def rate(self, outcome: str) -> float:
+        return sum(o == outcome for o in self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latency_ms:
+            return None
+        return float(np.percentile(np.fromiter(self.latency_ms, dtype=np.float64), q))
+
+    def summary(self) -> Dict[str, Any]:
+        return {'calls': self.calls, 'p50_ms': self.percentile(50), 'p90_ms': self.percentile(90),
+                'error_rate': self.rate('error'), 'quality_failure_rate': self.rate('quality')}
+
+
+def _parse_map(value: str) -> Dict[str, str]:
+    out = {}
+    for item in value.split(','):
+        name, sep, v = item.partition('=')
+        if sep and name.strip():
+            out[name.strip()] = v.strip()
+    return out
+
+
+class Router:
+    def __init__(self, routes: Dict[str, List[str]], slo_ms: Optional[Dict[str, float]] = None,
+                 min_samples: int = 10, explore_every: int = 20, max_error_rate: float = 0.2,
+                 max_quality_failure_rate: float = 0.1):
+        self.routes = {role: list(models) for role, models in routes.items()}
+        self.slo_ms = {**DEFAULT_SLO_MS, **(slo_ms or {})}
+        self.min_samples = min_samples
+        self.explore_every = explore_every
+        self.max_error_rate = max_error_rate
+        self.max_quality_failure_rate = max_quality_failure_rate
+        self.stats: Dict[str, Dict[str, ModelStats]] = {}
+        self.decisions: Deque[Dict[str, Any]] = deque(maxlen=200)
+        self._calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional['Router']:
+        routes = {role: [m for m in models.split('|') if m]
+                  for role, models in _parse_map(os.getenv('CEREBRAL_ROUTES', '')).items()}
+        if not routes:
+            return None
+        slo = {role: float(v) for role, v in _parse_map(os.getenv('CEREBRAL_SLO_MS', '')).items()}
+        return cls(routes, slo)
+
+    def _stats(self, role: str, model: str) -> ModelStats:
+        per_role = self.stats.setdefault(role, {})
+        s = per_role.get(model)
+        if s is None:
+            s = per_role[model] = ModelStats()
+        return s
+
+    def candidates(self, role: str, default: str) -> List[str]:
+        return self.routes.get(role) or [default]
+
+    def choose(self, role: str, default: str) -> Dict[str, Any]:
+        """Pick a model for `role`; returns {'model', 'reason'}."""
+        models = self.candidates(role, default)
+        with self._lock:
+            n = self._calls[role] = self._calls.get(role, 0) + 1
+            stats = [self._stats(role, m) for m in models]
+            unsampled = [m for m, s in zip(models, stats) if s.calls < self.min_samples]
+            if unsampled:
+                return {'model': unsampled[0], 'reason': 'warmup'}
+            if len(models) > 1 and n % self.explore_every == 0:
+                m = min(zip(models, stats), key=lambda ms: ms[1].calls)[0]
+                return {'model': m, 'reason': 'explore'}
+            slo = self.slo_ms.get(role)
+            healthy = [(m, s) for m, s in zip(models, stats)
+                       if s.rate('error') <= self.max_error_rate
+                       and s.rate('quality') <= self.max_quality_failure_rate]
+            for m, s in healthy:
+                p90 = s.percentile(90)
+                if slo is None or p90 is None or p90 <= slo:
+                    return {'model': m, 'reason': 'within_slo'}
+            if healthy:
+                m = min(healthy, key=lambda ms: ms[1].percentile(90) or float('inf'))[0]
+                return {'model': m, 'reason': 'fastest'}
+            return {'model': models[0], 'reason': 'all_unhealthy'}
+
+    def record(self, role: str, model: str, outcome: str, latency_ms: Optional[float]):
+        with self._lock:
+            self._stats(role, model).record(outcome, latency_ms)
+
+    def call(self, role: str, default: str, send: Callable[[str], str]) -> str:
+        """Route one call: `send(model)` performs it and returns the reply text."""
+        decision = self.choose(role, default)
+        model = decision['model']
+        guard = QUALITY_GUARDS.get(role, lambda text: True)
+        t0 = time.perf_counter()
+        try:
+            text = send(model)
+        except Exception:
+            self.record(role, model, 'error', None)
+            self._log(role, decision, None, 'error')
+            if model == default:
+                raise
+            return self._retry_default(role, default, send, guard)
+        latency = (time.perf_counter() - t0) * 1000.0
+        ok = guard(text)
+        self.record(role, model, 'ok' if ok else 'quality', latency)
+        self._log(role, decision, latency, 'ok' if ok else 'quality')
+        if ok or model == default:
+            return text
+        return self._retry_default(role, default, send, guard)
+
+    def _retry_default(self, role: str, default: str, send: Callable[[str], str], guard) -> str:
+        t0 = time.perf_counter()
+        try:
+            text = send(default)
+        except Exception:
+            self.record(role, default, 'error', None)
+            raise
+        latency = (time.perf_counter() - t0) * 1000.0
+        outcome = 'ok' if guard(text) else 'quality'
+        self.record(role, default, outcome, latency)
+        self._log(role, {'model': default, 'reason': 'guard_fallback'}, latency, outcome)
+        return text
+
+    def _log(self, role: str, decision: Dict[str, Any], latency_ms: Optional[float], outcome: str):
+        with self._lock:
+            self.decisions.append({'role': role, **decision, 'latency_ms': latency_ms, 'outcome': outcome,
+                                   'at': time.time()})
+
+    def report(self) -> Dict[str, Any]:
+        """Per-role model stats, recent decisions and the p50 latency saved against the default model."""
+        with self._lock:
+            roles = {}
+            for role, per_model in self.stats.items():
+                models = {m: s.summary() for m, s in per_model.items()}
+                entry: Dict[str, Any] = {'slo_ms': self.slo_ms.get(role), 'models': models}
+                default = DEFAULT_MODELS.get(role)
+                routed = [d['latency_ms'] for d in self.decisions
+                          if d['role'] == role and d['latency_ms'] is not None]
+                base = models.get(default, {}).get('p50_ms')
+                if routed and base is not None:
+                    entry['routed_p50_ms'] = float(np.percentile(routed, 50))
+                    entry['latency_saved_ms'] = base - entry['routed_p50_ms']
+                roles[role] = entry
+            return {'roles': roles, 'decisions': list(self.decisions)[-50:]}
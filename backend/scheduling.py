@@ -0,0 +1,241 @@
+"""Priority classes, token-bucket budgets and fair queuing for provider calls.
+
+Every provider call runs under a priority class and a tenant, taken from a
+context variable set with `call_class(...)`:
+
+    interactive   live courtroom turns (the default)
+    spectator     read-only streaming views
+    batch         bulk files and Monte Carlo simulations
+
+`FairQueue` decides which waiting call gets the next free slot of a model's
+concurrency window (see limiter.py). Classes are served in strict priority
+order, and each class may only fill a share of the window, so a full batch
+backlog always leaves headroom for interactive turns. Within a class, tenants
+are served by weighted fair queuing (start-time fair queuing on virtual finish
+tags), and calls are only admitted while the class and the tenant still have
+tokens in their request-rate buckets.
+
+Budgets are configured from the environment, in requests per second:
+
+    CEREBRAL_CLASS_RATES=batch=20,spectator=50
+    CEREBRAL_TENANT_RATES=acme=5,*=100       ('*' applies to every other tenant)
+    CEREBRAL_TENANT_WEIGHTS=acme=2
+    CEREBRAL_CLASS_SHARES=batch=0.75
+"""
+import contextvars
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+PRIORITIES = ('interactive', 'spectator', 'batch')
+DEFAULT_TENANT = 'default'
+DEFAULT_SHARES = {'interactive': 1.0, 'spectator': 0.9, 'batch': 0.75}
+
+_current: contextvars.ContextVar = contextvars.ContextVar('cerebral_call_class',
+                                                          default=('interactive', DEFAULT_TENANT))
+
+
+@contextmanager
+def call_class(priority: str, tenant: Optional[str] = None):
+    """Run provider calls made inside the block (in this context) under `priority` and `tenant`."""
+    if priority not in PRIORITIES:
+        raise ValueError(f'unknown priority class: {priority}')
+    token = _current.set((priority, tenant or DEFAULT_TENANT))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def current() -> Tuple[str, str]:
+    return _current.get()
+
+
+class TokenBucket:
+    """Request-rate bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.burst
+        self.stamp = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self.stamp:
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+
+    def ready(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= 1.0
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1.0
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+
+def _parse_map(value: str) -> Dict[str, float]:
+    out = {}
+    for item in value.split(','):
+        name, sep, v = item.partition('=')
+        if sep and name.strip():
+            out[name.strip()] = float(v)
+    return out
+
+
+class Budgets:
+    """Process-wide token buckets per class and per tenant, plus tenant weights and class shares."""
+
+    def __init__(self, class_rates: Optional[Dict[str, float]] = None,
+                 tenant_rates: Optional[Dict[str, float]] = None,
+                 weights: Optional[Dict[str, float]] = None,
+                 shares: Optional[Dict[str, float]] = None):
+        self.classes = {c: TokenBucket(r) for c, r in (class_rates or {}).items()}
+        self.tenant_rates = dict(tenant_rates or {})
+        self.tenants: Dict[str, TokenBucket] = {}
+        self.weights = dict(weights or {})
+        self.shares = {**DEFAULT_SHARES, **(shares or {})}
+        # buckets are shared by every model's queue, each of which holds its own lock
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'Budgets':
+        return cls(_parse_map(os.getenv('CEREBRAL_CLASS_RATES', '')),
+                   _parse_map(os.getenv('CEREBRAL_TENANT_RATES', '')),
+                   _parse_map(os.getenv('CEREBRAL_TENANT_WEIGHTS', '')),
+                   _parse_map(os.getenv('CEREBRAL_CLASS_SHARES', '')))
+
+    def tenant_bucket(self, tenant: str) -> Optional[TokenBucket]:
+        bucket = self.tenants.get(tenant)
+        if bucket is None:
+            rate = self.tenant_rates.get(tenant, self.tenant_rates.get('*'))
+            if rate is None:
+                return None
+            bucket = self.tenants[tenant] = TokenBucket(rate)
+        return bucket
+
+    def weight(self, tenant: str) -> float:
+        return self.weights.get(tenant, 1.0)
+
+
+class Waiter:
+    __slots__ = ('priority', 'tenant', 'start', 'tag', 'seq', 'granted')
+
+    def __init__(self, priority: str, tenant: str, start: float, tag: float, seq: int):
+        self.priority = priority
+        self.tenant = tenant
+        self.start = start
+        self.tag = tag
+        self.seq = seq
+        self.granted = False
+
+
+class FairQueue:
+    """Waiting calls of one model, grouped by class and ordered by virtual finish tag.
+
+    Not thread-safe on its own; the owning limiter calls it under its lock.
+    """
+
+    def __init__(self, budgets: 'Budgets'):
+        self.budgets = budgets
+        self._waiting: Dict[str, List[Waiter]] = {p: [] for p in PRIORITIES}
+        self._vtime = {p: 0.0 for p in PRIORITIES}
+        self._last_tag: Dict[Tuple[str, str], float] = {}
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return sum(len(w) for w in self._waiting.values())
+
+    def depth(self) -> Dict[str, int]:
+        return {p: len(w) for p, w in self._waiting.items()}
+
+    def push(self, priority: str, tenant: str) -> Waiter:
+        key = (priority, tenant)
+        start = max(self._vtime[priority], self._last_tag.get(key, 0.0))
+        tag = start + 1.0 / self.budgets.weight(tenant)
+        self._last_tag[key] = tag
+        w = Waiter(priority, tenant, start, tag, next(self._seq))
+        self._waiting[priority].append(w)
+        return w
+
+    def remove(self, w: Waiter):
+        try:
+            self._waiting[w.priority].remove(w)
+        except ValueError:
+            pass
+
+    def pop(self, inflight: Dict[str, int], limit: float, now: float) -> Optional[Waiter]:
+        """Grant the next eligible waiter, or return None if none may start now."""
+        with self.budgets.lock:
+            return self._pop(inflight, limit, now)
+
+    def _pop(self, inflight: Dict[str, int], limit: float, now: float) -> Optional[Waiter]:
+        for priority in PRIORITIES:
+            waiting = self._waiting[priority]
+            if not waiting:
+                continue
+            if inflight.get(priority, 0) >= max(1, int(limit * self.budgets.shares.get(priority, 1.0))):
+                continue
+            cbucket = self.budgets.classes.get(priority)
+            if cbucket is not None and not cbucket.ready(now):
+                continue
+            for w in sorted(waiting, key=lambda x: (x.tag, x.seq)):
+                tbucket = self.budgets.tenant_bucket(w.tenant)
+                if tbucket is not None and not tbucket.ready(now):
+                    continue
+                if cbucket is not None:
+                    cbucket.take(now)
+                if tbucket is not None:
+                    tbucket.take(now)
+                waiting.remove(w)
+                self._vtime[priority] = max(self._vtime[priority], w.start)
+                w.granted = True
+                return w
+        return None
+
+    def retry_after(self, now: float) -> Optional[float]:
+        """Seconds until a rate budget blocking a waiter refills, or None if none is blocking."""
+        with self.budgets.lock:
+            return self._retry_after(now)
+
+    def _retry_after(self, now: float) -> Optional[float]:
+        waits = []
+        for priority, waiting in self._waiting.items():
+            if not waiting:
+                continue
+            cbucket = self.budgets.classes.get(priority)
+            if cbucket is not None:
+                waits.append(cbucket.wait_time(now))
+            for w in waiting:
+                tbucket = self.budgets.tenant_bucket(w.tenant)
+                if tbucket is not None:
+                    waits.append(tbucket.wait_time(now))
+        waits = [t for t in waits if t > 0]
+        return min(waits) if waits else None
+
+
+_budgets: Optional[Budgets] = None
+_budgets_lock = threading.Lock()
+
+
+def budgets() -> Budgets:
+    """Process-wide budgets, read from the environment on first use."""
+    global _budgets
+    with _budgets_lock:
+        if _budgets is None:
+            _budgets = Budgets.from_env()
+        return _budgets
+
+
+def reset():
+    """Forget the budgets so they are re-read from the environment (tests and benchmarks)."""
+    global _budgets
+    with _budgets_lock:
+        _budgets = None
@@ -0,0 +1,171 @@
+"""Monte Carlo trial simulation: sample a verdict distribution for one case.
+
+Runs M independent trials of the same facts and arguments (each trial is a
+fresh session taken through every argument's Opposing -> Judge -> Jury turn)
+with bounded concurrency, and summarises the Jury verdicts with NumPy:
+verdict histogram, confidence quantiles and bootstrap confidence intervals.
+Sampling can stop early once the interval on the guilty rate is tight enough.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .agent_manager import AgentManager
+from .jury_ensemble import VERDICTS
+from .scheduling import call_class
+
+UNPARSED = 'Unparsed'
+CONFIDENCE_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class TrialFailed(Exception):
+    pass
+
+
+def run_trial(manager: AgentManager, facts: str, arguments: List[str], title: str = 'simulation') -> Dict[str, Any]:
+    """Run one trial in a throwaway session and return its final Jury outcome.
+
+    Agent failures come back from `run_turn_sequence` as '(error)' or
+    degraded replies; they raise TrialFailed so they are counted as errors,
+    not verdicts.
+    """
+    t0 = time.perf_counter()
+    sid = manager.create_session(title, facts)
+    try:
+        jury = {}
+        for arg in arguments:
+            manager.add_user_presentation(sid, arg)
+            results = manager.run_turn_sequence(sid, arg)
+            failed = [r['agent'] for r in results
+                      if r.get('degraded') or str(r.get('text', '')).startswith('(error)')]
+            if failed:
+                raise TrialFailed('agent error: ' + ', '.join(failed))
+            jury = results[-1]
+        return {
+            'verdict': jury.get('verdict') or UNPARSED,
+            'confidence': jury.get('confidence'),
+            'latency_ms': (time.perf_counter() - t0) * 1000.0,
+        }
+    finally:
+        manager.close_session(sid)
+
+
+def _run_batch_trial(tenant: Optional[str], *args) -> Dict[str, Any]:
+    # simulation trials are batch work: they queue behind live turns for provider slots
+    with call_class('batch', tenant):
+        return run_trial(*args)
+
+
+def summarize(trials: List[Dict[str, Any]], level: float = 0.95, bootstrap: int = 2000,
+              seed: Optional[int] = None) -> Dict[str, Any]:
+    """Verdict histogram, confidence quantiles and bootstrap CIs for a set of trials."""
+    n = len(trials)
+    labels = VERDICTS + (UNPARSED,)
+    index = {v.lower(): i for i, v in enumerate(labels)}
+    codes = np.fromiter((index.get(t['verdict'].lower(), len(labels) - 1) for t in trials),
+                        dtype=np.intp, count=n)
+    counts = np.bincount(codes, minlength=len(labels))
+    conf = np.array([t['confidence'] for t in trials if t.get('confidence') is not None], dtype=np.float64)
+
+    out: Dict[str, Any] = {
+        'trials': n,
+        'histogram': {labels[i]: int(c) for i, c in enumerate(counts)},
+        'proportions': {labels[i]: float(c / n) if n else 0.0 for i, c in enumerate(counts)},
+    }
+    if conf.size:
+        qs = np.quantile(conf, CONFIDENCE_QUANTILES)
+        edges = np.arange(0, 101, 10)
+        hist, _ = np.histogram(conf, bins=edges)
+        out['confidence'] = {
+            'mean': float(conf.mean()),
+            'quantiles': {f"p{int(q * 100)}": float(v) for q, v in zip(CONFIDENCE_QUANTILES, qs)},
+            'histogram': {f"{int(lo)}-{int(hi)}": int(c) for lo, hi, c in zip(edges[:-1], edges[1:], hist)},
+        }
+    if n:
+        rng = np.random.default_rng(seed)
+        alpha = (1.0 - level) / 2.0
+        # resample all trials at once: (bootstrap, n) index matrix
+        idx = rng.integers(0, n, size=(bootstrap, n))
+        guilty = (codes == 0).astype(np.float64)
+        rates = guilty[idx].mean(axis=1)
+        lo, hi = np.quantile(rates, (alpha, 1.0 - alpha))
+        out['guilty_rate_ci'] = {'level': level, 'estimate': float(guilty.mean()),
+                                 'low': float(lo), 'high': float(hi), 'width': float(hi - lo)}
+        if conf.size:
+            cidx = rng.integers(0, conf.size, size=(bootstrap, conf.size))
+            means = conf[cidx].mean(axis=1)
+            lo, hi = np.quantile(means, (alpha, 1.0 - alpha))
+            out['confidence_mean_ci'] = {'level': level, 'low': float(lo), 'high': float(hi),
+                                         'width': float(hi - lo)}
+    return out
+
+
+def run_simulation(facts: str, arguments: List[str], trials: int = 100, concurrency: int = 8,
+                   target_ci_width: Optional[float] = None, min_trials: int = 30,
+                   on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                   manager: Optional[AgentManager] = None, level: float = 0.95,
+                   bootstrap: int = 2000, seed: Optional[int] = None,
+                   stop_event: Optional[threading.Event] = None,
+                   tenant: Optional[str] = None) -> Dict[str, Any]:
+    """Run up to `trials` independent trials, at most `concurrency` at a time.
+
+    `on_progress` is called from the calling thread after every completed
+    trial. With `target_ci_width`, no new trials are started once at least
+    `min_trials` are done and the guilty-rate interval is narrower than that
+    width; trials already in flight still complete and are counted. Setting
+    `stop_event` (e.g. when the client goes away) stops launching trials the
+    same way. Provider calls run in the 'batch' priority class for `tenant`.
+    """
+    manager = manager or AgentManager()
+    concurrency = max(1, int(concurrency))
+    started = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    errors = 0
+    stopped_early = False
+    cancelled = False
+    launched = 0
+    # bootstrap is O(bootstrap * n), so only re-check the interval every few trials
+    check_every = max(1, concurrency)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='trial') as pool:
+        pending = set()
+        while launched < trials and len(pending) < concurrency:
+            pending.add(pool.submit(_run_batch_trial, tenant, manager, facts, arguments))
+            launched += 1
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    results.append(fut.result())
+                except Exception:
+                    errors += 1
+                if on_progress:
+                    on_progress({'completed': len(results), 'errors': errors, 'total': trials,
+                                 'elapsed_ms': (time.perf_counter() - started) * 1000.0})
+            if (target_ci_width and not stopped_early and len(results) >= min_trials
+                    and len(results) % check_every < len(done)):
+                ci = summarize(results, level=level, bootstrap=bootstrap, seed=seed)['guilty_rate_ci']
+                stopped_early = ci['width'] <= target_ci_width
+            cancelled = stop_event is not None and stop_event.is_set()
+            while not (stopped_early or cancelled) and launched < trials and len(pending) < concurrency:
+                pending.add(pool.submit(_run_batch_trial, tenant, manager, facts, arguments))
+                launched += 1
+
+    elapsed = time.perf_counter() - started
+    summary = summarize(results, level=level, bootstrap=bootstrap, seed=seed)
+    latencies = np.array([r['latency_ms'] for r in results], dtype=np.float64)
+    summary.update({
+        'errors': errors,
+        'stopped_early': stopped_early,
+        'cancelled': cancelled,
+        'elapsed_ms': elapsed * 1000.0,
+        'trials_per_sec': len(results) / elapsed if elapsed > 0 else 0.0,
+        'trial_latency_ms': {
+            'p50': float(np.percentile(latencies, 50)) if latencies.size else 0.0,
+            'p99': float(np.percentile(latencies, 99)) if latencies.size else 0.0,
+        },
+    })
+    return summary
@@ -0,0 +1,134 @@
+"""In-memory, precompressed serving of the demo frontend.
+
+Each file under frontend/ is read once, on first request, together with a
+gzip variant and, when the optional `brotli` package is installed, a brotli
+variant. Each variant has its own strong ETag. A request is answered with
+the best encoding its Accept-Encoding allows, and a matching If-None-Match
+gets a 304 with no body.
+
+    CEREBRAL_STATIC_MAX_AGE=86400   Cache-Control max-age in seconds
+    CEREBRAL_STATIC_RELOAD=1        re-read a file when it changes on disk (dev); sends no-cache
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from starlette.responses import Response
+
+from .utils import env_flag
+
+try:
+    import brotli  # type: ignore
+except Exception:
+    brotli = None
+
+FRONTEND_DIR = Path(__file__).resolve().parent.parent / 'frontend'
+
+# compressing something this small gains little and costs a header on every response
+MIN_COMPRESS_BYTES = 512
+
+
+class Asset:
+    """One file's bytes, its compressed variants and their ETags."""
+
+    def __init__(self, path: Path):
+        stat = path.stat()
+        self.path = path
+        self.stamp = (stat.st_mtime_ns, stat.st_size)
+        body = path.read_bytes()
+        self.content_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/'):
+            self.content_type += '; charset=utf-8'
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # encoding -> (body, etag); a strong ETag must differ between encodings
+        self.variants: Dict[str, tuple] = {'identity': (body, f'"{digest}"')}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.variants['gzip'] = (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gz"')
+            if brotli is not None:
+                self.variants['br'] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+
+    def changed(self) -> bool:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return True
+        return (stat.st_mtime_ns, stat.st_size) != self.stamp
+
+
+def _accepted(header: str) -> Dict[str, float]:
+    out = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        q = 1.0
+        for p in params.split(';'):
+            key, _, value = p.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            out[name.strip().lower()] = q
+    return out
+
+
+def choose_encoding(accept_encoding: str, available) -> str:
+    """Smallest acceptable variant: br, then gzip, then identity."""
+    accepted = _accepted(accept_encoding or '')
+    for encoding in ('br', 'gzip'):
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if encoding in available and q > 0:
+            return encoding
+    return 'identity'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == '*':
+        return True
+    # If-None-Match uses the weak comparison, so a W/ prefix still matches
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+
+class StaticAssets:
+    def __init__(self, root: Path = FRONTEND_DIR, max_age: Optional[int] = None, reload: Optional[bool] = None):
+        self.root = root.resolve()
+        self.max_age = int(os.getenv('CEREBRAL_STATIC_MAX_AGE', '86400')) if max_age is None else max_age
+        self.reload = env_flag('CEREBRAL_STATIC_RELOAD') if reload is None else reload
+        self._assets: Dict[str, Asset] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[Asset]:
+        asset = self._assets.get(name)
+        if asset is not None and not (self.reload and asset.changed()):
+            return asset
+        path = (self.root / name).resolve()
+        if not path.is_relative_to(self.root) or not path.is_file():
+            return None
+        with self._lock:
+            asset = self._assets[name] = Asset(path)
+        return asset
+
+    def response(self, name: str, headers) -> Optional[Response]:
+        """The response for `name` given the request headers, or None if there is no such file."""
+        asset = self.get(name)
+        if asset is None:
+            return None
+        encoding = choose_encoding(headers.get('accept-encoding', ''), asset.variants)
+        body, etag = asset.variants[encoding]
+        out = {
+            'ETag': etag,
+            'Vary': 'Accept-Encoding',
+            'Cache-Control': 'no-cache' if self.reload else f'public, max-age={self.max_age}',
+        }
+        if encoding != 'identity':
+            out['Content-Encoding'] = encoding
+        if _etag_matches(headers.get('if-none-match', ''), etag):
+            return Response(status_code=304, headers=out)
+        return Response(body, media_type=asset.content_type, headers=out)
+
+
+assets = StaticAssets()
@@ -0,0 +1,334 @@
+"""Structured (JSON-schema) output for the Judge and the Jury.
+
+The Judge returns {ruling, reason} and the Jury {verdict, confidence}. The
+schemas are sent to the provider as a `text.format` json_schema and the
+replies go through validators compiled once at import time. Replies that are
+not valid JSON fall back to a lenient parse (the SUSTAINED/OVERRULED label, or
+`utils.JURY_RE`), so a malformed reply degrades instead of losing the verdict.
+
+`JsonFieldStreamParser` reads a streamed JSON object and yields each
+top-level field as soon as its value is complete, before the stream ends.
+"""
+import json
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .utils import JURY_RE
+
+JUDGE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'ruling': {'type': 'string', 'enum': ['SUSTAINED', 'OVERRULED']},
+        'reason': {'type': 'string'},
+    },
+    'required': ['ruling', 'reason'],
+    'additionalProperties': False,
+}
+
+JURY_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'verdict': {'type': 'string', 'enum': ['Guilty', 'Not Guilty', 'No Verdict']},
+        'confidence': {'type': 'integer', 'minimum': 0, 'maximum': 100},
+    },
+    'required': ['verdict', 'confidence'],
+    'additionalProperties': False,
+}
+
+
+def text_format(name: str, schema: dict) -> dict:
+    """Responses API `text=` argument requesting strict schema-conforming output."""
+    return {'format': {'type': 'json_schema', 'name': name, 'schema': schema, 'strict': True}}
+
+
+def _compile_field(spec: dict) -> Callable[[Any], Tuple[bool, Any]]:
+    ftype = spec.get('type')
+    if ftype == 'string':
+        enum = spec.get('enum')
+        if enum:
+            canon = {e.lower(): e for e in enum}
+
+            def check_enum(v):
+                if isinstance(v, str):
+                    c = canon.get(v.strip().lower())
+                    if c is not None:
+                        return True, c
+                return False, None
+            return check_enum
+
+        def check_str(v):
+            return (True, v) if isinstance(v, str) else (False, None)
+        return check_str
+
+    if ftype == 'integer':
+        lo = spec.get('minimum')
+        hi = spec.get('maximum')
+
+        def check_int(v):
+            if isinstance(v, bool):
+                return False, None
+            if isinstance(v, float) and v.is_integer():
+                v = int(v)
+            if not isinstance(v, int):
+                return False, None
+            if (lo is not None and v < lo) or (hi is not None and v > hi):
+                return False, None
+            return True, v
+        return check_int
+
+    raise ValueError(f'unsupported schema type: {ftype}')
+
+
+class Validator:
+    """Validator for a flat object schema, compiled once.
+
+    Supports the subset the agent schemas use: string (optionally enum,
+    matched case-insensitively and canonicalised) and bounded integer fields.
+    """
+
+    def __init__(self, schema: dict):
+        self.schema = schema
+        self.fields = {name: _compile_field(spec) for name, spec in schema['properties'].items()}
+        self.required = frozenset(schema.get('required', ()))
+        self.allow_extra = schema.get('additionalProperties', True)
+
+    def field(self, name: str, value: Any) -> Tuple[bool, Any]:
+        check = self.fields.get(name)
+        if check is None:
+            return bool(self.allow_extra), value
+        return check(value)
+
+    def __call__(self, obj: Any) -> Tuple[Optional[dict], Optional[str]]:
+        """Return (normalised object, None) or (None, error message)."""
+        if not isinstance(obj, dict):
+            return None, 'not an object'
+        missing = self.required.difference(obj)
+        if missing:
+            return None, 'missing ' + ', '.join(sorted(missing))
+        out = {}
+        for k, v in obj.items():
+            ok, norm = self.field(k, v)
+            if not ok:
+                return None, f'invalid {k}'
+            out[k] = norm
+        return out, None
+
+
+JUDGE_VALIDATOR = Validator(JUDGE_SCHEMA)
+JURY_VALIDATOR = Validator(JURY_SCHEMA)
+
+_RULING_RE = re.compile(r"\b(SUSTAINED|OVERRULED)\b\s*[-:–—.]?\s*(.*)", re.IGNORECASE | re.DOTALL)
+
+# parse outcomes per agent: 'json' (schema-valid), 'lenient' (fallback), 'failed'
+PARSE_STATS: Dict[str, Dict[str, int]] = {
+    'Judge': {'json': 0, 'lenient': 0, 'failed': 0},
+    'Jury': {'json': 0, 'lenient': 0, 'failed': 0},
+}
+_stats_lock = threading.Lock()
+
+
+def _count(agent: str, outcome: str):
+    with _stats_lock:
+        PARSE_STATS[agent][outcome] += 1
+
+
+def _load_object(text: str) -> Any:
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    # tolerate code fences or chatter around the object
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end <= start:
+        return None
+    try:
+        return json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+
+
+def parse_judge(text: str) -> Tuple[Optional[dict], str]:
+    """Parse a Judge reply into {ruling, reason}. Returns (fields, outcome)."""
+    fields, _ = JUDGE_VALIDATOR(_load_object(text or ''))
+    if fields:
+        _count('Judge', 'json')
+        return fields, 'json'
+    m = _RULING_RE.search(text or '')
+    if m:
+        _count('Judge', 'lenient')
+        return {'ruling': m.group(1).upper(), 'reason': m.group(2).strip()}, 'lenient'
+    _count('Judge', 'failed')
+    return None, 'failed'
+
+
+def parse_jury(text: str) -> Tuple[Optional[dict], str]:
+    """Parse a Jury reply into {verdict, confidence}. Returns (fields, outcome)."""
+    fields, _ = JURY_VALIDATOR(_load_object(text or ''))
+    if fields:
+        _count('Jury', 'json')
+        return fields, 'json'
+    m = JURY_RE.search(text or '')
+    if m:
+        ok, verdict = JURY_VALIDATOR.field('verdict', m.group(1))
+        if ok:
+            _count('Jury', 'lenient')
+            return {'verdict': verdict, 'confidence': int(m.group(2))}, 'lenient'
+    _count('Jury', 'failed')
+    return None, 'failed'
+
+
+def render_judge(fields: dict) -> str:
+    """Transcript form of a structured ruling, matching the free-text convention."""
+    return f"{fields['ruling']} - {fields['reason']}"
+
+
+def render_jury(fields: dict) -> str:
+    return f"Verdict: {fields['verdict']}; Confidence: {fields['confidence']}%"
+
+
+_WS = ' \t\r\n'
+
+
+class JsonFieldStreamParser:
+    """Incrementally parse a streamed JSON object, field by field.
+
+    `feed(delta)` returns the (name, value) pairs of top-level fields whose
+    values completed within that delta. Each character is scanned once; text
+    before the opening brace (e.g. a code fence) is skipped. With a
+    `validator`, values are checked and normalised as they complete, and
+    invalid ones are dropped.
+    """
+
+    def __init__(self, validator: Optional[Validator] = None):
+        self.validator = validator
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._buf = ''
+        self._pos = 0
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._state = 'start'   # start -> key -> colon -> value -> after -> key ...
+        self._start = -1
+        self._key: Optional[str] = None
+
+    def _emit(self, raw: str, out: List[Tuple[str, Any]]):
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        if self.validator is not None:
+            ok, value = self.validator.field(self._key, value)
+            if not ok:
+                return
+        self.fields[self._key] = value
+        out.append((self._key, value))
+
+    def feed(self, delta: str) -> List[Tuple[str, Any]]:
+        out: List[Tuple[str, Any]] = []
+        if self.done or not delta:
+            return out
+        self._buf += delta
+        buf = self._buf
+        i = self._pos
+        n = len(buf)
+        while i < n and not self.done:
+            c = buf[i]
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif c == '\\':
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+                    if self._depth == 1:
+                        if self._state == 'key':
+                            self._key = json.loads(buf[self._start:i + 1])
+                            self._state = 'colon'
+                        elif self._state == 'value':
+                            self._emit(buf[self._start:i + 1], out)
+                            self._state = 'after'
+                i += 1
+                continue
+
+            state = self._state
+            if state == 'start':
+                if c == '{':
+                    self._depth = 1
+                    self._state = 'key'
+            elif self._depth > 1:
+                # inside a nested value: only track brackets and strings
+                if c == '"':
+                    self._in_str = True
+                elif c in '{[':
+                    self._depth += 1
+                elif c in '}]':
+                    self._depth -= 1
+                    if self._depth == 1:
+                        self._emit(buf[self._start:i + 1], out)
+                        self._state = 'after'
+            elif state == 'key':
+                if c == '"':
+                    self._in_str = True
+                    self._start = i
+                elif c == '}':
+                    self.done = True
+            elif state == 'colon':
+                if c == ':':
+                    self._state = 'value'
+                    self._start = -1
+            elif state == 'value':
+                if self._start == -1:
+                    if c not in _WS:
+                        self._start = i
+                        if c == '"':
+                            self._in_str = True
+                        elif c in '{[':
+                            self._depth += 1
+                elif c == ',' or c == '}' or c in _WS:
+                    # end of a scalar (number, true, false, null)
+                    self._emit(buf[self._start:i], out)
+                    self._state = 'after'
+                    continue   # re-examine the terminator in the 'after' state
+            elif state == 'after':
+                if c == ',':
+                    self._state = 'key'
+                elif c == '}':
+                    self.done = True
+            i += 1
+        self._pos = i
+        return out
+
+    def complete(self) -> bool:
+        """True once every required field of the validator's schema has arrived."""
+        if self.validator is None:
+            return self.done
+        return self.validator.required.issubset(self.fields)
+
+
+class JuryFieldStreamParser(JsonFieldStreamParser):
+    """Jury-schema field parser with the same interface as `utils.JuryStreamParser`.
+
+    `feed` returns (verdict, confidence) once both fields have arrived;
+    `new_fields` holds the fields completed by the last delta.
+    """
+
+    def __init__(self):
+        super().__init__(JURY_VALIDATOR)
+        self.result: Optional[Tuple[str, int]] = None
+        self.new_fields: List[Tuple[str, Any]] = []
+
+    def feed(self, delta: str) -> Optional[Tuple[str, int]]:
+        self.new_fields = super().feed(delta)
+        if self.result is None and self.complete():
+            self.result = (self.fields['verdict'], self.fields['confidence'])
+        return self.result
+
+    @property
+    def text(self) -> str:
+        """Canonical JSON once matched (the stream may stop before the closing brace)."""
+        if self.result is not None:
+            return json.dumps({'verdict': self.result[0], 'confidence': self.result[1]})
+        return self._buf
@@ -0,0 +1,215 @@
+"""Per-turn latency spans and Prometheus-format histograms.
+
+A turn is split into phases per agent:
+
+    queue_wait        waiting for a provider slot (limiter.py)
+    prompt_render     building the prompt
+    provider_connect  opening the provider stream
+    ttft              request start to first output token (whole call when not streaming)
+    stream            first token to last token
+    parse             turning the reply into transcript text and fields
+    send              delivering messages to the client
+    gap               end of one agent to the start of the next within a turn
+
+plus `output_tokens_per_second` per agent and model, and whole-turn time.
+Code inside a turn calls `span(phase)` / `observe(phase, seconds)`; the agent
+label comes from `agent_context(agent)`, a context variable, so provider code
+in openai_helper and limiter needs no extra arguments.
+
+Each finished turn's spans are logged as one JSON line on the
+`cerebral.trace` logger at DEBUG. `render()` produces the `/metrics` text.
+Every observation, each agent's total time and each turn's time also go to
+the windowed percentile histograms in latency.py.
+"""
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from . import latency
+
+PHASES = ('queue_wait', 'prompt_render', 'provider_connect', 'ttft', 'stream', 'parse', 'send', 'gap')
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RATE_BUCKETS = (1, 5, 10, 20, 40, 80, 160, 320)
+
+trace_logger = logging.getLogger('cerebral.trace')
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # per-bucket counts, then +Inf count, then sum
+                series = self._series[label_values] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def count(self, *label_values: str) -> int:
+        with self._lock:
+            series = self._series.get(label_values)
+            return int(series[-2]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted(self._series.items())
+        for values, series in items:
+            base = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, values))
+            sep = ',' if base else ''
+            for bound, c in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {int(c)}')
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {int(series[-2])}')
+            lines.append(f'{self.name}_count{{{base}}} {int(series[-2])}')
+            lines.append(f'{self.name}_sum{{{base}}} {series[-1]}')
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+PHASE_SECONDS = Histogram('cerebral_agent_phase_seconds', 'Time spent per agent and turn phase.',
+                          ('agent', 'phase'), LATENCY_BUCKETS)
+TOKENS_PER_SECOND = Histogram('cerebral_output_tokens_per_second', 'Provider output tokens per second.',
+                              ('agent', 'model'), RATE_BUCKETS)
+TURN_SECONDS = Histogram('cerebral_turn_seconds', 'Wall time of a whole Opposing -> Judge -> Jury turn.',
+                         ('mode',), LATENCY_BUCKETS)
+_METRICS = (PHASE_SECONDS, TOKENS_PER_SECOND, TURN_SECONDS)
+
+
+class TurnTrace:
+    """Spans of one turn: (agent, phase, start offset s, duration s)."""
+
+    def __init__(self, session_id: str, mode: str):
+        self.session_id = session_id
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.spans: List[Tuple[str, str, float, float]] = []
+        self._last_agent_end: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, agent: str, phase: str, start: float, seconds: float):
+        with self._lock:
+            self.spans.append((agent, phase, round(start - self.started, 6), round(seconds, 6)))
+
+
+_agent: contextvars.ContextVar = contextvars.ContextVar('cerebral_agent', default='')
+_trace: contextvars.ContextVar = contextvars.ContextVar('cerebral_trace', default=None)
+
+
+def current_agent() -> str:
+    return _agent.get()
+
+
+def observe(phase: str, seconds: float, agent: Optional[str] = None, start: Optional[float] = None):
+    agent = agent if agent is not None else _agent.get() or 'none'
+    PHASE_SECONDS.observe(seconds, agent, phase)
+    latency.record(phase, seconds * 1000.0, agent)
+    trace = _trace.get()
+    if trace is not None:
+        trace.add(agent, phase, start if start is not None else time.perf_counter() - seconds, seconds)
+
+
+def observe_tokens(model: str, output_tokens: float, seconds: float):
+    if output_tokens and seconds > 0:
+        TOKENS_PER_SECOND.observe(output_tokens / seconds, _agent.get() or 'none', model)
+
+
+class StreamTimer:
+    """Records ttft, stream duration and tokens/sec for one provider stream."""
+
+    def __init__(self, model: str, started: float):
+        self.model = model
+        self.started = started
+        self.first: Optional[float] = None
+        self.chunks = 0
+        self.output_tokens: Optional[int] = None
+
+    def chunk(self):
+        if self.first is None:
+            self.first = time.perf_counter()
+            observe('ttft', self.first - self.started, start=self.started)
+        self.chunks += 1
+
+    def usage(self, usage):
+        tokens = getattr(usage, 'output_tokens', None)
+        if tokens:
+            self.output_tokens = tokens
+
+    def finish(self):
+        if self.first is None:
+            return
+        seconds = time.perf_counter() - self.first
+        observe('stream', seconds, start=self.first)
+        # without a usage event, deltas are the closest stand-in for tokens
+        observe_tokens(self.model, self.output_tokens or self.chunks, seconds)
+
+
+@contextmanager
+def span(phase: str, agent: Optional[str] = None):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(phase, time.perf_counter() - t0, agent, t0)
+
+
+@contextmanager
+def agent_context(agent: str):
+    """Label provider work in the block with `agent`, and record the gap since the previous agent."""
+    trace = _trace.get()
+    now = time.perf_counter()
+    if trace is not None and trace._last_agent_end is not None:
+        observe('gap', now - trace._last_agent_end, agent, trace._last_agent_end)
+    token = _agent.set(agent)
+    try:
+        yield
+    finally:
+        _agent.reset(token)
+        end = time.perf_counter()
+        latency.record('agent', (end - now) * 1000.0, agent)
+        if trace is not None:
+            trace._last_agent_end = end
+
+
+@contextmanager
+def turn(session_id: str, mode: str):
+    """Collect the spans of one turn; logs them and records the turn time on exit."""
+    trace = TurnTrace(session_id, mode)
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+        seconds = time.perf_counter() - trace.started
+        TURN_SECONDS.observe(seconds, mode)
+        latency.record(f'turn.{mode}', seconds * 1000.0)
+        if trace_logger.isEnabledFor(logging.DEBUG):
+            trace_logger.debug(json.dumps({'session': session_id, 'mode': mode, 'seconds': round(seconds, 6),
+                                           'spans': trace.spans}))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
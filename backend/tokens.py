@@ -0,0 +1,173 @@
+"""Local token counts for prompt budgets, transcript windowing and cost estimates.
+
+`count(text)` uses tiktoken's o200k_base encoding when the optional
+`tiktoken` package is installed and the encoding loads. Otherwise it uses a
+fast approximation. The text is split roughly the way BPE pre-tokenizers
+split it: letter runs, digit groups of up to three, punctuation runs,
+newline runs and non-ASCII characters. Each piece costs one token, and long
+words cost one more per twelve letters. Both passes are C-level regex scans
+(about 0.1 s per megabyte of text).
+
+The approximation is calibrated at run time. Every provider response reports
+its real input token count, and `calibrate(prompt, usage)` keeps a moving
+ratio of reported to estimated counts. That ratio scales later estimates.
+Measuring a prompt is a full regex scan, so only the first calls and then one
+call in sixteen are measured; the ratio moves slowly and needs no more.
+
+Counts are cached wherever text is reused: per transcript entry
+(transcript.py), per fact text (fact_store.py) and per fact chunk
+(retrieval.py). The size of a full prompt is then a sum of a few cached
+numbers. AgentManager returns its prompts as `Sized` strings carrying that
+sum, and `count` answers from it instead of scanning the text again.
+
+`estimate_cost(model, input_tokens, output_tokens)` prices a call from
+`PRICES`, in USD per million tokens; `worst_case_cost` prices a model
+without a price at the dearest configured one. Override the table with
+CEREBRAL_PRICES=gpt-5=1.25/10,gpt-5-mini=0.25/2 (input/output). The
+override is read once; `reset()` reads it again.
+"""
+import logging
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+try:
+    import tiktoken  # type: ignore
+except Exception:
+    tiktoken = None
+
+logger = logging.getLogger('cerebral')
+
+ENCODING = 'o200k_base'
+
+# USD per million (input, output) tokens
+PRICES: Dict[str, Tuple[float, float]] = {
+    'gpt-5': (1.25, 10.0),
+    'gpt-5-codex': (1.25, 10.0),
+    'gpt-5-mini': (0.25, 2.0),
+}
+
+_PIECES = re.compile(r'[A-Za-z]+|[0-9]{1,3}|[^\sA-Za-z0-9\x80-\U0010ffff]+|\n+|[^\x00-\x7f]')
+_LONG_WORD = re.compile(r'[A-Za-z]{12,}')
+
+# calibration: moving ratio of provider-reported to estimated input tokens
+_ALPHA = 0.05
+_MIN_SAMPLE = 50
+# calibration samples: every call until _WARMUP were taken, then one in _SAMPLE_EVERY
+_WARMUP = 32
+_SAMPLE_EVERY = 16
+_scale = 1.0
+_calls = 0
+_samples = 0
+_price_table: Optional[Dict[str, Tuple[float, float]]] = None
+_lock = threading.Lock()
+_encoder = None
+_encoder_loaded = False
+
+
+def _get_encoder():
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        if tiktoken is not None:
+            try:
+                _encoder = tiktoken.get_encoding(ENCODING)
+            except Exception as e:
+                logger.warning('tiktoken %s unavailable, using the approximate token counter: %s', ENCODING, e)
+    return _encoder
+
+
+def approximate(text: str) -> int:
+    """Uncalibrated estimate from the pre-tokenizer split (see module docstring)."""
+    pieces = len(_PIECES.findall(text))
+    return pieces + sum(len(w) // 12 for w in _LONG_WORD.findall(text))
+
+
+class Sized(str):
+    """Prompt text that carries its token count, summed from cached counts by whoever built it."""
+
+    def __new__(cls, text: str, tokens: int):
+        self = super().__new__(cls, text)
+        self.tokens = tokens
+        return self
+
+
+def count(text: str) -> int:
+    if not text:
+        return 0
+    if isinstance(text, Sized):
+        return text.tokens
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return max(1, round(approximate(text) * _scale))
+
+
+def exact() -> bool:
+    return _get_encoder() is not None
+
+
+def scale() -> float:
+    return _scale
+
+
+def calibrate(prompt: str, usage) -> None:
+    """Fold one provider-reported input token count into the approximation's scale."""
+    global _scale, _calls, _samples
+    reported = getattr(usage, 'input_tokens', None)
+    if not reported or exact():
+        return
+    with _lock:
+        _calls += 1
+        if _samples >= _WARMUP and _calls % _SAMPLE_EVERY:
+            return
+    estimate = approximate(prompt)
+    if estimate < _MIN_SAMPLE:
+        return
+    with _lock:
+        _samples += 1
+        ratio = min(2.0, max(0.5, reported / estimate))
+        _scale += _ALPHA * (ratio - _scale)
+
+
+def reset():
+    global _scale, _calls, _samples, _price_table
+    _scale = 1.0
+    _calls = _samples = 0
+    _price_table = None
+
+
+def _prices() -> Dict[str, Tuple[float, float]]:
+    global _price_table
+    if _price_table is None:
+        _price_table = _parse_prices()
+    return _price_table
+
+
+def _parse_prices() -> Dict[str, Tuple[float, float]]:
+    prices = dict(PRICES)
+    for item in os.getenv('CEREBRAL_PRICES', '').split(','):
+        model, _, value = item.partition('=')
+        inp, _, out = value.partition('/')
+        try:
+            prices[model.strip()] = (float(inp), float(out))
+        except ValueError:
+            continue
+    return prices
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int = 0) -> Optional[float]:
+    """USD for one call, or None for a model without a price."""
+    price = _prices().get(model)
+    if price is None:
+        return None
+    return (input_tokens * price[0] + output_tokens * price[1]) / 1e6
+
+
+def worst_case_cost(model: str, input_tokens: int, output_tokens: int = 0) -> float:
+    """USD for one call; a model without a price is priced at the dearest configured one."""
+    cost = estimate_cost(model, input_tokens, output_tokens)
+    if cost is not None:
+        return cost
+    return max((input_tokens * inp + output_tokens * out) / 1e6 for inp, out in _prices().values())
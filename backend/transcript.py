@@ -0,0 +1,202 @@
+"""Session transcripts that forks share instead of copying.
+
+A `Transcript` is an append-only sequence of (speaker, text) entries. It
+behaves like the list it replaces (append, len, iteration, indexing,
+equality). `fork(n)` returns a new transcript whose first `n` entries are
+this one's. They are not copied: the fork keeps a reference to its parent and
+the prefix length, and only stores entries appended after the fork. Later
+appends to the parent do not show up in the fork, and the reverse holds too,
+so branches can run turns concurrently. `del t[n:]` truncates, but raises
+ValueError while a live fork still shares an entry it would remove. Each
+entry's rendered
+"Speaker: text" line is built once when the entry is appended, and every
+fork reuses the parent's lines when building its prompt.
+
+Each entry's token count (tokens.py) is taken once, the first time a count
+is asked for after it was appended, and kept as a running total.
+`tokens()` is then O(1), and `window_start(budget)` finds the oldest entry
+a token budget can still reach by binary search.
+"""
+import weakref
+from itertools import chain, islice
+from typing import Iterator, List, Optional, Tuple
+
+from . import tokens as token_counter
+
+Entry = Tuple[str, str]
+
+
+class Transcript:
+    __slots__ = ('_parent', '_base', '_base_tokens', '_entries', '_lines', '_cum_tokens', '_forks', '__weakref__')
+
+    def __init__(self, entries=(), parent: Optional['Transcript'] = None, base: int = 0):
+        # the first `base` entries are the parent's; _entries holds the rest
+        self._parent = parent
+        self._base = base
+        # tokens of the parent's first `base` entries, counted on first use
+        self._base_tokens: Optional[int] = None if parent is not None else 0
+        self._entries: List[Entry] = []
+        self._lines: List[str] = []
+        # running token total of own entries, each counted with its joining newline
+        self._cum_tokens: List[int] = []
+        # weak references to transcripts forked from this one's own entries, so closed sessions drop out
+        self._forks: Optional[List[weakref.ref]] = None
+        if parent is not None:
+            parent._adopt(self)
+        for entry in entries:
+            self.append(entry)
+
+    def append(self, entry: Entry):
+        speaker, text = entry
+        self._entries.append((speaker, text))
+        self._lines.append(f"{speaker}: {text}")
+
+    def __len__(self) -> int:
+        return self._base + len(self._entries)
+
+    def _segments(self):
+        """(node, own entries used) from the root transcript down to this one."""
+        segments = []
+        node, count = self, len(self._entries)
+        while node is not None:
+            segments.append((node, count))
+            if node._parent is None:
+                break
+            count = node._base - node._parent._base
+            node = node._parent
+        return reversed(segments)
+
+    def __iter__(self) -> Iterator[Entry]:
+        return chain.from_iterable(islice(node._entries, count) for node, count in self._segments())
+
+    def __getitem__(self, index: int) -> Entry:
+        if isinstance(index, slice):
+            return list(self)[index]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError('transcript index out of range')
+        node = self
+        while index < node._base:
+            node = node._parent
+        return node._entries[index - node._base]
+
+    def __delitem__(self, index):
+        # only tail truncation (`del t[n:]`) fits an append-only structure
+        if not (isinstance(index, slice) and index.stop is None and index.step is None):
+            raise TypeError('only `del transcript[n:]` is supported')
+        n = min(index.start or 0, len(self))
+        if self._forks:
+            shared = max((f._base for f in self._live_forks()), default=0)
+            if shared > n:
+                raise ValueError(f'cannot truncate to {n} entries: a fork still shares the first {shared}')
+        if n >= self._base:
+            del self._entries[n - self._base:]
+            del self._lines[n - self._base:]
+            del self._cum_tokens[n - self._base:]
+            return
+        anchor = self._anchor(n)
+        self._base_tokens = None if anchor is not None else 0
+        self._parent, self._base = anchor, (n if anchor is not None else 0)
+        if anchor is not None:
+            anchor._adopt(self)
+        self._entries.clear()
+        self._lines.clear()
+        self._cum_tokens.clear()
+
+    def __eq__(self, other) -> bool:
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'Transcript({list(self)!r})'
+
+    def _live_forks(self) -> List['Transcript']:
+        # a fork truncated below its base re-anchors to an ancestor, so it no longer counts here
+        forks = [f for f in (ref() for ref in self._forks or ()) if f is not None and f._parent is self]
+        self._forks = [weakref.ref(f) for f in forks]
+        return forks
+
+    def _adopt(self, fork: 'Transcript'):
+        if self._forks is None:
+            self._forks = []
+        elif len(self._forks) >= 64 and not len(self._forks) & (len(self._forks) - 1):
+            # prune dead references at powers of two, so adopting stays amortized O(1)
+            self._live_forks()
+        self._forks.append(weakref.ref(fork))
+
+    def _anchor(self, n: int) -> Optional['Transcript']:
+        """The nearest transcript on this chain that holds entry n-1 as one of its own."""
+        node = self
+        while node is not None and n <= node._base:
+            node = node._parent
+        return node if n > 0 else None
+
+    def fork(self, n: Optional[int] = None) -> 'Transcript':
+        """A new transcript sharing this one's first `n` entries (all of them by default)."""
+        n = len(self) if n is None else max(0, min(n, len(self)))
+        anchor = self._anchor(n)
+        return Transcript(parent=anchor, base=n if anchor is not None else 0)
+
+    def turn_start(self, turn: int) -> int:
+        """Entries before the `turn`-th user presentation (0-based), i.e. the first `turn` turns."""
+        seen = 0
+        for i, (speaker, _) in enumerate(self):
+            if speaker == 'User':
+                if seen == turn:
+                    return i
+                seen += 1
+        return len(self)
+
+    def text(self, start: int = 0) -> str:
+        """The transcript from entry `start` on as prompt text, one "Speaker: text" line per entry."""
+        lines = chain.from_iterable(islice(node._lines, count) for node, count in self._segments())
+        return "\n".join(islice(lines, start, None) if start else lines)
+
+    def _count_new(self):
+        # counting is deferred from append so sessions that never check a budget pay nothing
+        cum = self._cum_tokens
+        total = cum[-1] if cum else 0
+        for line in islice(self._lines, len(cum), None):
+            total += token_counter.count(line) + 1
+            cum.append(total)
+
+    def _base_total(self) -> int:
+        if self._base_tokens is None:
+            self._base_tokens = self._parent._prefix_tokens(self._base)
+        return self._base_tokens
+
+    def _prefix_tokens(self, n: int) -> int:
+        """Tokens of the first n entries."""
+        node = self
+        while n <= node._base and node._parent is not None:
+            node = node._parent
+        if n <= node._base:
+            return node._base_total()
+        if len(node._cum_tokens) < n - node._base:
+            node._count_new()
+        return node._base_total() + node._cum_tokens[n - node._base - 1]
+
+    def tokens(self, start: int = 0) -> int:
+        """Tokens of the prompt text from entry `start` on, from cached per-entry counts."""
+        self._count_new()
+        total = self._base_total() + (self._cum_tokens[-1] if self._cum_tokens else 0)
+        return total - self._prefix_tokens(start) if start else total
+
+    def window_start(self, budget: int) -> int:
+        """The first entry to keep so that the entries from it on fit in `budget` tokens."""
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.tokens(mid) <= budget:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def own_entries(self) -> int:
+        """Entries stored by this transcript itself (not shared with a parent)."""
+        return len(self._entries)
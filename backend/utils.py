@@ -1,9 +1,18 @@
+import os
 import re
 from typing import Optional, Tuple
 
 JURY_RE = re.compile(r"Verdict:\s*(Guilty|Not Guilty|No Verdict)\s*;\s*Confidence:\s*(\d{1,3})%", re.IGNORECASE)
 
 
+def env_flag(name: str, default: bool = False) -> bool:
+    """An on/off environment switch: '1', 'true', 'yes' and 'on' are on; '0', 'false', 'no' and 'off' are off."""
+    value = os.getenv(name, '').strip().lower()
+    if not value:
+        return default
+    return value not in ('0', 'false', 'no', 'off')
+
+
 def parse_jury_line(line: str) -> Optional[Tuple[str, int]]:
     """Parse a jury line of the form:
     Verdict: <Guilty|Not Guilty|No Verdict>; Confidence: <NN>%
@@ -21,3 +30,37 @@ def parse_jury_line(line: str) -> Optional[Tuple[str, int]]:
     except ValueError:
         return None
     return (verdict, confidence)
+
+
+class JuryStreamParser:
+    """Incremental counterpart of `parse_jury_line` for streamed Jury output.
+
+    Feed text deltas as they arrive; `feed` returns (verdict, confidence) as
+    soon as a complete line has been seen, so the caller can stop reading the
+    provider stream. A match always ends in '%', so the buffer is only
+    rescanned when a delta carries one.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.result: Optional[Tuple[str, int]] = None
+        self.end = 0
+
+    def feed(self, delta: str) -> Optional[Tuple[str, int]]:
+        if self.result is not None:
+            return self.result
+        if not delta:
+            return None
+        self.buffer += delta
+        if '%' not in delta:
+            return None
+        m = JURY_RE.search(self.buffer)
+        if m:
+            self.result = (m.group(1), int(m.group(2)))
+            self.end = m.end()
+        return self.result
+
+    @property
+    def text(self) -> str:
+        """The streamed text up to the end of the matched line (all of it if unmatched)."""
+        return self.buffer[:self.end] if self.result is not None else self.buffer
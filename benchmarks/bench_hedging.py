@@ -0,0 +1,44 @@
+"""Hedge rate, hedge win rate and time-to-first-token p99 against a long-tail provider.
+
+The fake provider answers in `--latency-ms`, except that a `--tail-prob`
+fraction of requests take `--tail-factor` times longer. `--calls` sequential
+Judge calls go through `Hedger.call`, and the primary-only p99 is compared
+with the p99 actually seen.
+
+    python benchmarks/bench_hedging.py --calls 400 --tail-prob 0.05 --budget 0.1
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend import limiter, openai_helper  # noqa: E402
+from backend.fake_provider import FakeOpenAI  # noqa: E402
+from backend.hedging import Hedger  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--calls', type=int, default=400)
+    ap.add_argument('--latency-ms', type=float, default=20.0)
+    ap.add_argument('--tail-prob', type=float, default=0.05)
+    ap.add_argument('--tail-factor', type=float, default=10.0)
+    ap.add_argument('--budget', type=float, default=0.1)
+    args = ap.parse_args()
+
+    os.environ['CEREBRAL_ADAPTIVE_LIMIT'] = '0'
+    limiter.reset()
+    fake = FakeOpenAI(latency=args.latency_ms / 1000.0, jitter=0.2, tail_prob=args.tail_prob,
+                      tail_factor=args.tail_factor, seed=0)
+    openai_helper.OpenAI = lambda api_key=None: fake
+    hedger = Hedger(budget=args.budget)
+    for _ in range(args.calls):
+        hedger.call('bench', 'Judge', 'gpt-5', 'You are the Judge')
+    stats = hedger.stats()
+    print({k: round(v, 3) if isinstance(v, float) else v for k, v in stats.items()})
+
+
+if __name__ == '__main__':
+    main()
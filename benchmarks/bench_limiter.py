@@ -0,0 +1,61 @@
+"""Goodput of outbound provider calls against a hidden provider rate limit.
+
+A fake provider rejects requests beyond `--provider-limit` in flight with a
+429. `--callers` threads issue `--calls` requests through `call_responses`,
+once with the adaptive limiter disabled and once enabled, and report goodput
+(successful calls per second), failures and 429s seen by the provider.
+
+    python benchmarks/bench_limiter.py --callers 64 --provider-limit 12
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend import limiter, openai_helper  # noqa: E402
+from backend.fake_provider import FakeOpenAI  # noqa: E402
+
+
+def run(adaptive: bool, args) -> dict:
+    os.environ['CEREBRAL_ADAPTIVE_LIMIT'] = '1' if adaptive else '0'
+    os.environ['CEREBRAL_LIMIT_INITIAL'] = str(args.initial)
+    limiter.reset()
+    fake = FakeOpenAI(latency=args.latency_ms / 1000.0, jitter=0.2, max_concurrency=args.provider_limit, seed=0)
+    openai_helper.OpenAI = lambda api_key=None: fake
+
+    def one(_):
+        try:
+            openai_helper.call_responses('bench', 'gpt-5', 'You are the Jury')
+            return True
+        except Exception:
+            return False
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(args.callers) as pool:
+        ok = sum(pool.map(one, range(args.calls)))
+    elapsed = time.perf_counter() - t0
+    out = {'adaptive': adaptive, 'ok': ok, 'failed': args.calls - ok, 'provider_429s': fake.rejected,
+           'goodput_per_s': round(ok / elapsed, 1), 'elapsed_s': round(elapsed, 2)}
+    if adaptive:
+        out['final_window'] = limiter.snapshot()['gpt-5']['limit']
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--callers', type=int, default=64)
+    ap.add_argument('--calls', type=int, default=2000)
+    ap.add_argument('--provider-limit', type=int, default=12)
+    ap.add_argument('--latency-ms', type=float, default=20.0)
+    ap.add_argument('--initial', type=int, default=8)
+    args = ap.parse_args()
+    for adaptive in (False, True):
+        print(run(adaptive, args))
+
+
+if __name__ == '__main__':
+    main()
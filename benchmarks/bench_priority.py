@@ -0,0 +1,75 @@
+"""Interactive turn latency while a large batch saturates the provider window.
+
+`--batch-callers` threads issue provider calls back to back, standing in for
+a 10k-case bulk run. Meanwhile one interactive caller issues `--turns`
+sequential calls and records their latency. This runs three times: without
+batch load, with the load under the priority scheduler, and with the load
+treated as interactive (plain FIFO, i.e. no scheduling).
+
+    python benchmarks/bench_priority.py --batch-callers 64 --window 8
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from backend import limiter, openai_helper  # noqa: E402
+from backend.fake_provider import FakeOpenAI  # noqa: E402
+from backend.scheduling import call_class  # noqa: E402
+
+
+def run(args, batch_callers: int, batch_class: str) -> dict:
+    os.environ['CEREBRAL_LIMIT_INITIAL'] = str(args.window)
+    os.environ['CEREBRAL_LIMIT_MAX'] = str(args.window)
+    limiter.reset()
+    fake = FakeOpenAI(latency=args.latency_ms / 1000.0, jitter=0.3, seed=0)
+    openai_helper.OpenAI = lambda api_key=None: fake
+    stop = threading.Event()
+    batch_done = [0]
+
+    def batch_worker():
+        # same tenant as the live caller in the FIFO run, so fair queuing cannot help either
+        with call_class(batch_class, 'bulk' if batch_class == 'batch' else None):
+            while not stop.is_set():
+                openai_helper.call_responses('bench', 'gpt-5', 'You are the Jury')
+                batch_done[0] += 1
+
+    workers = [threading.Thread(target=batch_worker, daemon=True) for _ in range(batch_callers)]
+    for w in workers:
+        w.start()
+    time.sleep(0.2)
+    lat = []
+    for _ in range(args.turns):
+        t0 = time.perf_counter()
+        openai_helper.call_responses('bench', 'gpt-5', 'You are the Judge')
+        lat.append((time.perf_counter() - t0) * 1000.0)
+    stop.set()
+    for w in workers:
+        w.join()
+    lat = np.array(lat)
+    return {'batch_callers': batch_callers, 'batch_class': batch_class,
+            'interactive_p50_ms': round(float(np.percentile(lat, 50)), 1),
+            'interactive_p99_ms': round(float(np.percentile(lat, 99)), 1),
+            'batch_calls': batch_done[0]}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--batch-callers', type=int, default=64)
+    ap.add_argument('--window', type=int, default=8)
+    ap.add_argument('--turns', type=int, default=100)
+    ap.add_argument('--latency-ms', type=float, default=20.0)
+    args = ap.parse_args()
+    print(run(args, 0, 'batch'))
+    print(run(args, args.batch_callers, 'batch'))
+    print(run(args, args.batch_callers, 'interactive'))
+
+
+if __name__ == '__main__':
+    main()
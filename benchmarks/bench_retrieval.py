@@ -0,0 +1,110 @@
+"""Prompt size and prompt latency with and without fact retrieval on large case files.
+
+Builds a synthetic case file of `--pages` pages with one relevant paragraph
+planted per argument, then renders the Opposing, Judge and Jury prompts for
+each argument with the full facts and with retrieval (`backend/retrieval.py`).
+Reports prompt tokens per agent, local render time, index build time, how
+often the planted paragraph made it into the prompt, and the provider prefill
+time saved at `--prefill-tokens-per-s` (an estimate; the fake provider's
+latency does not depend on prompt size).
+
+    python benchmarks/bench_retrieval.py
+    python benchmarks/bench_retrieval.py --pages 500 --budget 1000 --top-k 6
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from backend.agent_manager import AgentManager  # noqa: E402
+from backend.retrieval import FactIndex  # noqa: E402
+from backend.tokens import count as count_tokens  # noqa: E402
+
+PLACES = ['Leeds', 'Bristol', 'Norwich', 'Carlisle', 'Exeter', 'Dundee', 'Swansea', 'Derby']
+THINGS = ['invoice', 'delivery note', 'rota', 'ledger', 'memo', 'receipt', 'timesheet', 'email']
+
+
+def synthetic_case(pages: int, arguments: int, seed: int = 0):
+    """(facts, [(argument, planted paragraph)]) with about 500 tokens of filler per page."""
+    rng = random.Random(seed)
+    paragraphs = []
+    for i in range(pages * 5):
+        thing, place = rng.choice(THINGS), rng.choice(PLACES)
+        paragraphs.append(f"Exhibit {i}: a {thing} from the {place} office dated day {rng.randint(1, 365)} "
+                          f"records routine business. Staff member {rng.randint(1, 400)} signed it, and neither "
+                          f"party disputes the {thing} or its contents, which concern ordinary trade.")
+    planted = []
+    for j in range(arguments):
+        name = f'Witness{j}'
+        fact = (f"{name} stated under oath that the defendant borrowed the grey hatchback registration "
+                f"KX{j:02d} ABC on the night of the burglary and returned it at dawn.")
+        paragraphs[rng.randrange(len(paragraphs))] = fact
+        planted.append((f"{name} saw my client borrow the hatchback KX{j:02d} ABC that night.", fact))
+    return '\n\n'.join(paragraphs), planted
+
+
+def _time_ms(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - t0) * 1000.0
+
+
+def run(manager: AgentManager, facts: str, planted):
+    sid = manager.create_session('bench', facts)
+    sess = manager.get_session(sid)
+    tokens = {'Opposing': [], 'Judge': [], 'Jury': []}
+    render_ms, hits = [], 0
+    for argument, fact in planted:
+        manager.add_user_presentation(sid, argument)
+        t0 = time.perf_counter()
+        prompts = {'Opposing': manager._opposing_prompt(sess, argument)}
+        sess['transcript'].append(('Opposing', 'Objection, the facts do not show that.'))
+        prompts['Judge'] = manager._judge_prompt(sess)
+        prompts['Jury'] = manager._jury_prompt(sess)
+        render_ms.append((time.perf_counter() - t0) * 1000.0)
+        hits += all(fact in p for p in prompts.values())
+        for agent, prompt in prompts.items():
+            tokens[agent].append(count_tokens(prompt))
+        sess['transcript'].append(('Jury', 'Verdict: Guilty; Confidence: 60%'))
+    manager.close_session(sid)
+    return {
+        'prompt_tokens': {a: int(np.mean(t)) for a, t in tokens.items()},
+        'render_ms_per_turn': {'p50': round(float(np.percentile(render_ms, 50)), 3),
+                               'p99': round(float(np.percentile(render_ms, 99)), 3)},
+        'planted_fact_recall': round(hits / len(planted), 3),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--pages', type=int, default=300)
+    ap.add_argument('--arguments', type=int, default=20)
+    ap.add_argument('--budget', type=int, default=1500, help='facts token budget (CEREBRAL_FACT_BUDGET)')
+    ap.add_argument('--top-k', type=int, default=8)
+    ap.add_argument('--prefill-tokens-per-s', type=float, default=10000.0)
+    args = ap.parse_args(argv)
+
+    facts, planted = synthetic_case(args.pages, args.arguments)
+    index, build_ms = _time_ms(lambda: FactIndex(facts))
+    full = run(AgentManager(), facts, planted)
+    retrieved = run(AgentManager(fact_budget=args.budget, fact_top_k=args.top_k), facts, planted)
+    saved = sum(full['prompt_tokens'].values()) - sum(retrieved['prompt_tokens'].values())
+    print(json.dumps({
+        'facts_tokens': count_tokens(facts),
+        'chunks': len(index.chunks),
+        'index_build_ms': round(build_ms, 1),
+        'full': full,
+        'retrieval': retrieved,
+        'prompt_tokens_saved_per_turn': saved,
+        'est_prefill_ms_saved_per_turn': round(saved / args.prefill_tokens_per_s * 1000.0, 1),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
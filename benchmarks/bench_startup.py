@@ -0,0 +1,62 @@
+"""Cold start of the backend: import-time profile and time to the first /health.
+
+Each run is a fresh interpreter. The import profile comes from
+`python -X importtime` and lists the modules with the largest cumulative
+import time; time-to-first-/health covers interpreter start, importing
+`backend.main` and answering one request through the ASGI app.
+
+    python benchmarks/bench_startup.py --runs 5 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEALTH = (
+    "import asyncio\n"
+    "from backend.main import app\n"
+    "from backend.loadtest import ASGITransport\n"
+    "status, body = asyncio.run(ASGITransport(app).request('GET', '/health'))\n"
+    "assert status == 200, status\n"
+)
+
+
+def time_to_health() -> float:
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, '-c', HEALTH], cwd=ROOT, check=True, env={**os.environ, 'PYTHONPATH': str(ROOT)})
+    return time.perf_counter() - t0
+
+
+def import_profile(top: int):
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import backend.main'], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in out.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--runs', type=int, default=5)
+    ap.add_argument('--top', type=int, default=15)
+    args = ap.parse_args()
+
+    print(f'{"cumulative ms":>14} {"self ms":>9}  module')
+    for cumulative, self_us, name in import_profile(args.top):
+        print(f'{cumulative / 1000:14.1f} {self_us / 1000:9.1f}  {name}')
+    times = [time_to_health() for _ in range(args.runs)]
+    print(f'time to first /health: median {statistics.median(times) * 1000:.0f} ms, '
+          f'best {min(times) * 1000:.0f} ms over {args.runs} runs')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Parse-failure rate and per-turn parse overhead for Judge/Jury replies.
+
+Compares the legacy line regex (`utils.parse_jury_line`) with the structured
+path (`structured.parse_jury` / `parse_judge`) and the incremental stream
+parser, over a corpus of recorded outputs.
+
+    python benchmarks/bench_structured.py                  # synthetic corpus
+    python benchmarks/bench_structured.py --corpus out.jsonl
+
+A corpus file holds one {"agent": "Judge"|"Jury", "text": ...} object per line.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from backend import structured as so  # noqa: E402
+from backend.utils import parse_jury_line  # noqa: E402
+
+
+def synthetic_corpus(n: int, seed: int = 0):
+    """Mix of reply shapes seen from real models, including malformed ones."""
+    rng = random.Random(seed)
+    verdicts = ['Guilty', 'Not Guilty', 'No Verdict', 'guilty']
+    for _ in range(n):
+        v = rng.choice(verdicts)
+        c = rng.randint(0, 100)
+        shape = rng.random()
+        if rng.random() < 0.5:
+            if shape < 0.55:
+                text = json.dumps({'verdict': v, 'confidence': c})
+            elif shape < 0.7:
+                text = '```json\n' + json.dumps({'verdict': v, 'confidence': c}, indent=2) + '\n```'
+            elif shape < 0.85:
+                text = f"Verdict: {v}; Confidence: {c}%"
+            elif shape < 0.93:
+                text = f"The jury finds the defendant {v.lower()} with {c} percent confidence."
+            else:
+                text = json.dumps({'verdict': v, 'confidence': c})[:-6]   # truncated stream
+            yield {'agent': 'Jury', 'text': text}
+        else:
+            ruling = rng.choice(['SUSTAINED', 'OVERRULED'])
+            reason = 'The objection rests on the pinned facts.'
+            if shape < 0.6:
+                text = json.dumps({'ruling': ruling, 'reason': reason})
+            elif shape < 0.9:
+                text = f"JUDGE: {ruling} - {reason}"
+            else:
+                text = f"I will allow it. {reason}"
+            yield {'agent': 'Judge', 'text': text}
+
+
+def _timed(fn, items):
+    out = []
+    times = np.empty(len(items))
+    for i, text in enumerate(items):
+        t0 = time.perf_counter()
+        out.append(fn(text))
+        times[i] = time.perf_counter() - t0
+    return out, times * 1e6
+
+
+def _stream_parse(text, step=4):
+    parser = so.JsonFieldStreamParser(so.JURY_VALIDATOR)
+    for i in range(0, len(text), step):
+        parser.feed(text[i:i + step])
+    return parser.fields if parser.complete() else None
+
+
+def _summary(name, results, times):
+    failed = sum(1 for r in results if not r)
+    return {
+        'path': name,
+        'n': len(results),
+        'failure_rate': round(failed / max(1, len(results)), 4),
+        'mean_us': round(float(times.mean()), 3),
+        'p50_us': round(float(np.percentile(times, 50)), 3),
+        'p99_us': round(float(np.percentile(times, 99)), 3),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--corpus', help='JSONL file of recorded outputs')
+    ap.add_argument('-n', type=int, default=50000, help='synthetic corpus size')
+    args = ap.parse_args(argv)
+
+    if args.corpus:
+        with open(args.corpus, encoding='utf-8') as fh:
+            corpus = [json.loads(line) for line in fh if line.strip()]
+    else:
+        corpus = list(synthetic_corpus(args.n))
+
+    jury = [r['text'] for r in corpus if r['agent'] == 'Jury']
+    judge = [r['text'] for r in corpus if r['agent'] == 'Judge']
+
+    report = [
+        _summary('jury/line-regex', *_timed(parse_jury_line, jury)),
+        _summary('jury/structured', *_timed(lambda t: so.parse_jury(t)[0], jury)),
+        _summary('jury/stream-4ch', *_timed(_stream_parse, jury)),
+        _summary('judge/structured', *_timed(lambda t: so.parse_judge(t)[0], judge)),
+    ]
+    print(json.dumps({'report': report, 'outcomes': so.PARSE_STATS}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
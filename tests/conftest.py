@@ -9,8 +9,47 @@ def pytest_addoption(parser):
         default=False,
         help="Run tests that call the real OpenAI API (must set OPENAI_API_KEY).",
     )
+    parser.addoption(
+        "--perf",
+        action="store_true",
+        default=False,
+        help="Run the performance regression tests (tests/test_perf.py) against stored baselines.",
+    )
+    parser.addoption(
+        "--perf-save",
+        action="store_true",
+        default=False,
+        help="With --perf, write the measured numbers to tests/perf_baselines.json instead of comparing.",
+    )
+    parser.addoption(
+        "--perf-threshold",
+        type=float,
+        default=0.5,
+        help="With --perf, fail when a metric is worse than its baseline by more than this fraction.",
+    )
 
 
 def pytest_configure(config):
     if config.getoption("--real-api"):
         os.environ["DEMO_USE_REAL_API"] = "1"
+    config.addinivalue_line("markers", "perf: performance regression test, run with --perf")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--perf"):
+        return
+    skip = pytest.mark.skip(reason="performance test; run with --perf")
+    for item in items:
+        if "perf" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_provider_state():
+    """Breakers, limiters, usage counters and the token counter's calibration are process-wide; reset them per test."""
+    from backend import accounting, breaker, limiter, tokens
+    breaker.reset()
+    limiter.reset()
+    tokens.reset()
+    accounting.reset()
+    yield
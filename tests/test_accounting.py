@@ -0,0 +1,133 @@
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import accounting, openai_helper, tokens
+from backend.accounting import BudgetExceeded, Limits, UsageStore
+from backend.agent_manager import AgentManager
+from backend.batch_mode import LocalBatchBackend, run_turns_batched
+from backend.fake_provider import FakeOpenAI
+from backend.scheduling import call_class
+
+
+def _use_fake(monkeypatch, **kw):
+    fake = FakeOpenAI(latency=0.0, **kw)
+    monkeypatch.setattr(openai_helper, 'OpenAI', lambda api_key=None: fake)
+    monkeypatch.setattr('backend.agent_manager.resolve_api_key', lambda: 'k')
+    return fake
+
+
+def test_turns_record_usage_per_session_agent_and_tenant(monkeypatch):
+    _use_fake(monkeypatch, seed=1)
+    m = AgentManager()
+    sid = m.create_session('t', 'The defendant was seen near the bank at 9pm.')
+    m.add_user_presentation(sid, 'My client was at home.')
+    with call_class('interactive', 'acme'):
+        m.run_turn_sequence(sid, 'My client was at home.')
+    usage = accounting.store.session(sid)
+    assert set(usage['agents']) == {'Opposing', 'Judge', 'Jury'}
+    assert usage['calls'] == 3 and usage['input_tokens'] > 0 and usage['output_tokens'] > 0
+    expected = sum(tokens.estimate_cost(model, a['input_tokens'], a['output_tokens'])
+                   for model, a in (('gpt-5-codex', usage['agents']['Opposing']), ('gpt-5', usage['agents']['Judge']),
+                                    ('gpt-5', usage['agents']['Jury'])))
+    assert usage['cost_usd'] == pytest.approx(expected, abs=1e-5)
+    snap = accounting.store.snapshot()
+    assert snap['tenants']['acme']['input_tokens'] == usage['input_tokens']
+    assert {(s['agent'], s['model']) for s in snap['series']} == {('Opposing', 'gpt-5-codex'), ('Judge', 'gpt-5'),
+                                                                  ('Jury', 'gpt-5')}
+    m.close_session(sid)
+    assert accounting.store.session(sid)['calls'] == 0
+    assert accounting.store.snapshot()['tenants']['acme']['calls'] == 3
+
+
+def test_streams_record_completed_usage_or_an_estimate(monkeypatch):
+    _use_fake(monkeypatch, seed=2)
+    m = AgentManager()
+    sid = m.create_session('t', 'facts')
+    m.add_user_presentation(sid, 'argument')
+    m.run_turn_sequence_stream(sid, 'argument', lambda payload: None)
+    agents = accounting.store.session(sid)['agents']
+    assert agents['Opposing']['estimated_calls'] == agents['Judge']['estimated_calls'] == 0
+    # the Jury stream is closed as soon as the verdict line is complete, before any usage event
+    assert agents['Jury']['estimated_calls'] == 1 and agents['Jury']['output_tokens'] > 0
+
+
+def test_budgets_refuse_calls_before_they_are_sent(monkeypatch):
+    fake = _use_fake(monkeypatch, seed=3)
+    sent = []
+    create = fake.responses.create
+    monkeypatch.setattr(fake.responses, 'create',
+                        lambda model, input, **kw: sent.append(model) or create(model, input, **kw))
+    monkeypatch.setattr(accounting, 'store', UsageStore(Limits(session_tokens=1500)))
+    m = AgentManager()
+    sid = m.create_session('t', 'The defendant was seen near the bank at 9pm.')
+    rounds = []
+    for i in range(10):
+        m.add_user_presentation(sid, f'Argument {i}.')
+        rounds.append(m.run_turn_sequence(sid, f'Argument {i}.'))
+    usage = accounting.store.session(sid)
+    assert usage['calls'] >= 3 and usage['input_tokens'] + usage['output_tokens'] <= 1500
+    assert len(sent) == usage['calls'] and accounting.store.rejections['session'] > 0
+    assert 'budget' in rounds[-1][0]['text'] and rounds[-1][0]['text'].startswith('(error)')
+
+
+def test_tenant_budget_counts_reservations_in_flight():
+    store = UsageStore(Limits(tenant_usd={'acme': 0.001}))
+    with call_class('batch', 'acme'):
+        held = store.reserve('gpt-5', 'x ' * 100, 60)
+        while True:
+            try:
+                store.reserve('gpt-5', 'x ' * 100, 60)
+            except BudgetExceeded as e:
+                assert e.scope == 'tenant' and e.kind == 'USD'
+                break
+        store.release(held)
+        assert store.reserve('gpt-5', 'x ' * 100, 60) is not None
+    with call_class('batch', 'other'):
+        assert store.reserve('gpt-5', 'x ' * 10000, 60) is not None
+
+
+def test_reservations_use_the_carried_prompt_size_and_never_price_a_model_as_free():
+    store = UsageStore(Limits(session_usd=0.01, session_tokens=10000))
+    with accounting.session_context('s'):
+        # the size the prompt carries is used as is: 9000 + 2000 > 10000 tokens
+        with pytest.raises(BudgetExceeded) as e:
+            store.reserve('gpt-5-mini', tokens.Sized('short text', 9000), 2000)
+        assert e.value.kind == 'token'
+        assert store.reserve('gpt-5-mini', tokens.Sized('short text', 4000), 1000) is not None
+        # an unpriced model is held at the dearest configured price (gpt-5: 0.005 + 0.01 USD)
+        with pytest.raises(BudgetExceeded) as e:
+            store.reserve('mystery-model', tokens.Sized('short text', 4000), 1000)
+        assert e.value.kind == 'USD'
+    store.add('mystery-model', 1000, 1000, session='s')
+    assert store.session('s')['cost_usd'] == pytest.approx(tokens.estimate_cost('gpt-5', 1000, 1000))
+
+
+def test_batch_waves_record_usage_and_skip_sessions_over_budget(monkeypatch):
+    monkeypatch.setattr(accounting, 'store', UsageStore(Limits(session_tokens=2000)))
+    m = AgentManager()
+    small = m.create_session('small', 'A short case.')
+    large = m.create_session('large', 'A long case file. ' * 1000)
+    with tempfile.TemporaryDirectory() as d:
+        results = run_turns_batched(m, [(small, 'alibi'), (large, 'alibi')], LocalBatchBackend(d),
+                                    poll_interval=0.01)
+    assert accounting.store.session(small)['calls'] == 3
+    assert accounting.store.session(large)['calls'] == 0
+    assert all('budget' in r['text'] for r in results[large])
+
+
+def test_usage_endpoints_and_metrics(monkeypatch):
+    monkeypatch.setenv('CEREBRAL_FAKE_PROVIDER', '1')
+    monkeypatch.setenv('CEREBRAL_FAKE_LATENCY_MS', '0')
+    from backend.main import app
+    client = TestClient(app)
+    sid = client.post('/api/session', json={'title': 't', 'facts': 'f'}).json()['session_id']
+    client.post(f'/api/session/{sid}/what-if', json={'arguments': ['a']})
+    assert client.get(f'/api/session/{sid}/usage').json()['calls'] == 0
+    assert client.get('/api/session/nope/usage').json() == {'error': 'session not found'}
+    body = client.get('/api/usage').json()
+    assert body['tenants']['default']['calls'] == 3
+    metrics = client.get('/metrics').text
+    assert 'cerebral_provider_tokens_total{tenant="default",agent="Jury",model="gpt-5",kind="input"}' in metrics
+    assert 'cerebral_budget_rejections_total{scope="session"} 0' in metrics
@@ -0,0 +1,53 @@
+import json
+
+from backend.agent_manager import AgentManager
+from backend.batch_mode import (LocalBatchBackend, parse_output_line, request_line,
+                                run_cases_batched, run_turns_batched)
+from backend.fake_provider import FakeOpenAI
+
+
+class _Recording(FakeOpenAI):
+    def __init__(self):
+        super().__init__(seed=1)
+        self.prompts = []
+
+    def _reply(self, prompt, structured=False):
+        self.prompts.append(prompt)
+        return super()._reply(prompt, structured)
+
+
+def test_request_and_output_lines_round_trip():
+    line = request_line('s:Jury', 'gpt-5', 'p', max_tokens=60)
+    assert line['body'] == {'model': 'gpt-5', 'input': 'p', 'max_output_tokens': 60}
+    out = {'custom_id': 's:Jury', 'response': {'status_code': 200, 'body': {
+        'output': [{'content': [{'type': 'output_text', 'text': 'Verdict: Guilty; Confidence: 70%'}]}]}}}
+    assert parse_output_line(out) == ('s:Jury', 'Verdict: Guilty; Confidence: 70%', None)
+    assert parse_output_line({'custom_id': 'x', 'error': {'message': 'boom'}}) == ('x', None, 'boom')
+
+
+def test_waves_respect_turn_dependencies(tmp_path):
+    fake = _Recording()
+    backend = LocalBatchBackend(str(tmp_path), responder=fake)
+    manager = AgentManager()
+    sids = [manager.create_session('t', f'facts {i}') for i in range(3)]
+    results = run_turns_batched(manager, [(sid, 'arg') for sid in sids], backend, poll_interval=0.01)
+
+    assert fake.calls == 9
+    # every Judge prompt was built after that session's Opposing reply landed
+    judge_prompts = [p for p in fake.prompts if 'You are the Judge' in p]
+    assert len(judge_prompts) == 3 and all('Opposing: (fake)' in p for p in judge_prompts)
+    for sid in sids:
+        agents = [r['agent'] for r in results[sid]]
+        assert agents == ['Opposing', 'Judge', 'Jury']
+        assert 'verdict' in results[sid][-1]
+        assert [s for s, _ in manager.get_session(sid)['transcript']] == ['User', 'Opposing', 'Judge', 'Jury']
+    assert len(list(tmp_path.glob('*.input.jsonl'))) == 3
+
+
+def test_cases_with_different_argument_counts(tmp_path):
+    backend = LocalBatchBackend(str(tmp_path))
+    cases = [{'title': 'a', 'facts': 'f', 'arguments': ['x', 'y']}, {'title': 'b', 'facts': 'g', 'arguments': ['z']}]
+    out = run_cases_batched(AgentManager(), cases, backend, poll_interval=0.01)
+    assert [len(o['turns']) for o in out] == [2, 1]
+    assert all(o['verdict'] for o in out)
+    assert json.dumps(out)
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from backend import openai_helper
+from backend.agent_manager import AgentManager
+from backend.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, breaker_for
+
+
+class Down:
+    """Client whose every call fails like a dead network."""
+
+    def __init__(self, api_key=None):
+        self.calls = 0
+        self.responses = self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        raise ConnectionError('connection refused')
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+def test_opens_after_consecutive_failures_and_probes_to_recover():
+    b = CircuitBreaker('m', failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        b.before_call()
+        b.record_failure(ConnectionError())
+    assert b.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        b.before_call()
+    time.sleep(0.06)
+    b.before_call()                      # the single half-open probe
+    assert b.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        b.before_call()                  # concurrent callers still fail fast
+    b.record_success()
+    assert b.state == CLOSED
+
+
+def test_client_errors_do_not_open_the_circuit():
+    b = CircuitBreaker('m', failure_threshold=2)
+    for _ in range(5):
+        b.record_failure(BadRequest())
+    assert b.state == CLOSED
+
+
+def test_call_responses_fails_fast_while_open(monkeypatch):
+    monkeypatch.setenv('CEREBRAL_BREAKER_FAILURES', '2')
+    client = Down()
+    monkeypatch.setattr(openai_helper, 'OpenAI', lambda api_key=None: client)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            openai_helper.call_responses('k', 'gpt-5', 'hi')
+    t0 = time.perf_counter()
+    with pytest.raises(CircuitOpenError):
+        openai_helper.call_responses('k', 'gpt-5', 'hi')
+    assert time.perf_counter() - t0 < 0.05
+    assert client.calls == 2 and breaker_for('gpt-5').snapshot()['rejected'] == 1
+
+
+def test_degraded_mode_answers_from_mock_replies(monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setenv('CEREBRAL_BREAKER_FAILURES', '1')
+    monkeypatch.setattr(openai_helper, 'OpenAI', Down)
+    m = AgentManager(degraded=True)
+    sid = m.create_session('t', 'facts')
+    first = m.run_turn_sequence(sid, 'arg')
+    # Opposing and Judge trip their models' breakers; the Jury shares gpt-5 with the Judge
+    assert [r['text'].startswith('(error)') for r in first] == [True, True, False]
+    assert first[-1]['degraded']
+    second = m.run_turn_sequence(sid, 'arg')
+    assert all(r.get('degraded') for r in second)
+    assert second[-1]['verdict'] == 'Guilty'
+
+    # without degraded mode the open circuit still surfaces as an error
+    strict = AgentManager()
+    sid = strict.create_session('t', 'facts')
+    assert all(r['text'].startswith('(error)') for r in strict.run_turn_sequence(sid, 'arg'))
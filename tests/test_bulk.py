@@ -0,0 +1,73 @@
+import asyncio
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+from backend.agent_manager import AgentManager
+from backend.bulk import Checkpoint, run_file
+
+CASES = [
+    {'title': 'a', 'facts': 'f1', 'arguments': ['x']},
+    {'title': 'b', 'facts': 'f2', 'arguments': ['y', 'z']},
+    'not json',
+    {'title': 'c', 'facts': 'f3', 'arguments': []},
+]
+
+
+def _lines():
+    return [c if isinstance(c, str) else json.dumps(c) for c in CASES]
+
+
+def test_run_file_writes_one_result_per_case(monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    out = io.StringIO()
+    counts = asyncio.run(run_file(_lines(), out, AgentManager(), concurrency=2))
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert counts == {'ok': 3, 'error': 1}
+    assert sorted(r['line'] for r in results) == [0, 1, 2, 3]
+    by_line = {r['line']: r for r in results}
+    assert by_line[1]['verdict'] == 'Guilty' and len(by_line[1]['turns']) == 2
+    assert 'invalid JSON' in by_line[2]['error']
+
+
+def test_checkpoint_resume_skips_finished_lines(monkeypatch, tmp_path):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    ck_path = str(tmp_path / 'run.ckpt')
+    ck = Checkpoint(ck_path)
+    ck.mark(0)
+    ck.mark(2)
+    ck.save()
+
+    resumed = Checkpoint(ck_path)
+    assert resumed.low_water == 1 and resumed.done == {2}
+    out = io.StringIO()
+    asyncio.run(run_file(_lines(), out, AgentManager(), checkpoint=resumed))
+    lines = sorted(json.loads(line)['line'] for line in out.getvalue().splitlines())
+    assert lines == [1, 3]
+    assert Checkpoint(ck_path).low_water == 4
+
+
+def test_bulk_endpoint_streams_jsonl(monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    import backend.main as mainmod
+    client = TestClient(mainmod.app)
+    body = '\n'.join(_lines()[:2]) + '\n'
+    r = client.post('/api/bulk?concurrency=2', content=body)
+    assert r.status_code == 200
+    results = [json.loads(line) for line in r.text.splitlines()]
+    assert {r['title'] for r in results} == {'a', 'b'}
+    assert all(r['status'] == 'ok' for r in results)
+
+
+def test_aiter_lines_joins_lines_split_across_chunks():
+    from backend.bulk import aiter_lines
+
+    async def chunks():
+        for c in [b'ab', b'c\nd', b'e', b'\n\nf']:
+            yield c
+
+    async def collect():
+        return [line async for line in aiter_lines(chunks())]
+
+    assert asyncio.run(collect()) == ['abc', 'de', '', 'f']
@@ -0,0 +1,116 @@
+import asyncio
+import tracemalloc
+
+from fastapi.testclient import TestClient
+
+from backend import evidence
+from backend.agent_manager import AgentManager
+from backend.evidence import CHUNK_BYTES, EvidenceStore, _Chunker
+
+PARAGRAPH = ("Exhibit {i}: the warehouse log for shift {i} lists pallets received, forklift checks and the "
+             "names of the staff on duty. None of the entries for shift {i} is disputed.")
+PLANTED = "The security guard saw a grey hatchback with registration KX19 ABC leave the yard at 02:40."
+
+
+def _document(paragraphs=2000):
+    parts = [PARAGRAPH.format(i=i) for i in range(paragraphs)]
+    parts[paragraphs // 2] = PLANTED
+    parts[10] = ' '.join(f'Long paragraph sentence {i} about the inventory.' for i in range(60))
+    return '\n\n'.join(parts)
+
+
+def _spans(data: bytes, step: int):
+    chunker = _Chunker()
+    for i in range(0, len(data), step):
+        chunker.feed(data[i:i + step])
+    return chunker.close().tolist()
+
+
+async def _aiter(data: bytes, step: int = 64 * 1024):
+    for i in range(0, len(data), step):
+        yield data[i:i + step]
+
+
+def test_chunk_offsets_do_not_depend_on_read_sizes():
+    data = _document(200).encode()
+    spans = _spans(data, 1 << 20)
+    assert spans == _spans(data, 7) == _spans(data, 4096)
+    chunks = [data[a:b].decode() for a, b in spans]
+    assert PLANTED in chunks and all(len(c.encode()) <= CHUNK_BYTES for c in chunks)
+    assert sum(c.count('Long paragraph sentence') for c in chunks) == 60
+    unbroken = ('é' * 1000).encode()
+    assert all(unbroken[a:b].decode() for a, b in _spans(unbroken, 100))
+
+
+def test_ingest_streams_to_disk_with_flat_memory(tmp_path):
+    store = EvidenceStore(root=tmp_path)
+    block = ((PARAGRAPH.format(i=0) + '\n\n') * 400).encode()
+
+    async def body(total=16 << 20):
+        for _ in range(total // len(block)):
+            yield block
+
+    tracemalloc.start()
+    try:
+        doc = asyncio.run(store.ingest(body()))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert doc.size > 15 << 20 and len(doc) > 80000
+    assert peak < 4 << 20
+    assert doc[3] == PARAGRAPH.format(i=0)
+    assert store.delete(doc.id) and not doc.path.exists()
+
+
+def test_upload_endpoints_and_retrieval_through_a_session(tmp_path, monkeypatch):
+    from backend import main
+    monkeypatch.setattr(evidence, 'store', EvidenceStore(root=tmp_path))
+    client = TestClient(main.app)
+    text = _document()
+    info = client.post('/api/evidence', files={'file': ('exhibit.txt', text.encode(), 'text/plain')},
+                       data={'note': 'exhibit A'}).json()
+    assert info['bytes'] == len(text.encode()) and info['chunks'] > 2000
+    eid = info['evidence_id']
+    assert client.get(f'/api/evidence/{eid}/text', params={'start': 0, 'end': 10}).text == text[:10]
+    raw = client.post('/api/evidence', content=text.encode()).json()
+    assert raw['chunks'] == info['chunks']
+
+    sid = client.post('/api/session', json={'title': 't', 'facts': 'A burglary at the yard.'}).json()['session_id']
+    assert client.post(f'/api/session/{sid}/evidence/{eid}').json()['evidence_id'] == eid
+    assert client.post('/api/session/nope/evidence/' + eid).json() == {'error': 'session not found'}
+    sess = main.manager.get_session(sid)
+    main.manager.add_user_presentation(sid, 'Who drove the grey hatchback out of the yard?')
+    prompt = main.manager._judge_prompt(sess)
+    assert 'A burglary at the yard.' in prompt and PLANTED in prompt and len(prompt) < len(text) / 20
+
+    monkeypatch.setattr(evidence.store, 'max_bytes', 1000)
+    assert client.post('/api/evidence', content=text.encode()).status_code == 413
+
+
+def test_forks_keep_attached_evidence(tmp_path):
+    store = EvidenceStore(root=tmp_path)
+    doc = asyncio.run(store.ingest(_aiter(_document(50).encode())))
+    m = AgentManager()
+    sid = m.create_session('t', 'facts')
+    m.attach_evidence(sid, doc)
+    fork = m.get_session(m.fork_session(sid))
+    assert fork['evidence'] == [doc]
+    assert PLANTED in m._opposing_prompt(fork, 'the grey hatchback KX19 ABC')
+
+
+def test_delete_is_refused_while_sessions_hold_the_document(tmp_path, monkeypatch):
+    from backend import main
+    monkeypatch.setattr(evidence, 'store', EvidenceStore(root=tmp_path))
+    client = TestClient(main.app)
+    eid = client.post('/api/evidence', content=_document(50).encode()).json()['evidence_id']
+    sid = client.post('/api/session', json={'title': 't', 'facts': 'f'}).json()['session_id']
+    client.post(f'/api/session/{sid}/evidence/{eid}')
+    fork = main.manager.fork_session(sid)
+    assert client.delete(f'/api/evidence/{eid}').status_code == 409
+    main.manager.close_session(sid)
+    assert client.delete(f'/api/evidence/{eid}').status_code == 409
+    assert client.delete(f'/api/session/{fork}').json() == {'closed': fork}
+    assert client.delete(f'/api/evidence/{eid}').json() == {'deleted': eid}
+    assert not list(tmp_path.iterdir())
+    assert client.delete(f'/api/evidence/{eid}').json() == {'error': 'evidence not found'}
+    assert client.get(f'/api/evidence/{eid}').json() == {'error': 'evidence not found'}
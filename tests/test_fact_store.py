@@ -0,0 +1,54 @@
+from backend.agent_manager import AgentManager
+from backend.fact_store import FactStore
+from backend.simulation import run_trial
+
+
+def test_identical_facts_are_stored_once_and_released():
+    store = FactStore()
+    text = 'The defendant was seen near the bank at 9pm. ' * 100
+    keys = [store.put(text) for _ in range(10)]
+    assert len(set(keys)) == 1
+    stats = store.stats()
+    assert stats['facts'] == 1 and stats['references'] == 10
+    assert stats['dedup_ratio'] == 10.0 and stats['bytes_saved'] == 9 * stats['resident_bytes']
+    for key in keys[:9]:
+        store.release(key)
+    assert store.get(keys[0]) == text
+    store.release(keys[0])
+    assert store.stats() == {'facts': 0, 'references': 0, 'resident_bytes': 0, 'bytes_saved': 0, 'dedup_ratio': 1.0}
+
+
+def test_derived_artifacts_are_built_once_per_text():
+    store = FactStore()
+    builds = []
+    a = store.put('facts a')
+    store.put('facts a')
+    build = lambda text: builds.append(text) or text.upper()
+    assert store.derived(a, 'upper', build) == 'FACTS A'
+    assert store.derived(a, 'upper', build) == 'FACTS A' and builds == ['facts a']
+    store.release(a)
+    store.release(a)
+    b = store.put('facts a')
+    assert store.derived(b, 'upper', build) == 'FACTS A' and len(builds) == 2
+
+
+def test_sessions_share_facts_and_render_the_same_prompts():
+    m = AgentManager()
+    facts = 'Seen near {the} bank.'
+    sids = [m.create_session('t', facts) for _ in range(3)]
+    fork = m.fork_session(sids[0])
+    sess = m.get_session(sids[1])
+    assert 'facts' not in sess and m.facts(sess) == facts
+    assert m.fact_store.stats()['references'] == 4
+    prompt = m._opposing_prompt(sess, 'She {was} home.')
+    assert prompt == m._opposing_prompt(m.get_session(fork), 'She {was} home.')
+    assert 'Pinned facts:\nSeen near {the} bank.\n' in prompt and prompt.endswith('She {was} home.\n')
+    for sid in sids + [fork]:
+        m.close_session(sid)
+    assert m.fact_store.stats()['facts'] == 0 and m.sessions == {}
+
+
+def test_trials_release_their_facts():
+    m = AgentManager()
+    run_trial(m, 'facts', ['arg'])
+    assert m.fact_store.stats()['references'] == 0
@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+from backend import openai_helper
+from backend.agent_manager import AgentManager
+from backend.fake_provider import FakeOpenAI
+from backend.transcript import Transcript
+
+
+def _turns(t, n, start=0):
+    for i in range(start, start + n):
+        t.append(('User', f'arg {i}'))
+        t.append(('Judge', f'ruling {i}'))
+
+
+def test_fork_shares_the_prefix_without_copying():
+    t = Transcript()
+    _turns(t, 50)
+    f = t.fork()
+    assert f == t and f.own_entries() == 0 and len(f) == 100
+    t.append(('Jury', 'parent only'))
+    f.append(('Jury', 'fork only'))
+    assert t[-1] == ('Jury', 'parent only') and f[-1] == ('Jury', 'fork only')
+    assert len(t) == len(f) == 101 and f.own_entries() == 1
+    assert f[:100] == t[:100]
+
+
+def test_fork_of_a_fork_and_mid_transcript_forks():
+    t = Transcript()
+    _turns(t, 3)
+    a = t.fork(t.turn_start(1))
+    assert list(a) == [('User', 'arg 0'), ('Judge', 'ruling 0')]
+    _turns(a, 2, start=10)
+    b = a.fork(3)
+    b.append(('Opposing', 'b'))
+    assert list(b) == [('User', 'arg 0'), ('Judge', 'ruling 0'), ('User', 'arg 10'), ('Opposing', 'b')]
+    assert len(a) == 6 and len(t) == 6
+    assert t.turn_start(99) == 6 and t.fork(0) == []
+
+
+def test_text_matches_the_joined_lines_and_truncation():
+    t = Transcript([('User', 'a'), ('Judge', 'b')])
+    f = t.fork()
+    f.append(('Jury', 'c'))
+    assert f.text() == "User: a\nJudge: b\nJury: c"
+    del f[1:]
+    assert f.text() == "User: a" and len(t) == 2
+    f.append(('Jury', 'd'))
+    assert list(f) == [('User', 'a'), ('Jury', 'd')] and list(t) == [('User', 'a'), ('Judge', 'b')]
+
+
+def test_truncation_refuses_to_drop_entries_a_live_fork_shares():
+    t = Transcript()
+    _turns(t, 3)
+    f = t.fork(4)
+    del t[4:]
+    with pytest.raises(ValueError):
+        del t[3:]
+    assert list(f) == list(t) and len(t) == 4
+    f.append(('Jury', 'f'))
+    g = f.fork()
+    with pytest.raises(ValueError):
+        del f[4:]
+    # g shares only t's entries and f's own one, so f may drop below its base once g is gone
+    del g
+    del f[2:]
+    assert list(f) == list(t)[:2]
+    del f
+    del t[1:]
+    assert list(t) == [('User', 'arg 0')]
+
+
+def test_what_if_runs_branches_concurrently_with_a_shared_cache_key(monkeypatch):
+    fake = FakeOpenAI(latency=0.1, seed=3)
+    seen = []
+    create = fake.responses.create
+
+    def recording_create(model, input, **kwargs):
+        seen.append(kwargs.get('prompt_cache_key'))
+        return create(model, input, **kwargs)
+
+    monkeypatch.setattr(fake.responses, 'create', recording_create)
+    monkeypatch.setattr(openai_helper, 'OpenAI', lambda api_key=None: fake)
+    monkeypatch.setattr('backend.agent_manager.resolve_api_key', lambda: 'k')
+    m = AgentManager()
+    sid = m.create_session('case', 'facts')
+    m.add_user_presentation(sid, 'opening')
+    m.run_turn_sequence(sid, 'opening')
+    assert seen and not any(seen)
+    before = list(m.get_session(sid)['transcript'])
+
+    seen.clear()
+    t0 = time.perf_counter()
+    branches = m.run_what_if(sid, ['alibi', 'motive', 'witness'], at_turn=1)
+    elapsed = time.perf_counter() - t0
+    # three agents per turn, three branches: sequential would take ~0.9s
+    assert elapsed < 0.6
+    assert [b['argument'] for b in branches] == ['alibi', 'motive', 'witness']
+    assert set(seen) == {sid}
+    assert list(m.get_session(sid)['transcript']) == before
+    for b in branches:
+        fork = m.get_session(b['session_id'])
+        assert fork['parent'] == sid and fork['forked_at'] == len(before)
+        assert fork['transcript'][len(before)] == ('User', b['argument'])
+        assert fork['transcript'].own_entries() == len(fork['transcript']) - len(before)
+
+
+def test_fork_and_what_if_endpoints(monkeypatch):
+    monkeypatch.setenv('CEREBRAL_FAKE_PROVIDER', '1')
+    monkeypatch.setenv('CEREBRAL_FAKE_LATENCY_MS', '0')
+    from backend.main import app
+    client = TestClient(app)
+    sid = client.post('/api/session', json={'title': 't', 'facts': 'f'}).json()['session_id']
+    fork = client.post(f'/api/session/{sid}/fork', json={}).json()
+    assert fork['session_id'] != sid
+    res = client.post(f'/api/session/{sid}/what-if', json={'arguments': ['a', 'b']}).json()
+    assert len(res['branches']) == 2 and all(b['results'] for b in res['branches'])
+    assert client.post('/api/session/nope/fork', json={}).json() == {'error': 'session not found'}
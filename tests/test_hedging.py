@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from backend.agent_manager import AgentManager
+from backend.hedging import HedgeBudget, Hedger
+
+
+def scripted_stream(delays):
+    """stream_responses stand-in: the i-th call waits delays[i] seconds, then yields its model name."""
+    calls = []
+
+    def stream(api_key, model, input_text, **kwargs):
+        i = len(calls)
+        calls.append(model)
+        time.sleep(delays[i] if i < len(delays) else 0.0)
+        yield f'{model}:{i}'
+
+    return stream, calls
+
+
+def test_slow_primary_is_hedged_and_the_hedge_wins():
+    stream, calls = scripted_stream([0.01] * 20 + [1.0, 0.01])
+    h = Hedger(budget=0.5, fallback_model='fast', min_samples=20, stream=stream)
+    for _ in range(20):
+        h.call('k', 'Judge', 'gpt-5', 'p')
+    t0 = time.perf_counter()
+    text = h.call('k', 'Judge', 'gpt-5', 'p')
+    assert time.perf_counter() - t0 < 0.5
+    assert text == 'fast:21' and calls[-1] == 'fast'
+    s = h.stats()
+    assert s['hedged'] == 1 and s['hedge_wins'] == 1 and s['win_rate'] == 1.0
+
+
+def test_no_hedging_before_warmup_or_over_budget():
+    stream, calls = scripted_stream([0.0] * 5)
+    h = Hedger(min_samples=20, stream=stream)
+    h.call('k', 'Jury', 'gpt-5', 'p')
+    assert h.stats()['hedged'] == 0 and len(calls) == 1
+
+    budget = HedgeBudget(max_rate=0.1, window=10)
+    cells = [budget.record_call() for _ in range(10)]
+    assert budget.try_hedge(cells[0])
+    assert not budget.try_hedge(cells[1])
+
+
+def test_error_from_the_only_attempt_propagates():
+    def broken(api_key, model, input_text, **kwargs):
+        raise RuntimeError('boom')
+        yield  # pragma: no cover
+
+    with pytest.raises(RuntimeError):
+        Hedger(stream=broken).call('k', 'Judge', 'gpt-5', 'p')
+
+
+def test_manager_routes_agent_calls_through_hedger(monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr('backend.agent_manager.resolve_api_key', lambda: 'test')
+    seen = []
+
+    def stream(api_key, model, input_text, **kwargs):
+        seen.append(model)
+        yield 'Verdict: Guilty; Confidence: 70%' if 'You are the Jury' in input_text else 'ok'
+
+    m = AgentManager(hedger=Hedger(stream=stream))
+    sid = m.create_session('t', 'f')
+    results = m.run_turn_sequence(sid, 'arg')
+    assert seen == ['gpt-5-codex', 'gpt-5', 'gpt-5']
+    assert results[-1]['verdict'] == 'Guilty'
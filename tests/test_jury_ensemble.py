@@ -0,0 +1,64 @@
+import time
+
+from backend import openai_helper
+from backend.fake_provider import FakeOpenAI
+from backend.jury_ensemble import aggregate_verdicts, run_jury_ensemble
+from backend.agent_manager import AgentManager
+
+
+def test_aggregate_majority_and_weighted_vote():
+    agg = aggregate_verdicts([('Guilty', 60), ('guilty', 55), ('Not Guilty', 95), None])
+    assert agg['verdict'] == 'Guilty'
+    assert agg['votes'] == {'Guilty': 2, 'Not Guilty': 1}
+    assert agg['weighted_verdict'] == 'Guilty'
+    assert agg['unparsed'] == 1
+    assert abs(agg['agreement'] - 2 / 3) < 1e-9
+    assert 0.0 < agg['dispersion'] < 1.0
+
+
+def test_aggregate_tie_broken_by_confidence():
+    agg = aggregate_verdicts([('Guilty', 51), ('Not Guilty', 90)])
+    assert agg['verdict'] == 'Not Guilty'
+    assert agg['confidence'] == 90
+
+
+def test_ensemble_runs_jurors_concurrently(monkeypatch):
+    fake = FakeOpenAI(latency=0.2, seed=7)
+    monkeypatch.setattr(openai_helper, 'OpenAI', lambda api_key=None: fake)
+    t0 = time.perf_counter()
+    res = run_jury_ensemble('key', 'facts', 'User: arg', jurors=6)
+    elapsed = time.perf_counter() - t0
+    assert fake.calls == 6
+    assert elapsed < 0.2 * 3
+    assert res['aggregate']['jurors'] == 6
+    assert all(e['latency_ms'] >= 150 for e in res['jurors'])
+
+
+def test_ensemble_quorum_returns_early(monkeypatch):
+    fake = FakeOpenAI(guilty_rate=1.0)
+
+    class SlowTail:
+        # jurors #1 and #2 answer quickly, the rest take a second
+        def __init__(self, api_key=None):
+            self.responses = self
+
+        def create(self, model, input, **kwargs):
+            time.sleep(0.02 if ('juror #1 ' in input or 'juror #2 ' in input) else 1.0)
+            return fake.responses.create(model, input, **kwargs)
+
+    monkeypatch.setattr(openai_helper, 'OpenAI', SlowTail)
+    res = run_jury_ensemble('key', 'facts', 'User: arg', jurors=4, quorum=2)
+    assert res['quorum_reached']
+    assert res['aggregate']['verdict'] == 'Guilty'
+    skipped = [e['juror'] for e in res['jurors'] if e['status'] == 'skipped']
+    assert skipped == [3, 4]
+    assert res['wall_ms'] < 1000
+
+
+def test_turn_sequence_uses_ensemble_in_mock_mode(monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    manager = AgentManager(jurors=3)
+    sid = manager.create_session('t', 'facts')
+    jury = manager.run_turn_sequence(sid, 'arg')[-1]
+    assert jury['verdict'] == 'Guilty'
+    assert len(jury['ensemble']['jurors']) == 3
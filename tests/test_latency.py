@@ -0,0 +1,69 @@
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend import latency
+from backend.latency import LatencyRegistry, LogHistogram, WindowedHistogram
+
+
+def test_percentiles_stay_within_bucket_precision():
+    rng = np.random.default_rng(1)
+    samples = rng.lognormal(mean=5.0, sigma=1.0, size=20_000)
+    h = LogHistogram(precision=0.02)
+    for v in samples:
+        h.record(v)
+    got = h.percentiles([50, 90, 99, 99.9])
+    want = np.percentile(samples, [50, 90, 99, 99.9])
+    assert np.all(np.abs(got - want) / want < 0.03)
+    assert h.count == 20_000 and h.counts.nbytes < 10_000
+
+
+def test_windows_forget_old_slots():
+    now = [0.0]
+    h = WindowedHistogram(clock=lambda: now[0])
+    h.record(100.0)
+    now[0] = 120.0
+    h.record(5.0)
+    assert h.window('1m').count == 1 and h.window('5m').count == 2
+    now[0] = 4000.0
+    h.record(1.0)
+    assert h.window('1h').count == 1 and h.all.count == 3
+    assert len(h._rings[10]) == 1
+
+
+def test_slots_store_only_the_buckets_they_use():
+    now = [0.0]
+    h = WindowedHistogram(clock=lambda: now[0])
+    for t in range(3600):
+        now[0] = float(t)
+        h.record(100.0 + t % 7)
+    assert sum(len(ring) for ring in h._rings.values()) <= 42
+    assert all(len(s.counts) <= 7 for ring in h._rings.values() for s in ring.values())
+    assert h.window('1h').count == 3600 and h.window('5m').count == 300
+    assert abs(h.window('5m').percentiles([50])[0] - 103) / 103 < 0.02
+
+
+def test_registry_groups_by_operation_and_agent():
+    reg = LatencyRegistry()
+    for ms in (10, 20, 30):
+        reg.record('ttft', ms, 'Jury')
+    reg.record('ttft', 500, 'Judge')
+    out = reg.report('5m')
+    assert out['ttft']['Jury']['count'] == 3
+    assert abs(out['ttft']['Judge']['p99_ms'] - 500) / 500 < 0.02
+
+
+def test_debug_latency_endpoint_reports_turns_and_requests():
+    from backend.main import app
+    latency.reset()
+    client = TestClient(app)
+    sid = client.post('/api/session', json={'title': 't', 'facts': 'f'}).json()['session_id']
+    with client.websocket_connect(f'/ws/session/{sid}') as ws:
+        ws.send_json({'type': 'present', 'text': 'arg'})
+        for _ in range(3):
+            ws.receive_json()
+    body = client.get('/debug/latency', params={'window': '1m'}).json()
+    ops = body['operations']
+    assert ops['http POST /api/session']['none']['count'] == 1
+    assert set(ops['agent']) == {'Opposing', 'Judge', 'Jury'}
+    assert 'turn.sync' in ops and 'p999_ms' in ops['turn.sync']['none']
+    assert client.get('/debug/latency', params={'window': '2d'}).json()['error']
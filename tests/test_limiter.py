@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import limiter, openai_helper
+from backend.fake_provider import FakeOpenAI, FakeRateLimitError
+from backend.limiter import AIMDLimiter
+
+
+def test_window_grows_additively_and_halves_once_per_window():
+    lim = AIMDLimiter(initial=4, maximum=10)
+    for _ in range(8):
+        lim.release(lim.acquire(), 10.0)
+    assert 5.5 < lim.limit < 6.5
+
+    epochs = [lim.acquire() for _ in range(4)]
+    before = lim.limit
+    for e in epochs:
+        lim.release(e, 10.0, 'overload')
+    # four 429s from the same window cut it only once
+    assert lim.limit == pytest.approx(before / 2)
+    assert lim.stats['decreases'] == 1
+
+
+def test_rising_latency_cuts_the_window():
+    lim = AIMDLimiter(initial=8, min_excess_ms=50)
+    for _ in range(20):
+        lim.release(lim.acquire(), 100.0)
+    for _ in range(5):
+        lim.release(lim.acquire(), 1000.0)
+    assert lim.stats['decreases'] >= 1 and lim.limit < 8
+
+
+def test_excess_callers_queue_instead_of_failing():
+    lim = AIMDLimiter(initial=2, maximum=2)
+    peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal peak
+        with lim.slot():
+            with lock:
+                peak = max(peak, lim.inflight)
+            threading.Event().wait(0.01)
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: work(), range(16)))
+    assert peak == 2 and lim.stats['ok'] == 16 and lim.inflight == 0
+
+
+def test_call_responses_backs_off_under_hidden_rate_limit(monkeypatch):
+    limiter.reset()
+    monkeypatch.setenv('CEREBRAL_LIMIT_INITIAL', '16')
+    fake = FakeOpenAI(latency=0.01, max_concurrency=4)
+    monkeypatch.setattr(openai_helper, 'OpenAI', lambda api_key=None: fake)
+    monkeypatch.setattr(openai_helper, 'OVERLOAD_BACKOFF', 0.001)
+
+    def one(_):
+        try:
+            return openai_helper.call_responses('k', 'gpt-5', 'You are the Jury')
+        except FakeRateLimitError:
+            return None
+
+    with ThreadPoolExecutor(16) as pool:
+        out = list(pool.map(one, range(64)))
+    snap = limiter.snapshot()['gpt-5']
+    assert snap['decreases'] >= 1 and snap['limit'] < 16
+    assert sum(o is not None for o in out) > 48
+    limiter.reset()
+
+
+def test_limits_endpoint_reports_windows():
+    from backend.main import app
+    limiter.reset()
+    limiter.limiter_for('gpt-5')
+    body = TestClient(app).get('/api/limits').json()
+    assert body['models']['gpt-5']['limit'] == 8
+    limiter.reset()
@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+
+from backend import loadtest
+
+
+def _args(**kw):
+    base = dict(url=None, clients=20, rate=20.0, duration=0.3, turns=2, ramp=0.05, poisson=False, timeout=10.0,
+                latency_ms=0.0, facts='f', argument='a', seed=0)
+    return argparse.Namespace(**{**base, **kw})
+
+
+def test_in_process_run_reports_turns_and_server_latency(monkeypatch):
+    monkeypatch.setenv('CEREBRAL_FAKE_PROVIDER', '1')
+    from backend.main import app
+    report = asyncio.run(loadtest.run_load(loadtest.ASGITransport(app), _args()))
+    assert report['counts']['sessions_opened'] == 20
+    assert report['counts']['turns_completed'] == 40 and report['error_rate'] == 0.0
+    assert report['turn_latency']['count'] == 40 and report['ttft']['p99_ms'] <= report['turn_latency']['p99_ms']
+    assert 'turn.sync' in report['server']['operations']
+
+
+class _BrokenTransport:
+    """Sessions open, then each socket fails the way an overloaded server's does."""
+
+    def __init__(self):
+        self.failures = iter([asyncio.IncompleteReadError(b'', 2), ValueError('garbled frame'),
+                              ConnectionError('closed')])
+
+    async def request(self, method, path, body=None):
+        if path.startswith('/debug/latency'):
+            return 200, {'operations': {}}
+        return 200, {'session_id': 's'}
+
+    async def websocket(self, path):
+        failure = next(self.failures)
+
+        class _WS:
+            async def send_json(self, data):
+                pass
+
+            async def receive_json(self):
+                raise failure
+
+            async def close(self):
+                pass
+
+        return _WS()
+
+
+def test_dropped_and_garbled_sockets_count_as_disconnects():
+    report = asyncio.run(loadtest.run_load(_BrokenTransport(), _args(clients=3)))
+    assert report['counts']['sessions_opened'] == 3 and report['counts']['disconnects'] == 3
+
+
+def test_compare_flags_regressions():
+    base = {'turn_latency': {'p50_ms': 100.0, 'p99_ms': 200.0}, 'turns_per_s': 50.0, 'error_rate': 0.0}
+    new = {'turn_latency': {'p50_ms': 150.0, 'p99_ms': 180.0}, 'turns_per_s': 40.0, 'error_rate': 0.0}
+    out = loadtest.compare(base, new)
+    assert out['turn_latency.p50_ms']['regression'] == 0.5
+    assert out['turn_latency.p99_ms']['regression'] == -0.1
+    assert out['turns_per_s']['regression'] == 0.2
+    assert out['error_rate']['regression'] is None
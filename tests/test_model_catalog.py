@@ -0,0 +1,85 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.agent_manager import AgentManager
+from backend.model_catalog import ModelCatalog
+from backend.routing import Router
+
+
+class SlowFetch:
+    def __init__(self, delay=0.05, models=('gpt-5',)):
+        self.delay = delay
+        self.models = list(models)
+        self.calls = 0
+        self.fail = False
+        self.done = threading.Event()
+
+    def __call__(self, api_key):
+        self.calls += 1
+        time.sleep(self.delay)
+        try:
+            if self.fail:
+                raise ConnectionError('provider down')
+            return list(self.models)
+        finally:
+            self.done.set()
+
+
+def test_cold_cache_is_fetched_once_for_concurrent_callers():
+    fetch = SlowFetch()
+    cat = ModelCatalog(fetch, ttl=60)
+    with ThreadPoolExecutor(10) as pool:
+        results = list(pool.map(lambda _: cat.get('k'), range(10)))
+    assert fetch.calls == 1 and all(r == ['gpt-5'] for r in results)
+    cat.get('other-key')
+    assert fetch.calls == 2
+
+
+def test_stale_entry_is_served_while_refreshing_in_background():
+    now = [0.0]
+    fetch = SlowFetch(delay=0.0)
+    cat = ModelCatalog(fetch, ttl=10, clock=lambda: now[0])
+    cat.get('k')
+    fetch.models = ['gpt-5', 'gpt-5-mini']
+    now[0] = 11.0
+    fetch.done.clear()
+    assert cat.get('k') == ['gpt-5']            # stale answer, no waiting
+    assert fetch.done.wait(1.0)
+    time.sleep(0.01)
+    assert cat.get('k') == ['gpt-5', 'gpt-5-mini'] and cat.stats['stale_hits'] == 1
+
+    # a failed refresh keeps the old list
+    fetch.fail = True
+    now[0] = 30.0
+    fetch.done.clear()
+    assert cat.get('k') == ['gpt-5', 'gpt-5-mini']
+    assert fetch.done.wait(1.0)
+    time.sleep(0.01)
+    assert cat.get('k') == ['gpt-5', 'gpt-5-mini'] and cat.stats['refresh_errors'] == 1
+
+
+def test_cold_failure_is_raised_and_retried():
+    fetch = SlowFetch(delay=0.0)
+    fetch.fail = True
+    cat = ModelCatalog(fetch, ttl=60)
+    with pytest.raises(ConnectionError):
+        cat.get('k')
+    fetch.fail = False
+    assert cat.get('k') == ['gpt-5']
+
+
+def test_configured_models_are_checked_against_the_catalog():
+    m = AgentManager(router=Router({'Jury': ['gpt-5-nano', 'gpt-5']}))
+    cat = ModelCatalog(SlowFetch(delay=0.0, models=('gpt-5', 'gpt-5-codex')), ttl=60)
+    assert cat.missing('k', m.configured_models()) == ['gpt-5-nano']
+
+
+def test_models_endpoint_uses_the_fake_provider(monkeypatch):
+    monkeypatch.setenv('CEREBRAL_FAKE_PROVIDER', '1')
+    from backend.main import app
+    body = TestClient(app).get('/models').json()
+    assert 'gpt-5-codex' in body['models'] and body['missing_configured'] == []
@@ -0,0 +1,224 @@
+"""Performance regression tests, run with `pytest --perf`.
+
+Each metric is the best-of-`repeat` time per operation divided by the time of
+a fixed pure-Python calibration loop on the same machine, so stored baselines
+carry over between machines reasonably well. A metric fails when it is worse
+than its baseline in tests/perf_baselines.json by more than
+`--perf-threshold` (default 50%). `--perf --perf-save` rewrites the baselines.
+
+Scaling metrics are ratios (turn time with a long transcript over turn time
+with a short one); they catch accidental quadratic behaviour regardless of
+machine speed.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+import timeit
+import types
+from pathlib import Path
+
+import pytest
+
+from backend import openai_helper
+from backend.agent_manager import AgentManager
+from backend.utils import JuryStreamParser, parse_jury_line
+
+pytestmark = pytest.mark.perf
+
+BASELINES = Path(__file__).with_name('perf_baselines.json')
+
+
+def _calibration_loop():
+    total = 0
+    for i in range(20000):
+        total += i * i
+    return total
+
+
+class PerfRecorder:
+    def __init__(self, config):
+        self.threshold = config.getoption('--perf-threshold')
+        self.save_baselines = config.getoption('--perf-save')
+        self.baselines = json.loads(BASELINES.read_text())['metrics'] if BASELINES.exists() else {}
+        self.results = {}
+
+    @staticmethod
+    def calibrate() -> float:
+        return min(timeit.repeat(_calibration_loop, number=5, repeat=5)) / 5
+
+    def measure(self, name: str, fn, number: int = 100, repeat: int = 7, attempts: int = 3) -> float:
+        """Calibrated best-of-`repeat` time per call of `fn`, checked against the baseline.
+
+        A metric over its limit is measured again, up to `attempts` times in
+        all: a real regression stays slow, a noisy neighbour rarely does.
+        """
+        value = float('inf')
+        for _ in range(attempts):
+            # calibrated right next to the measurement, so both see the same machine state
+            before = self.calibrate()
+            seconds = min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+            value = min(value, seconds / min(before, self.calibrate()))
+            if self.within_limit(name, value):
+                break
+        self.check(name, value)
+        return value
+
+    def within_limit(self, name: str, value: float) -> bool:
+        baseline = self.baselines.get(name)
+        return baseline is None or self.save_baselines or value <= baseline * (1.0 + self.threshold)
+
+    def check(self, name: str, value: float):
+        self.results[name] = round(value, 6)
+        if not self.within_limit(name, value):
+            baseline = self.baselines[name]
+            raise AssertionError(f'{name} regressed: {value:.4g} vs baseline {baseline:.4g} '
+                                 f'(limit {baseline * (1.0 + self.threshold):.4g})')
+
+    def save(self):
+        BASELINES.write_text(json.dumps({'metrics': dict(sorted({**self.baselines, **self.results}.items()))},
+                                        indent=2) + '\n')
+
+
+@pytest.fixture(scope='module')
+def perf(request):
+    recorder = PerfRecorder(request.config)
+    yield recorder
+    if recorder.save_baselines:
+        recorder.save()
+
+
+class _StubStreamClient:
+    """Provider client whose stream yields `n` precomputed delta events with no delay."""
+
+    def __init__(self, n: int = 500, text: str = 'Verdict: Guilty; Confidence: 70%'):
+        events = [types.SimpleNamespace(type='response.output_text.delta', delta=' word') for _ in range(n - 1)]
+        events.append(types.SimpleNamespace(type='response.output_text.delta', delta=' ' + text))
+        self.events = events
+        self.responses = self
+
+    def stream(self, model, input, **kwargs):
+        events = self.events
+
+        class Ctx:
+            def __enter__(self):
+                return iter(events)
+
+            def __exit__(self, *exc):
+                return False
+
+        return Ctx()
+
+    def create(self, model, input, **kwargs):
+        return types.SimpleNamespace(output_text='Verdict: Guilty; Confidence: 70%', usage=None)
+
+
+def _session(manager, turns):
+    sid = manager.create_session('perf', 'The defendant was seen near the bank at 9pm. ' * 5)
+    sess = manager.get_session(sid)
+    for i in range(turns):
+        sess['transcript'].append(('User', f'Argument {i}: the witness could not have seen clearly.'))
+        sess['transcript'].append(('Judge', 'SUSTAINED - The objection is supported by the facts.'))
+    return sid, sess
+
+
+def test_transcript_and_prompt_assembly(perf):
+    m = AgentManager()
+    _, sess = _session(m, 100)
+    perf.measure('transcript_text_200_entries', lambda: m._transcript_text(sess), number=500)
+    perf.measure('opposing_prompt', lambda: m._opposing_prompt(sess, 'The witness lied.'), number=1000)
+    perf.measure('judge_prompt_200_entries', lambda: m._judge_prompt(sess), number=500)
+    perf.measure('jury_prompt_200_entries', lambda: m._jury_prompt(sess), number=500)
+
+
+def test_jury_parsing(perf):
+    # sub-microsecond calls are timed in batches so scheduler noise stays small against them
+    lines = [f'Verdict: {v}; Confidence: {c}%' for v in ('Guilty', 'Not Guilty') for c in range(40, 90)]
+    perf.measure('parse_jury_line_x100', lambda: [parse_jury_line(line) for line in lines], number=200)
+    chunks = ['Verdict', ': Not', ' Guilty', '; Conf', 'idence', ': 62', '%']
+
+    def stream_parse():
+        for _ in range(50):
+            p = JuryStreamParser()
+            for c in chunks:
+                p.feed(c)
+
+    perf.measure('jury_stream_parser_x50', stream_parse, number=100)
+
+
+def test_stream_normalization(perf, monkeypatch):
+    client = _StubStreamClient(500)
+    monkeypatch.setattr(openai_helper, 'get_client', lambda api_key: client)
+    perf.measure('stream_responses_500_events',
+                 lambda: sum(1 for _ in openai_helper.stream_responses('k', 'gpt-5', 'prompt')), number=20)
+
+
+def test_ws_fanout(perf, monkeypatch):
+    client = _StubStreamClient(200)
+    monkeypatch.setattr(openai_helper, 'get_client', lambda api_key: client)
+    monkeypatch.setattr('backend.agent_manager.resolve_api_key', lambda: 'k')
+    m = AgentManager()
+    sid, sess = _session(m, 5)
+    sink = []
+
+    def send_sync(payload):
+        sink.append(json.dumps(payload))
+
+    def turn():
+        del sess['transcript'][10:]
+        sink.clear()
+        m.run_turn_sequence_stream(sid, 'arg', send_sync)
+
+    perf.measure('stream_turn_fanout_600_deltas', turn, number=5)
+
+
+def test_session_store(perf):
+    m = AgentManager()
+
+    def lifecycle():
+        for _ in range(100):
+            sid = m.create_session('t', 'facts')
+            m.add_user_presentation(sid, 'argument')
+            m.get_session(sid)
+
+    perf.measure('session_create_present_get_x100', lifecycle, number=50)
+
+
+def test_turn_scaling_with_transcript_length(perf, monkeypatch):
+    client = _StubStreamClient(5)
+    monkeypatch.setattr(openai_helper, 'get_client', lambda api_key: client)
+    monkeypatch.setattr('backend.agent_manager.resolve_api_key', lambda: 'k')
+    m = AgentManager()
+
+    def turn_time(entries):
+        sid, sess = _session(m, entries // 2)
+
+        def turn():
+            del sess['transcript'][entries:]
+            m.run_turn_sequence(sid, 'arg')
+
+        return min(timeit.repeat(turn, number=20, repeat=5)) / 20
+
+    short = turn_time(20)
+    long = turn_time(2000)
+    # linear work in the transcript keeps this near the size ratio at worst; quadratic blows past it
+    perf.check('turn_time_ratio_2000_vs_20_entries', long / short)
+
+
+def test_cold_start_to_first_health(perf):
+    # a fresh interpreter each time: import backend.main and answer /health (see benchmarks/bench_startup.py)
+    code = ("import asyncio\n"
+            "from backend.main import app\n"
+            "from backend.loadtest import ASGITransport\n"
+            "assert asyncio.run(ASGITransport(app).request('GET', '/health'))[0] == 200\n")
+    root = Path(__file__).resolve().parent.parent
+    env = {**os.environ, 'PYTHONPATH': str(root)}
+
+    def cold_start():
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=root, env=env, check=True)
+        return time.perf_counter() - t0
+
+    best = min(cold_start() for _ in range(3))
+    perf.check('cold_start_to_first_health', best / perf.calibrate())
@@ -0,0 +1,52 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+from backend import profiling
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(200))
+
+
+def test_sampler_returns_collapsed_stacks_of_other_threads():
+    stop = threading.Event()
+    t = threading.Thread(target=busy_loop, args=(stop,), name='worker')
+    t.start()
+    try:
+        result = profiling.sample_stacks(seconds=0.3, hz=200)
+    finally:
+        stop.set()
+        t.join()
+    lines = result['collapsed'].splitlines()
+    assert lines and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    assert any(line.startswith('worker;') and 'busy_loop' in line for line in lines)
+    assert result['samples'] > 20 and result['sampler_cpu_fraction'] < 0.1
+
+
+def test_debug_endpoints_need_the_admin_token(monkeypatch):
+    from backend.main import app
+    client = TestClient(app)
+    assert client.get('/debug/profile', params={'seconds': 0.05}).status_code == 403
+    monkeypatch.setenv('CEREBRAL_ADMIN_TOKEN', 'secret')
+    assert client.get('/debug/profile', headers={'X-Admin-Token': 'nope'}).status_code == 403
+    resp = client.get('/debug/profile', params={'seconds': 0.05}, headers={'X-Admin-Token': 'secret'})
+    assert resp.status_code == 200 and int(resp.headers['x-profile-samples']) > 0
+
+
+def test_memory_diff_groups_growth_by_module(monkeypatch):
+    from backend.main import app
+    monkeypatch.setenv('CEREBRAL_ADMIN_TOKEN', 'secret')
+    client = TestClient(app)
+    auth = {'X-Admin-Token': 'secret'}
+    assert client.get('/debug/memory/diff', headers=auth).status_code == 409
+    client.post('/debug/memory/start', headers=auth)
+    try:
+        hoard = [bytearray(10_000) for _ in range(100)]
+        body = client.get('/debug/memory/diff', headers=auth).json()
+    finally:
+        client.post('/debug/memory/stop', headers=auth)
+    assert hoard
+    mine = [m for m in body['modules'] if m['module'].endswith('test_profiling')]
+    assert mine and mine[0]['size_diff'] >= 1_000_000
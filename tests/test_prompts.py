@@ -23,3 +23,66 @@ def test_run_turn_sequence_jury_parsing(monkeypatch):
     jury = res[-1]
     assert jury['agent'] == 'Jury'
     assert 'verdict' in jury and 'confidence' in jury
+
+
+def test_jury_stream_parser_matches_across_deltas():
+    from backend.utils import JuryStreamParser
+    parser = JuryStreamParser()
+    assert parser.feed('Verdict: Not ') is None
+    assert parser.feed('Guilty; Confidence: 7') is None
+    assert parser.feed('3% and then some') == ('Not Guilty', 73)
+    assert parser.text == 'Verdict: Not Guilty; Confidence: 73%'
+
+
+def test_stream_jury_stops_reading_after_verdict(monkeypatch):
+    from backend import openai_helper
+
+    consumed = []
+
+    class _Evt:
+        def __init__(self, delta):
+            self.type = 'response.output_text.delta'
+            self.delta = delta
+
+    class FakeResponses:
+        def stream(self, model, input, **kwargs):
+            deltas = ['ok'] if 'You are the Jury' not in input else \
+                ['Verdict: Guilty; ', 'Confidence: 80%', '\nextra', ' commentary']
+
+            class Ctx:
+                def __enter__(self_inner):
+                    def gen():
+                        for d in deltas:
+                            consumed.append(d)
+                            yield _Evt(d)
+                    return gen()
+
+                def __exit__(self_inner, exc_type, exc, tb):
+                    return False
+            return Ctx()
+
+    class FakeOpenAI:
+        def __init__(self, api_key=None):
+            self.responses = FakeResponses()
+
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(openai_helper, 'OpenAI', FakeOpenAI)
+    manager = AgentManager()
+    sid = manager.create_session('t', 'facts')
+    sent = []
+    manager.run_turn_sequence_stream(sid, 'arg', sent.append)
+
+    verdicts = [p for p in sent if p['type'] == 'verdict']
+    assert verdicts == [{'type': 'verdict', 'agent': 'Jury', 'verdict': 'Guilty', 'confidence': 80}]
+    assert '\nextra' not in consumed
+    assert sent[-1]['text'] == 'Verdict: Guilty; Confidence: 80%'
+
+
+def test_stream_sends_verdict_message_in_mock_and_ensemble_modes(monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    for manager in (AgentManager(), AgentManager(jurors=3)):
+        sid = manager.create_session('t', 'facts')
+        sent = []
+        manager.run_turn_sequence_stream(sid, 'arg', sent.append)
+        verdicts = [p for p in sent if p['type'] == 'verdict']
+        assert verdicts == [{'type': 'verdict', 'agent': 'Jury', 'verdict': 'Guilty', 'confidence': 60}]
@@ -0,0 +1,54 @@
+from backend.agent_manager import AgentManager
+from backend.retrieval import GAP, FactIndex, chunk_facts
+from backend.tokens import count as count_tokens
+
+FILLER = ("Exhibit {i}: the ledger for week {i} lists routine deliveries, invoices and staff rotas. "
+          "Nothing in the entries for week {i} was disputed by either party.")
+ALIBI = "The defendant's sister testified that the defendant was at her birthday dinner in Leeds until midnight."
+
+
+def _case(paragraphs=400):
+    parts = [FILLER.format(i=i) for i in range(paragraphs)]
+    parts[paragraphs * 3 // 5] = ALIBI
+    return '\n\n'.join(parts)
+
+
+def test_chunks_follow_paragraphs_and_split_long_ones():
+    long = ' '.join(f'Sentence number {i} is here.' for i in range(200))
+    chunks = chunk_facts('Short one.\n\n' + long, chunk_tokens=50)
+    assert chunks[0] == 'Short one.' and len(chunks) > 5
+    assert all(count_tokens(c) <= 50 for c in chunks[1:])
+    assert ' '.join(chunks[1:]) == long
+
+
+def test_select_returns_relevant_chunks_within_budget():
+    index = FactIndex(_case())
+    facts = index.select('Was the defendant at the birthday dinner in Leeds?', budget=300, k=4)
+    assert ALIBI in facts and count_tokens(facts) <= 300 + 4 * 2
+    assert facts.count(GAP) >= 2 and facts.endswith(GAP)
+    small = 'Seen near the bank at 9pm.'
+    assert FactIndex(small).select('anything', budget=300) == small
+
+
+def test_select_keeps_document_order_and_falls_back_to_leading_chunks():
+    index = FactIndex(_case(paragraphs=50))
+    picked = index.select('week 40 week 3', budget=200, k=2).split('\n')
+    week3 = next(i for i, p in enumerate(picked) if 'week 3 ' in p)
+    assert week3 < next(i for i, p in enumerate(picked) if 'week 40' in p)
+    assert index.select('zzz', budget=200, k=1).startswith('Exhibit 0:')
+
+
+def test_agents_get_retrieved_facts_and_one_index_per_text():
+    m = AgentManager(fact_budget=300, fact_top_k=4)
+    facts = _case()
+    sid = m.create_session('t', facts)
+    other = m.create_session('t', facts)
+    sess = m.get_session(sid)
+    assert m._fact_index(sess) is m._fact_index(m.get_session(other))
+    m.add_user_presentation(sid, 'My client was at a birthday dinner in Leeds.')
+    for prompt in (m._opposing_prompt(sess, 'My client was at a birthday dinner in Leeds.'),
+                   m._judge_prompt(sess), m._jury_prompt(sess)):
+        assert ALIBI in prompt and len(prompt) < len(facts) / 10
+    full = AgentManager()
+    full_sid = full.create_session('t', facts)
+    assert facts in full._judge_prompt(full.get_session(full_sid))
@@ -0,0 +1,76 @@
+import time
+
+from backend.agent_manager import AgentManager
+from backend.routing import Router
+
+
+def fake_send(latency, replies):
+    def make(role_reply):
+        def send(model):
+            time.sleep(latency[model])
+            return replies.get(model, role_reply)
+        return send
+    return make
+
+
+def test_prefers_first_candidate_within_slo_and_falls_back_when_slow():
+    r = Router({'Jury': ['big', 'small']}, slo_ms={'Jury': 15}, min_samples=3, explore_every=1000)
+    latency = {'big': 0.03, 'small': 0.001}
+    send = fake_send(latency, {})('Verdict: Guilty; Confidence: 70%')
+    for _ in range(6):
+        r.call('Jury', 'big', send)
+    # big misses the 15 ms SLO, so the fast candidate takes over
+    assert r.choose('Jury', 'big') == {'model': 'small', 'reason': 'within_slo'}
+
+    latency['big'] = 0.001
+    r2 = Router({'Jury': ['big', 'small']}, slo_ms={'Jury': 15}, min_samples=3, explore_every=1000)
+    for _ in range(6):
+        r2.call('Jury', 'big', send)
+    assert r2.choose('Jury', 'big')['model'] == 'big'
+
+
+def test_quality_guard_retries_on_default_and_demotes_model():
+    r = Router({'Jury': ['small', 'gpt-5']}, min_samples=2, explore_every=1000)
+    replies = {'small': 'I think guilty', 'gpt-5': 'Verdict: Not Guilty; Confidence: 55%'}
+    calls = []
+
+    def send(model):
+        calls.append(model)
+        return replies[model]
+
+    assert r.call('Jury', 'gpt-5', send) == 'Verdict: Not Guilty; Confidence: 55%'
+    assert calls == ['small', 'gpt-5']
+    for _ in range(3):
+        r.call('Jury', 'gpt-5', send)
+    assert r.choose('Jury', 'gpt-5')['model'] == 'gpt-5'
+    report = r.report()
+    assert report['roles']['Jury']['models']['small']['quality_failure_rate'] == 1.0
+    assert any(d['reason'] == 'guard_fallback' for d in report['decisions'])
+
+
+def test_errors_on_routed_model_fall_back_to_default():
+    r = Router({'Judge': ['flaky']}, min_samples=1)
+
+    def send(model):
+        if model == 'flaky':
+            raise ConnectionError('down')
+        return 'SUSTAINED - fine'
+
+    assert r.call('Judge', 'gpt-5', send) == 'SUSTAINED - fine'
+    assert r.stats['Judge']['flaky'].rate('error') == 1.0
+
+
+def test_manager_routes_roles(monkeypatch):
+    monkeypatch.setattr('backend.agent_manager.resolve_api_key', lambda: 'test')
+    used = []
+
+    def fake_call(api_key, model, input_text, **kwargs):
+        used.append(model)
+        return 'Verdict: Guilty; Confidence: 80%' if 'You are the Jury' in input_text else 'SUSTAINED - ok'
+
+    monkeypatch.setattr('backend.openai_helper.call_responses', fake_call)
+    m = AgentManager(router=Router({'Jury': ['gpt-5-mini']}))
+    sid = m.create_session('t', 'f')
+    res = m.run_turn_sequence(sid, 'arg')
+    assert used == ['gpt-5-codex', 'gpt-5', 'gpt-5-mini']
+    assert res[-1]['verdict'] == 'Guilty'
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from backend import openai_helper
+from backend.fake_provider import FakeOpenAI
+from backend.limiter import AIMDLimiter
+from backend.scheduling import Budgets, FairQueue, call_class, current
+from backend.simulation import run_simulation
+
+
+def test_interactive_calls_jump_the_batch_queue():
+    lim = AIMDLimiter(initial=1, maximum=1, budgets=Budgets())
+    held = lim.acquire(priority='interactive')
+    order = []
+
+    def waiter(priority, name):
+        t = lim.acquire(priority=priority)
+        order.append(name)
+        lim.release(t, 1.0)
+
+    threads = [threading.Thread(target=waiter, args=('batch', f'b{i}')) for i in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    live = threading.Thread(target=waiter, args=('interactive', 'live'))
+    live.start()
+    time.sleep(0.05)
+    lim.release(held, 1.0)
+    for t in threads + [live]:
+        t.join(2)
+    assert order[0] == 'live' and len(order) == 4
+
+
+def test_batch_share_leaves_headroom_for_interactive():
+    lim = AIMDLimiter(initial=4, maximum=4, budgets=Budgets())
+    batch = [lim.acquire(priority='batch') for _ in range(3)]
+    try:
+        lim.acquire(timeout=0.05, priority='batch')
+        assert False, 'batch exceeded its share of the window'
+    except TimeoutError:
+        pass
+    t = lim.acquire(timeout=0.05, priority='interactive')
+    assert lim.snapshot()['inflight_by_class'] == {'interactive': 1, 'spectator': 0, 'batch': 3}
+    for tk in batch + [t]:
+        lim.release(tk, 1.0)
+
+
+def test_weighted_fair_queuing_between_tenants():
+    q = FairQueue(Budgets(weights={'a': 2}))
+    for _ in range(6):
+        q.push('batch', 'a')
+    for _ in range(6):
+        q.push('batch', 'b')
+    served = [q.pop({}, 100, time.monotonic()).tenant for _ in range(6)]
+    assert served.count('a') == 4 and served.count('b') == 2
+
+
+def test_token_bucket_budget_per_class_and_tenant():
+    now = time.monotonic()
+    q = FairQueue(Budgets(class_rates={'batch': 5}, tenant_rates={'slow': 1}))
+    for _ in range(8):
+        q.push('batch', 'fast')
+    q.push('batch', 'slow')
+    q.push('batch', 'slow')
+    granted = [q.pop({}, 100, now) for _ in range(6)]
+    assert sum(w is not None for w in granted) == 5
+    assert 0 < q.retry_after(now) <= 0.2
+    # the class budget refills; the slow tenant still gets only its one token
+    later = now + 10
+    tenants = [w.tenant for w in iter(lambda: q.pop({}, 100, later), None)]
+    assert tenants.count('slow') <= 1
+
+
+def test_simulation_runs_in_batch_class(monkeypatch):
+    seen = set()
+
+    class Recording(FakeOpenAI):
+        def _reply(self, prompt, structured=False):
+            seen.add(current())
+            return super()._reply(prompt, structured)
+
+    fake = Recording(seed=1)
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(openai_helper, 'OpenAI', lambda api_key=None: fake)
+    run_simulation('facts', ['arg'], trials=4, concurrency=2, tenant='acme', bootstrap=50)
+    assert seen == {('batch', 'acme')}
+    with call_class('spectator'):
+        assert current() == ('spectator', 'default')
+    assert current() == ('interactive', 'default')
@@ -0,0 +1,83 @@
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from backend import openai_helper
+from backend.fake_provider import FakeOpenAI
+from backend.simulation import run_simulation, summarize
+
+
+def _use_fake(monkeypatch, **kw):
+    fake = FakeOpenAI(**kw)
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(openai_helper, 'OpenAI', lambda api_key=None: fake)
+    return fake
+
+
+def test_summarize_histogram_quantiles_and_ci():
+    trials = [{'verdict': 'Guilty', 'confidence': 80}] * 6 + [{'verdict': 'Not Guilty', 'confidence': 40}] * 4
+    s = summarize(trials, seed=1)
+    assert s['histogram']['Guilty'] == 6 and s['histogram']['Not Guilty'] == 4
+    assert s['confidence']['quantiles']['p50'] == 80
+    ci = s['guilty_rate_ci']
+    assert ci['low'] <= 0.6 <= ci['high']
+
+
+def test_simulation_throughput_scales_with_concurrency(monkeypatch):
+    _use_fake(monkeypatch, latency=0.02, seed=5)
+    t0 = time.perf_counter()
+    run_simulation('facts', ['arg'], trials=8, concurrency=1)
+    serial = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    res = run_simulation('facts', ['arg'], trials=8, concurrency=8)
+    parallel = time.perf_counter() - t0
+    assert res['trials'] == 8
+    assert serial / parallel > 4
+
+
+def test_simulation_stops_once_interval_is_tight(monkeypatch):
+    _use_fake(monkeypatch, guilty_rate=1.0)
+    progress = []
+    res = run_simulation('facts', ['arg'], trials=500, concurrency=4, target_ci_width=0.05,
+                         min_trials=20, on_progress=progress.append, bootstrap=200)
+    assert res['stopped_early']
+    assert res['trials'] < 500
+    assert progress[-1]['completed'] == res['trials']
+
+
+def test_simulate_endpoint_streams_progress(monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    import backend.main as mainmod
+    client = TestClient(mainmod.app)
+    r = client.post('/api/simulate', json={'facts': 'f', 'arguments': ['a'], 'trials': 5, 'concurrency': 2})
+    events = [json.loads(line[6:]) for line in r.text.splitlines() if line.startswith('data: ')]
+    assert [e['type'] for e in events].count('progress') == 5
+    assert events[-1]['type'] == 'done'
+    assert events[-1]['summary']['histogram']['Guilty'] == 5
+
+
+def test_agent_errors_count_as_failed_trials(monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+
+    class Down:
+        def __init__(self, api_key=None):
+            self.responses = self
+
+        def create(self, model, input, **kwargs):
+            raise RuntimeError('provider down')
+
+    monkeypatch.setattr(openai_helper, 'OpenAI', Down)
+    res = run_simulation('facts', ['arg'], trials=4, concurrency=2)
+    assert res['errors'] == 4
+    assert res['trials'] == 0
+
+
+def test_stop_event_stops_launching_trials(monkeypatch):
+    import threading
+    _use_fake(monkeypatch, latency=0.01)
+    stop = threading.Event()
+    stop.set()
+    res = run_simulation('facts', ['arg'], trials=100, concurrency=2, stop_event=stop)
+    assert res['cancelled']
+    assert res['trials'] == 2
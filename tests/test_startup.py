@@ -0,0 +1,22 @@
+import subprocess
+import sys
+from pathlib import Path
+
+
+def test_importing_the_app_does_not_load_the_provider_sdk():
+    root = Path(__file__).resolve().parent.parent
+    code = "import sys, backend.main; print('openai' in sys.modules)"
+    out = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == 'False'
+
+
+def test_env_flags_treat_zero_false_and_no_as_off(monkeypatch):
+    from backend.utils import env_flag
+    for value in ('0', 'false', 'No', 'off'):
+        monkeypatch.setenv('CEREBRAL_STRUCTURED', value)
+        assert env_flag('CEREBRAL_STRUCTURED') is False
+    for value in ('1', 'true', 'YES', 'on'):
+        monkeypatch.setenv('CEREBRAL_STRUCTURED', value)
+        assert env_flag('CEREBRAL_STRUCTURED') is True
+    monkeypatch.delenv('CEREBRAL_STRUCTURED')
+    assert env_flag('CEREBRAL_STRUCTURED') is False and env_flag('CEREBRAL_STRUCTURED', default=True) is True
@@ -0,0 +1,41 @@
+import gzip
+import os
+import time
+
+from fastapi.testclient import TestClient
+
+from backend.static_assets import StaticAssets, choose_encoding
+
+
+def test_root_serves_precompressed_demo_with_etag_and_304():
+    from backend.main import app
+    client = TestClient(app)
+    r = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert r.status_code == 200 and r.headers['content-encoding'] == 'gzip'
+    assert '<html' in r.text.lower()
+    assert r.headers['etag'].endswith('-gz"') and 'max-age' in r.headers['cache-control']
+    assert r.headers['vary'] == 'Accept-Encoding'
+    again = client.get('/demo.html', headers={'Accept-Encoding': 'gzip', 'If-None-Match': r.headers['etag']})
+    assert again.status_code == 304 and again.content == b''
+    plain = client.get('/', headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in plain.headers and plain.headers['etag'] != r.headers['etag']
+
+
+def test_encoding_negotiation():
+    assert choose_encoding('gzip, deflate, br', {'identity', 'gzip', 'br'}) == 'br'
+    assert choose_encoding('br;q=0, gzip', {'identity', 'gzip', 'br'}) == 'gzip'
+    assert choose_encoding('br', {'identity', 'gzip'}) == 'identity'
+    assert choose_encoding('', {'identity', 'gzip'}) == 'identity'
+
+
+def test_reload_mode_picks_up_changes(tmp_path):
+    page = tmp_path / 'page.html'
+    page.write_text('<p>one</p>' * 100)
+    assets = StaticAssets(tmp_path, reload=True)
+    first = assets.get('page.html')
+    assert gzip.decompress(first.variants['gzip'][0]) == page.read_bytes()
+    assert assets.get('page.html') is first
+    page.write_text('<p>two</p>' * 100)
+    os.utime(page, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+    assert assets.get('page.html') is not first
+    assert assets.get('../etc/passwd') is None and assets.get('missing.html') is None
@@ -0,0 +1,87 @@
+import json
+
+from backend import openai_helper, structured as so
+from backend.agent_manager import AgentManager
+from backend.fake_provider import FakeOpenAI
+
+
+def test_validator_normalises_and_rejects():
+    fields, err = so.JURY_VALIDATOR({'verdict': 'not guilty', 'confidence': 73.0})
+    assert err is None and fields == {'verdict': 'Not Guilty', 'confidence': 73}
+    assert so.JURY_VALIDATOR({'verdict': 'Guilty', 'confidence': 140})[0] is None
+    assert so.JUDGE_VALIDATOR({'ruling': 'SUSTAINED'})[1] == 'missing reason'
+    assert so.JUDGE_VALIDATOR({'ruling': 'SUSTAINED', 'reason': 'x', 'extra': 1})[0] is None
+
+
+def test_parse_falls_back_to_lenient_formats():
+    assert so.parse_jury('```json\n{"verdict": "Guilty", "confidence": 80}\n```') == \
+        ({'verdict': 'Guilty', 'confidence': 80}, 'json')
+    assert so.parse_jury('Verdict: No Verdict; Confidence: 50%') == \
+        ({'verdict': 'No Verdict', 'confidence': 50}, 'lenient')
+    assert so.parse_judge('OVERRULED - not relevant.') == \
+        ({'ruling': 'OVERRULED', 'reason': 'not relevant.'}, 'lenient')
+    assert so.parse_jury('I cannot decide') == (None, 'failed')
+
+
+def test_stream_parser_emits_fields_before_object_closes():
+    parser = so.JsonFieldStreamParser(so.JUDGE_VALIDATOR)
+    text = '{"ruling": "sustained", "reason": "He said \\"no\\", twice."}'
+    emitted = []
+    for ch in text[:-1]:
+        emitted.extend(parser.feed(ch))
+    assert emitted == [('ruling', 'SUSTAINED'), ('reason', 'He said "no", twice.')]
+    assert not parser.done
+    parser.feed('}')
+    assert parser.done
+
+
+def test_stream_parser_scalars_and_nested_values():
+    parser = so.JsonFieldStreamParser()
+    out = parser.feed('{"a": 12, "b": {"c": [1, "}"]}, "d": true}')
+    assert out == [('a', 12), ('b', {'c': [1, '}']}), ('d', True)]
+
+
+def test_structured_turn_stream_reports_fields(monkeypatch):
+    fake = FakeOpenAI(seed=3)
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(openai_helper, 'OpenAI', lambda api_key=None: fake)
+    manager = AgentManager(structured=True)
+    sid = manager.create_session('t', 'facts')
+    sent = []
+    manager.run_turn_sequence_stream(sid, 'arg', sent.append)
+
+    fields = [(p['agent'], p['name']) for p in sent if p['type'] == 'field']
+    assert fields == [('Judge', 'ruling'), ('Judge', 'reason'), ('Jury', 'verdict'), ('Jury', 'confidence')]
+    jury = sent[-1]
+    assert jury['type'] == 'done' and jury['parse'] == 'json'
+    assert jury['text'].startswith('Verdict: ')
+    assert json.loads(json.dumps(jury))  # payload stays JSON-serialisable
+
+
+def test_schema_and_token_cap_reach_the_provider(monkeypatch):
+    fake = FakeOpenAI()
+    monkeypatch.setattr(openai_helper, 'OpenAI', lambda api_key=None: fake)
+    text = openai_helper.call_responses('k', 'm', 'You are the Jury', max_tokens=60,
+                                        text=so.text_format('jury_verdict', so.JURY_SCHEMA))
+    assert fake.last_kwargs['max_output_tokens'] == 60
+    assert fake.last_kwargs['text']['format']['type'] == 'json_schema'
+    assert so.parse_jury(text)[1] == 'json'
+
+
+def test_only_the_rejected_kwarg_is_dropped(monkeypatch):
+    fake = FakeOpenAI()
+    monkeypatch.setattr(openai_helper, 'OpenAI', lambda api_key=None: fake)
+    openai_helper.call_responses('k', 'm', 'You are the Judge', stop=['\n'],
+                                 text=so.text_format('judge_ruling', so.JUDGE_SCHEMA))
+    assert set(fake.last_kwargs) == {'text'}
+
+
+def test_structured_ensemble_asks_jurors_for_json(monkeypatch):
+    fake = FakeOpenAI(seed=2)
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(openai_helper, 'OpenAI', lambda api_key=None: fake)
+    manager = AgentManager(jurors=3, structured=True)
+    sid = manager.create_session('t', 'facts')
+    jury = manager.run_turn_sequence(sid, 'arg')[-1]
+    assert all(json.loads(e['text'])['verdict'] for e in jury['ensemble']['jurors'])
+    assert jury['ensemble']['aggregate']['jurors'] == 3
@@ -0,0 +1,57 @@
+import json
+import logging
+
+from fastapi.testclient import TestClient
+
+from backend import openai_helper, telemetry
+from backend.agent_manager import AgentManager
+from backend.fake_provider import FakeOpenAI
+from backend.telemetry import PHASE_SECONDS, TOKENS_PER_SECOND, Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = Histogram('x_seconds', 'help', ('agent',), (0.1, 1.0))
+    for v in (0.05, 0.5, 2.0):
+        h.observe(v, 'Judge')
+    lines = h.render()
+    assert lines[:2] == ['# HELP x_seconds help', '# TYPE x_seconds histogram']
+    assert 'x_seconds_bucket{agent="Judge",le="0.1"} 1' in lines
+    assert 'x_seconds_bucket{agent="Judge",le="1.0"} 2' in lines
+    assert 'x_seconds_bucket{agent="Judge",le="+Inf"} 3' in lines
+    assert 'x_seconds_count{agent="Judge"} 3' in lines
+    assert h.count('Judge') == 3
+
+
+def test_streamed_turn_records_every_phase_per_agent(monkeypatch, caplog):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(openai_helper, 'OpenAI', lambda api_key=None: FakeOpenAI(latency=0.01))
+    m = AgentManager()
+    sid = m.create_session('t', 'facts')
+    before = {(a, p): PHASE_SECONDS.count(a, p) for a in ('Opposing', 'Judge', 'Jury') for p in telemetry.PHASES}
+    sent = []
+    with caplog.at_level(logging.DEBUG, logger='cerebral.trace'):
+        m.run_turn_sequence_stream(sid, 'arg', sent.append)
+
+    def grew(agent, phase):
+        return PHASE_SECONDS.count(agent, phase) > before[(agent, phase)]
+
+    for agent in ('Opposing', 'Judge', 'Jury'):
+        for phase in ('queue_wait', 'prompt_render', 'provider_connect', 'ttft', 'send'):
+            assert grew(agent, phase), (agent, phase)
+    assert grew('Judge', 'gap') and grew('Jury', 'gap') and grew('Judge', 'parse')
+    assert TOKENS_PER_SECOND.count('Opposing', 'gpt-5-codex') >= 1
+
+    trace = json.loads(caplog.records[-1].getMessage())
+    assert trace['session'] == sid and trace['mode'] == 'stream'
+    assert {s[0] for s in trace['spans']} == {'Opposing', 'Judge', 'Jury'}
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    from backend.main import app
+    m = AgentManager()
+    sid = m.create_session('t', 'facts')
+    m.run_turn_sequence(sid, 'arg')
+    resp = TestClient(app).get('/metrics')
+    assert resp.status_code == 200 and resp.headers['content-type'].startswith('text/plain')
+    assert '# TYPE cerebral_agent_phase_seconds histogram' in resp.text
+    assert 'cerebral_turn_seconds_count{mode="sync"}' in resp.text
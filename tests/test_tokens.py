@@ -0,0 +1,120 @@
+import types
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import tokens
+from backend.agent_manager import AgentManager
+from backend.transcript import Transcript
+
+
+def test_approximation_follows_pretokenizer_pieces():
+    assert tokens.count('') == 0
+    assert tokens.approximate('Hello world') == 2
+    assert tokens.approximate('The defendant was seen near the bank at 9pm.') == 11
+    assert tokens.approximate('1234567') == 3
+    assert tokens.approximate('Verdict: Guilty;\n\nConfidence: 70%') == 9
+    assert tokens.approximate('incomprehensibilities') == 2
+
+
+def test_calibration_scales_estimates_towards_reported_counts():
+    prompt = 'The witness could not have seen the car from the window. ' * 20
+    estimate = tokens.count(prompt)
+    for _ in range(200):
+        tokens.calibrate(prompt, types.SimpleNamespace(input_tokens=int(estimate * 1.3)))
+    # only the warm-up calls and one in sixteen after them are measured
+    assert tokens._samples == tokens._WARMUP + (200 - tokens._WARMUP) // tokens._SAMPLE_EVERY
+    for _ in range(1000):
+        tokens.calibrate(prompt, types.SimpleNamespace(input_tokens=int(estimate * 1.3)))
+    assert tokens.scale() == pytest.approx(1.3, rel=0.01)
+    assert tokens.count(prompt) == pytest.approx(estimate * 1.3, rel=0.01)
+    tokens.calibrate('too short to learn from', types.SimpleNamespace(input_tokens=1000))
+    tokens.calibrate(prompt, None)
+    assert tokens.scale() == pytest.approx(1.3, rel=0.01)
+
+
+def test_transcript_counts_are_cached_sums_and_drive_windowing():
+    t = Transcript()
+    for i in range(200):
+        t.append(('User' if i % 2 == 0 else 'Judge', f'entry {i} about the timeline of the evening'))
+    assert t.tokens() == sum(tokens.count(line) + 1 for line in t.text().split('\n'))
+    fork = t.fork(100)
+    fork.append(('Jury', 'Verdict: Guilty; Confidence: 70%'))
+    assert fork.tokens() == t.tokens() - t.tokens(100) + tokens.count('Jury: Verdict: Guilty; Confidence: 70%') + 1
+    start = t.window_start(300)
+    assert t.tokens(start) <= 300 < t.tokens(start - 1)
+    del t[150:]
+    assert t.tokens() == sum(tokens.count(line) + 1 for line in t.text().split('\n'))
+    assert t.text(149) == 'Judge: entry 149 about the timeline of the evening'
+
+
+def test_max_prompt_tokens_windows_the_transcript():
+    m = AgentManager(max_prompt_tokens=600)
+    sid = m.create_session('t', 'The defendant was seen near the bank at 9pm.')
+    for i in range(300):
+        m.add_user_presentation(sid, f'Argument {i}: the witness could not have seen clearly.')
+    sess = m.get_session(sid)
+    for prompt in (m._judge_prompt(sess), m._jury_prompt(sess)):
+        # the size a prompt carries is summed from cached counts and matches the rendered text
+        assert prompt.tokens == pytest.approx(tokens.count(str(prompt)), rel=0.02)
+        assert tokens.count(str(prompt)) <= 600
+        assert 'earlier entries omitted]' in prompt and 'Argument 299:' in prompt
+        assert 'The defendant was seen near the bank at 9pm.' in prompt
+    m.max_prompt_tokens = 0
+    assert 'omitted' not in m._judge_prompt(sess)
+
+
+def test_ensemble_juror_prompts_fit_max_prompt_tokens(monkeypatch):
+    sent = []
+
+    def fake_call(api_key, model, input_text, **kwargs):
+        sent.append(input_text)
+        return '{"verdict": "Guilty", "confidence": 70}'
+
+    monkeypatch.setattr('backend.jury_ensemble.call_responses', fake_call)
+    monkeypatch.setattr('backend.agent_manager.resolve_api_key', lambda: 'k')
+    m = AgentManager(jurors=3, structured=True, max_prompt_tokens=600)
+    sid = m.create_session('t', 'The defendant was seen near the bank at 9pm.')
+    for i in range(300):
+        m.add_user_presentation(sid, f'Argument {i}: the witness could not have seen clearly.')
+    m.run_jury_ensemble(sid)
+    assert len(sent) == 3
+    assert all(tokens.count(str(p)) <= p.tokens <= 600 and 'earlier entries omitted]' in p for p in sent)
+
+
+def test_estimate_turn_matches_rendered_prompts_and_prices_them():
+    m = AgentManager()
+    sid = m.create_session('t', 'The defendant was seen near the bank at 9pm. ' * 50)
+    m.add_user_presentation(sid, 'My client was at home.')
+    estimate = m.estimate_turn(sid, 'The witness was too far away.')
+    by_agent = {a['agent']: a for a in estimate['agents']}
+    sess = m.get_session(sid)
+    prompt = m._opposing_prompt(sess, 'The witness was too far away.')
+    rendered = tokens.count(str(prompt))
+    assert prompt.tokens == pytest.approx(rendered, rel=0.02)
+    assert by_agent['Opposing']['prompt_tokens'] == pytest.approx(rendered, rel=0.02)
+    assert by_agent['Jury']['prompt_tokens'] > by_agent['Judge']['prompt_tokens'] > rendered
+    priced = sum(tokens.estimate_cost(a['model'], a['prompt_tokens'], a['max_output_tokens'])
+                 for a in estimate['agents'])
+    assert estimate['max_cost_usd'] == pytest.approx(priced, abs=1e-5)
+    assert len(sess['transcript']) == 1
+
+
+def test_prices_can_be_overridden(monkeypatch):
+    assert tokens.estimate_cost('gpt-5', 1_000_000, 1_000_000) == pytest.approx(11.25)
+    assert tokens.estimate_cost('unknown-model', 10) is None
+    monkeypatch.setenv('CEREBRAL_PRICES', 'gpt-5=2/20,unknown-model=1/1')
+    # read once, until reset
+    assert tokens.estimate_cost('gpt-5', 1_000_000) == pytest.approx(1.25)
+    tokens.reset()
+    assert tokens.estimate_cost('gpt-5', 1_000_000) == pytest.approx(2.0)
+    assert tokens.estimate_cost('unknown-model', 1_000_000, 1_000_000) == pytest.approx(2.0)
+
+
+def test_estimate_endpoint():
+    from backend.main import app
+    client = TestClient(app)
+    sid = client.post('/api/session', json={'title': 't', 'facts': 'f'}).json()['session_id']
+    body = client.post(f'/api/session/{sid}/estimate', json={'argument': 'a'}).json()
+    assert [a['agent'] for a in body['agents']] == ['Opposing', 'Judge', 'Jury'] and body['max_cost_usd'] > 0
+    assert client.post('/api/session/nope/estimate', json={'argument': 'a'}).json() == {'error': 'session not found'}